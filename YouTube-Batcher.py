@@ -1,174 +1,5262 @@
 #!/usr/bin/env python3
 """
 YouTube Batch Downloader - The Batcher
-Sequential batch downloading with individual output folders
+Batch downloading with individual output folders
 - Add unlimited URL + output folder pairs
-- Sequential processing with progress tracking
+- Queue processed by one or more parallel workers, with progress tracking
 - Save/load batch lists
 - Pause/resume capability
+- Persistent per-item run logs with rotation and compression
+- Optional parallel workers spread over a pool of source IPs/proxies
+- Look-ahead metadata extraction for upcoming single-video items
+- Distributed batches: a coordinator leases items to headless worker nodes
+- Time-window schedules with bandwidth and worker limits
+- Recovery of partial downloads left behind by Stop or a crash
+- Speech dataset mode: cheapest audio stream converted to 16 kHz mono WAV/FLAC
+- Optional tar shard output (WebDataset layout) with a per-shard offset index
+- Optional speech segmentation (energy + zero-crossing VAD, needs NumPy)
+- Harvest mode: info JSON, subtitles and thumbnails only, into a compact SQLite store
+- Debug profiling (cProfile, tracemalloc, signal latency) per run
+- Size/bitrate budgets that pick each video's format, with projected vs actual bytes
 - Compatible with macOS 10.14+
 """
 
 import sys
 import os
+import pstats
+import argparse
+import cProfile
+import contextlib
+import csv
 import subprocess
+import tarfile
 import json
+import gzip
+import hashlib
+import http.client
+import io
+import itertools
+import mmap
+import queue
+import re
+import shutil
+import signal
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+import tracemalloc
+import urllib.parse
+import uuid
+import xmlrpc.client
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from xmlrpc.server import SimpleXMLRPCServer
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                            QHBoxLayout, QLabel, QLineEdit, QPushButton,
-                           QTextEdit, QComboBox, QProgressBar, QGroupBox,
-                           QCheckBox, QMessageBox, QFileDialog, QTableWidget,
-                           QTableWidgetItem, QHeaderView, QAbstractItemView)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+                           QPlainTextEdit, QComboBox, QProgressBar, QGroupBox,
+                           QCheckBox, QSpinBox, QMessageBox, QFileDialog, QTableWidget,
+                           QTableWidgetItem, QHeaderView, QAbstractItemView,
+                           QDialog, QDoubleSpinBox)
+from PyQt5.QtCore import Qt, QCoreApplication, QObject, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QTextCursor
 
+try:
+    import numpy as np  # Optional: speech segmentation (VAD)
+except ImportError:
+    np = None
+
+try:
+    import fcntl  # File locks shared between processes and machines (POSIX)
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt  # Their Windows counterpart
+except ImportError:
+    msvcrt = None
+
+# Application data (run logs, caches)
+APP_DATA_DIR = os.path.join(os.path.expanduser('~'), '.the-batcher')
+LOG_DIR = os.path.join(APP_DATA_DIR, 'logs')
+
+# Run log settings
+LOG_ROTATE_BYTES = 10 * 1024 * 1024  # Rotate each log file at 10 MB
+LOG_BACKUP_COUNT = 5                 # Compressed segments kept per log file
+LOG_TAIL_LINES = 2000                # Lines kept in the GUI log view
+LOG_TAIL_INTERVAL_MS = 250           # How often the GUI polls the run log
+LOG_TAIL_MAX_BYTES = 512 * 1024      # Max bytes the GUI reads per poll
+LOG_PAGE_LINES = 1000                # Lines per page in the log viewer
+
+# Parallel workers and egress routes
+MAX_WORKERS = 8
+ROUTE_CHECK_INTERVAL = 60            # Seconds between route health checks
+ROUTE_CHECK_TIMEOUT = 5              # Seconds to wait for a proxy to answer
+ROUTE_COOLDOWN_SECONDS = 300         # First cooldown after a 403/429
+ROUTE_MAX_COOLDOWN_SECONDS = 3600    # Cooldown cap for repeat offenders
+ROUTE_MAX_RETRIES = 3                # Times an item may move to another route
+PAUSE_MAX_RETRIES = 1                # Extra tries for an item that failed after a pause
+THROTTLE_PATTERN = re.compile(r'HTTP Error (403|429)\b')
+
+# Cookie profile pool
+COOKIE_COOLDOWN_SECONDS = 900        # First rest after an account error
+COOKIE_MAX_COOLDOWN_SECONDS = 6 * 3600
+COOKIE_ERROR_WINDOW = 20             # Recent items a profile's failure rate is taken over
+COOKIE_MIN_ITEMS = 5                 # Items before the failure rate can rest a profile
+COOKIE_MAX_ERROR_RATE = 0.5          # Failure rate that rests a profile...
+COOKIE_ERROR_MARGIN = 0.3            # ...when this far above the other profiles' rate
+ACCOUNT_ERROR_PATTERN = re.compile(
+    r"Sign in to confirm|not a bot|cookies are no longer valid|HTTP Error 429\b", re.IGNORECASE)
+
+# Look-ahead metadata extraction
+PREFETCH_DIR = os.path.join(APP_DATA_DIR, 'prefetch')
+PREFETCH_DEFAULT_DEPTH = 2           # Items extracted ahead of the download
+PREFETCH_MAX_DEPTH = 8
+PREFETCH_TTL_SECONDS = 15 * 60       # Signed media URLs are only trusted this long
+PREFETCH_TIMEOUT = 180               # Seconds allowed for one extraction
+SINGLE_VIDEO_PATTERN = re.compile(
+    r'(youtube\.com/(watch\?|shorts/|live/|embed/)|youtu\.be/)', re.IGNORECASE)
+
+# yt-dlp cache (player signature / n-challenge solutions) shared by all processes
+YTDLP_CACHE_DIR = os.path.join(APP_DATA_DIR, 'ytdlp-cache')
+YTDLP_CACHE_MAX_AGE_DAYS = 30        # Entries of players YouTube has since replaced
+CACHE_WARM_TIMEOUT = 120             # Seconds allowed for the warm-up extraction
+
+# Ranged downloads (one single-file format over several connections)
+RANGED_MAX_CONNECTIONS = 32
+RANGED_MIN_BYTES = 16 * 1024 * 1024  # Smaller files are left to yt-dlp
+RANGED_PART_BYTES = 4 * 1024 * 1024  # One range request
+RANGED_READ_BYTES = 256 * 1024
+RANGED_RETRIES = 5                   # Attempts per range after the first
+RANGED_RETRY_SECONDS = 0.5           # Doubled after every failed attempt
+RANGED_TIMEOUT = 30                  # Seconds without data before a connection is dropped
+RANGED_FATAL_STATUS = (401, 403, 404, 410)  # Expired or refused URL: retrying won't help
+
+# Distributed batches (coordinator and worker nodes)
+COORDINATOR_PORT = 8765
+LEASE_SECONDS = 90                   # A lease expires if not renewed this long
+HEARTBEAT_SECONDS = 20               # How often nodes renew their leases
+LEASE_POLL_SECONDS = 5               # Node wait while other nodes hold the rest
+COORDINATOR_RETRIES = 5              # Node retries of a failed coordinator call
+COORDINATOR_RETRY_SECONDS = 2        # First wait between them, doubled each time
+
+# Time-window scheduling
+SCHEDULE_CHECK_SECONDS = 15          # How often the active window is re-evaluated
+PROXY_CHUNK_BYTES = 16 * 1024        # Read size of the local throttling proxy
+PROXY_CONNECT_TIMEOUT = 30
+DAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+# Partial download recovery
+PARTIAL_MAX_AGE_DAYS = 7             # Older partial downloads count as abandoned
+PARTIAL_DEFAULT_BUDGET_GB = 20       # Disk allowed for resumable partial downloads
+PARTIAL_FRAGMENT_PATTERN = re.compile(r'^(.+)\.part-Frag\d+(\.part)?$')
+PARTIAL_TEMP_PATTERN = re.compile(r'^(.+)\.temp(\.\w+)$')
+PARTIAL_FORMAT_SUFFIX = re.compile(r'\.f[\w-]+$')  # title.f137.mp4.part of a merged format
+
+# Speech dataset mode
+SPEECH_QUALITY = "Speech Audio (16 kHz mono)"
+SPEECH_FORMATS = ["FLAC", "WAV"]
+SPEECH_SAMPLE_RATE = 16000
+CONVERT_WORKERS = os.cpu_count() or 2  # ffmpeg conversions running at once
+
+# Catalog of analysed files (speech segments, ...)
+CATALOG_PATH = os.path.join(APP_DATA_DIR, 'catalog.db')
+
+# Voice activity detection
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+VAD_BLOCK_SECONDS = 30          # Decoded audio held in memory at once (~1 MB)
+VAD_MIN_DBFS = -50              # Never count anything quieter as speech
+VAD_FLOOR_MARGIN_DB = 10        # Speech must be this much louder than the noise floor
+VAD_MAX_ZCR = 0.35              # Zero-crossing rate above this is noise, not voice
+VAD_MIN_GAP_SECONDS = 0.3       # Shorter pauses don't split a segment
+VAD_MIN_SPEECH_SECONDS = 0.2    # Shorter segments are dropped
+
+# Tar shard output (WebDataset layout)
+SHARD_DIR_NAME = 'shards'
+SHARD_DEFAULT_MB = 1024
+SHARD_NAME_PATTERN = re.compile(r'^shard-(\d{6})\.tar(?:\.tmp)?$')
+
+# Harvest mode: metadata, subtitles and thumbnails only
+HARVEST_QUALITY = "Metadata + Subtitles Only"
+HARVEST_DB_NAME = 'harvest.db'
+HARVEST_WORKERS = 8                   # yt-dlp processes per harvested item
+HARVEST_CHUNK = 25                    # Videos per yt-dlp process
+HARVEST_SUB_LANGS = 'en.*,.*-orig'    # English plus auto captions in the original language
+
+# Profiling (debug switch: GUI checkbox or BATCHER_PROFILE=1)
+PROFILE_ENV = 'BATCHER_PROFILE'
+PROFILE_DIR = os.path.join(APP_DATA_DIR, 'profiles')
+PROFILE_TRACE_FRAMES = 10         # Stack depth tracemalloc records
+PROFILE_REPORT_LINES = 40         # Entries per text report
+PROFILE_LATENCY_SAMPLES = 100000  # Recent signal deliveries kept for percentiles
+
+# On-disk batch queue
+QUEUE_DB_PATH = os.path.join(APP_DATA_DIR, 'queue.db')
+QUEUE_PAGE_ROWS = 200              # Rows per page in the GUI (and per read elsewhere)
+QUEUE_REFRESH_MS = 1000            # Queue view refresh while a batch runs
+
+# Budget-driven format selection
+BUDGET_MODES = ["Off", "Max GB per video", "Max GB per item", "Max Mbit/s"]
+BUDGET_HEADROOM = 0.95             # Share of an item budget spread over its videos
+QUALITY_MAX_HEIGHTS = {"Best (≤1080p)": 1080, "Best (≤720p)": 720, "Best (≤480p)": 480}
+
+# Bulk URL import (text, CSV, JSONL)
+IMPORT_URL_PATTERN = re.compile(
+    r'(?:https?://|(?<![\w.])(?=(?:www\.|m\.)?youtu(?:be\.com|\.be)/))[^\s"\'<>,;]+', re.IGNORECASE)
+IMPORT_URL_COLUMNS = ('url', 'link', 'webpage_url', 'video', 'video_url')
+IMPORT_FOLDER_COLUMNS = ('output_dir', 'output folder', 'output', 'folder', 'dir')
+YOUTUBE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+YOUTUBE_HOSTS = ('youtube.com', 'youtube-nocookie.com')
+CHANNEL_TABS = ('videos', 'shorts', 'streams', 'live', 'playlists', 'podcasts', 'releases')
+
+# Queue previews (title, channel, videos, size) resolved for visible rows
+PREVIEW_CACHE_PATH = os.path.join(APP_DATA_DIR, 'previews.db')
+PREVIEW_WORKERS = 3                # yt-dlp resolvers running at once
+PREVIEW_MEMORY_ENTRIES = 2000      # Previews kept in memory (LRU)
+PREVIEW_DISK_ENTRIES = 100000      # Previews kept on disk (least recently used dropped)
+PREVIEW_MAX_AGE_DAYS = 7           # Older previews are resolved again
+PREVIEW_TIMEOUT = 120              # Seconds allowed for one resolution
+PREVIEW_DEBOUNCE_MS = 150          # Scroll settle time before resolving
+PREVIEW_COLUMNS = ["Title", "Channel", "Videos", "Est. Size"]
+
+# Batch planner (sizes from previews, speed from throughput history)
+PLAN_HISTORY_RUNS = 50             # Latest item downloads averaged per host and volume
+PLAN_REFRESH_MS = 15000            # Plan refresh while a batch runs
+PLAN_RESOLVE_DEBOUNCE_MS = 3000    # Re-plan delay while previews come in
+PLAN_MIN_LIVE_SECONDS = 60         # Run time before this run's own rate is trusted
+
+# Integrity verification of finished files (ffprobe + tail decode)
+VERIFY_WORKERS = max(2, (os.cpu_count() or 2) // 2)  # Files checked at once
+VERIFY_TIMEOUT = 300               # Seconds allowed per ffprobe/ffmpeg check
+VERIFY_TAIL_SECONDS = 10           # Decoded from the end: truncation shows up there
+VERIFY_SLACK = 0.02                # Duration may fall short of the expected by 2%...
+VERIFY_MIN_SLACK_SECONDS = 2       # ...or at least this many seconds
+VERIFY_MAX_RETRIES = 2             # Re-downloads per video before it stays quarantined
+QUARANTINE_DIR_NAME = 'quarantine'
+
+# Scratch storage: downloads land on a fast local disk, then move to the output folder
+SCRATCH_DEFAULT_CAP_GB = 50
+SCRATCH_CHECK_SECONDS = 2          # Wait step while scratch is over its cap
+SCRATCH_JOURNAL = 'moves.jsonl'    # Files handed to the mover (replayed at start)
+MOVE_WORKERS = 2                   # Files moved to output folders at once
+MOVE_RETRIES = 5                   # Attempts per file before it stays in scratch
+MOVE_RETRY_SECONDS = 10            # First retry delay, doubled every attempt
+
+# Finished-file feeds written by yt-dlp (--print-to-file)
+FEED_DIR = os.path.join(APP_DATA_DIR, 'feeds')
+
+# Hide console windows of child processes (Windows only, 0 elsewhere)
+POPEN_FLAGS = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+# Child process supervision: every tool runs in its own process group so a
+# cancel also reaches the ffmpeg/aria2c processes yt-dlp starts
+STOP_GRACE_SECONDS = 3             # SIGTERM -> SIGKILL delay for a process group
+LINE_POLL_SECONDS = 0.2            # How often output readers check for a cancel
+
+def spawn(cmd, **kwargs):
+    """subprocess.Popen in a new process group (console hidden on Windows)"""
+    if os.name == 'nt':
+        kwargs['creationflags'] = POPEN_FLAGS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+    return subprocess.Popen(cmd, **kwargs)
+
+def kill_tree(process, grace=STOP_GRACE_SECONDS):
+    """Terminate process and everything it started; never blocks the caller
+
+    POSIX: SIGTERM to the process group, SIGKILL to whatever is left after
+    grace seconds. Windows: taskkill /T /F on the process tree.
+    """
+    def reap():
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           creationflags=POPEN_FLAGS)
+            return
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(process.pid, sig)
+                if sig == signal.SIGTERM:
+                    os.killpg(process.pid, signal.SIGCONT)  # A paused group acts on it now
+            except (ProcessLookupError, PermissionError):
+                return  # Group already gone
+            try:
+                process.wait(timeout=grace)
+            except subprocess.TimeoutExpired:
+                pass
+    threading.Thread(target=reap, name=f'reap-{process.pid}', daemon=True).start()
+
+def windows_process_tree(pid):
+    """pid and the IDs of every process below it (Windows, from a Toolhelp snapshot)"""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESSENTRY32(ctypes.Structure):
+        _fields_ = [('dwSize', wintypes.DWORD), ('cntUsage', wintypes.DWORD),
+                    ('th32ProcessID', wintypes.DWORD), ('th32DefaultHeapID', ctypes.c_void_p),
+                    ('th32ModuleID', wintypes.DWORD), ('cntThreads', wintypes.DWORD),
+                    ('th32ParentProcessID', wintypes.DWORD), ('pcPriClassBase', ctypes.c_long),
+                    ('dwFlags', wintypes.DWORD), ('szExeFile', ctypes.c_char * 260)]
+
+    kernel32 = ctypes.WinDLL('kernel32')
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    snapshot = kernel32.CreateToolhelp32Snapshot(0x00000002, 0)  # TH32CS_SNAPPROCESS
+    children = {}
+    entry = PROCESSENTRY32()
+    entry.dwSize = ctypes.sizeof(entry)
+    found = kernel32.Process32First(snapshot, ctypes.byref(entry))
+    while found:
+        children.setdefault(entry.th32ParentProcessID, []).append(entry.th32ProcessID)
+        found = kernel32.Process32Next(snapshot, ctypes.byref(entry))
+    kernel32.CloseHandle(wintypes.HANDLE(snapshot))
+
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        if current not in tree:
+            tree.append(current)
+            pending.extend(children.get(current, []))
+    return tree
+
+def suspend_tree(process, suspend=True):
+    """Freeze (suspend=False: thaw) process and everything it started
+
+    Nothing is lost: sockets, .part files and fragments stay as they are and
+    the download carries on where it was. POSIX: SIGSTOP / SIGCONT to the
+    process group. Windows: NtSuspendProcess / NtResumeProcess on the tree.
+    """
+    if os.name == 'nt':
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL('kernel32')
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        ntdll = ctypes.WinDLL('ntdll')
+        call = ntdll.NtSuspendProcess if suspend else ntdll.NtResumeProcess
+        for pid in windows_process_tree(process.pid):
+            handle = kernel32.OpenProcess(0x0800, False, pid)  # PROCESS_SUSPEND_RESUME
+            if handle:
+                call(wintypes.HANDLE(handle))
+                kernel32.CloseHandle(wintypes.HANDLE(handle))
+        return
+    try:
+        os.killpg(process.pid, signal.SIGSTOP if suspend else signal.SIGCONT)
+    except (ProcessLookupError, PermissionError):
+        pass  # Already gone
+
+def iter_lines(process, cancelled):
+    """Lines of process.stdout, ending within LINE_POLL_SECONDS of cancelled()
+
+    A reader thread drains the pipe so a silent child (long fragment
+    download, ffmpeg merge) cannot hold the caller past a cancel.
+    """
+    lines = queue.Queue()
+
+    def pump():
+        try:
+            for line in process.stdout:
+                lines.put(line)
+        except (OSError, ValueError):
+            pass  # Pipe closed under us
+        finally:
+            lines.put(None)
+
+    threading.Thread(target=pump, name=f'pipe-{process.pid}', daemon=True).start()
+    while not cancelled():
+        try:
+            line = lines.get(timeout=LINE_POLL_SECONDS)
+        except queue.Empty:
+            continue
+        if line is None:
+            return
+        yield line
+
+def is_single_video(url):
+    """True for a URL that yt-dlp resolves to exactly one video"""
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+    return bool(SINGLE_VIDEO_PATTERN.search(url)) and 'list' not in query
+
+def profiling_requested():
+    """True when BATCHER_PROFILE is set to something other than 0"""
+    return os.environ.get(PROFILE_ENV, '').strip() not in ('', '0')
+
+class RunProfiler:
+    """cProfile, tracemalloc and signal latency capture for one batch run
+
+    Each thread taking part wraps its work in thread(name); profiles that
+    share a name (pipeline jobs, ...) are merged when the run is dumped to
+    ~/.the-batcher/profiles/<run>. tracemalloc is process-wide, so memory
+    snapshots are labelled by the thread that finished when they were taken.
+    """
+
+    def __init__(self, run_name):
+        self.directory = os.path.join(PROFILE_DIR, run_name)
+        self.lock = threading.Lock()
+        self.profiles = {}  # name -> [cProfile.Profile]
+        self.snapshots = []  # (label, tracemalloc.Snapshot)
+        self.latencies = {}  # signal name -> recent delivery latencies (seconds)
+        self.deliveries = {}  # signal name -> (count, worst)
+        self.main_profile = None
+        self.started_tracing = False
+
+    def start(self):
+        """Start capturing; profiles the calling (GUI/main) thread"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACE_FRAMES)
+            self.started_tracing = True
+        self.snapshot('start')
+        self.main_profile = self._enable()
+
+    def _enable(self):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; the main
+            # thread's profile then covers this thread as well
+            return None
+        return profile
+
+    @contextlib.contextmanager
+    def thread(self, name, snapshot=False):
+        profile = self._enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+                with self.lock:
+                    self.profiles.setdefault(name, []).append(profile)
+            if snapshot:
+                self.snapshot(name)
+
+    def snapshot(self, label):
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),))
+            with self.lock:
+                self.snapshots.append((label, snapshot))
+
+    def signal_delivered(self, name, sent):
+        """Slot for probe_signal; runs in the receiving (GUI) thread"""
+        latency = time.perf_counter() - sent
+        with self.lock:
+            if name not in self.latencies:
+                self.latencies[name] = deque(maxlen=PROFILE_LATENCY_SAMPLES)
+            self.latencies[name].append(latency)
+            count, worst = self.deliveries.get(name, (0, 0.0))
+            self.deliveries[name] = (count + 1, max(worst, latency))
+
+    def dump(self):
+        """Stop capturing and write the reports; returns their directory"""
+        if self.main_profile:
+            self.main_profile.disable()
+            self.profiles.setdefault('gui-main', []).append(self.main_profile)
+            self.main_profile = None
+        self.snapshot('end')
+        if self.started_tracing:
+            tracemalloc.stop()
+        os.makedirs(self.directory, exist_ok=True)
+
+        # <name>.prof loads into pstats/snakeviz; <name>.txt is the quick look
+        for name, profiles in self.profiles.items():
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(os.path.join(self.directory, f'{name}.prof'))
+            with open(os.path.join(self.directory, f'{name}.txt'), 'w', encoding='utf-8') as f:
+                stats.stream = f
+                for order in ('cumulative', 'tottime'):
+                    f.write(f"=== {name}: top {PROFILE_REPORT_LINES} by {order} ===\n")
+                    stats.sort_stats(order).print_stats(PROFILE_REPORT_LINES)
+
+        if self.snapshots:
+            first = self.snapshots[0][1]
+            with open(os.path.join(self.directory, 'memory.txt'), 'w', encoding='utf-8') as f:
+                for label, snapshot in self.snapshots[1:]:
+                    f.write(f"=== Largest allocations at {label} ===\n")
+                    for stat in snapshot.statistics('lineno')[:PROFILE_REPORT_LINES]:
+                        f.write(f"{stat}\n")
+                    f.write(f"\n=== Growth since start, at {label} ===\n")
+                    for stat in snapshot.compare_to(first, 'lineno')[:PROFILE_REPORT_LINES]:
+                        f.write(f"{stat}\n")
+                    f.write("\n")
+
+        with open(os.path.join(self.directory, 'signals.txt'), 'w', encoding='utf-8') as f:
+            f.write(f"{'signal':<20}{'count':>10}{'mean ms':>10}{'p50 ms':>10}"
+                    f"{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}\n")
+            for name, samples in sorted(self.latencies.items()):
+                ordered = sorted(samples)
+                count, worst = self.deliveries[name]
+                pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+                f.write(f"{name:<20}{count:>10}{sum(ordered) / len(ordered) * 1000:>10.2f}"
+                        f"{pick(0.5):>10.2f}{pick(0.95):>10.2f}{pick(0.99):>10.2f}{worst * 1000:>10.2f}\n")
+        return self.directory
+
+class RunLogWriter(threading.Thread):
+    """Background writer for a batch run's on-disk logs
+
+    Every line goes to run.log; lines tagged with an item number also go to
+    that item's own item-NNNN.log. Lines are handed over through an unbounded
+    queue so callers never wait on disk. Files rotate at LOG_ROTATE_BYTES and
+    rotated segments are gzip-compressed (name.log.1.gz is the newest).
+    """
+
+    def __init__(self, run_dir):
+        super().__init__(daemon=True)
+        self.run_dir = run_dir
+        self.run_log_path = os.path.join(run_dir, 'run.log')
+        self.queue = queue.Queue()
+        self.files = {}
+        self.closed = False
+        os.makedirs(run_dir, exist_ok=True)
+
+    def write(self, line, item=None):
+        """Queue a line for writing (never blocks)"""
+        if not self.closed:
+            self.queue.put((item, line))
+
+    def close(self):
+        """Flush remaining lines and stop the writer thread"""
+        if not self.closed:
+            self.closed = True
+            self.queue.put(None)
+
+    def item_log_path(self, item):
+        return os.path.join(self.run_dir, f'item-{item:04d}.log')
+
+    def run(self):
+        running = True
+        while running:
+            entries = [self.queue.get()]
+            # Drain whatever else is waiting so it is written in one go
+            while True:
+                try:
+                    entries.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for entry in entries:
+                if entry is None:
+                    running = False
+                    continue
+                item, line = entry
+                self._write_line(self.run_log_path, line)
+                if item is not None:
+                    self._write_line(self.item_log_path(item), line)
+
+            for f in self.files.values():
+                f.flush()
+
+        for f in self.files.values():
+            f.close()
+        self.files.clear()
+
+    def _write_line(self, path, line):
+        f = self.files.get(path)
+        if f is None:
+            f = open(path, 'a', encoding='utf-8')
+            self.files[path] = f
+        f.write(line + '\n')
+        if f.tell() >= LOG_ROTATE_BYTES:
+            f.close()
+            del self.files[path]
+            self._rotate(path)
+
+    def _rotate(self, path):
+        """Compress path into path.1.gz, shifting older segments up"""
+        try:
+            oldest = f'{path}.{LOG_BACKUP_COUNT}.gz'
+            if os.path.exists(oldest):
+                os.remove(oldest)
+            for n in range(LOG_BACKUP_COUNT - 1, 0, -1):
+                segment = f'{path}.{n}.gz'
+                if os.path.exists(segment):
+                    os.replace(segment, f'{path}.{n + 1}.gz')
+            with open(path, 'rb') as src, gzip.open(f'{path}.1.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(path)
+        except OSError:
+            pass
+
+class FileTail:
+    """Read lines appended to a log file since the last call
+
+    Handles rotation (the file is replaced or shrinks) by starting over from
+    the top of the new file. If the writer is far ahead, skips to the last
+    LOG_TAIL_MAX_BYTES so a flood never stalls the caller.
+    """
+
+    def __init__(self, path, skip_behind=True):
+        self.path = path
+        self.skip_behind = skip_behind  # False: never drop lines, however far behind
+        self.offset = 0
+        self.inode = None
+        self.partial = b''
+
+    def read_new(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return []
+
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            self.inode = st.st_ino
+            self.offset = 0
+            self.partial = b''
+
+        if st.st_size == self.offset:
+            return []
+
+        skipped = self.skip_behind and st.st_size - self.offset > LOG_TAIL_MAX_BYTES
+        if skipped:
+            self.offset = st.st_size - LOG_TAIL_MAX_BYTES
+            self.partial = b''
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(st.st_size - self.offset)
+        self.offset += len(data)
+
+        chunks = (self.partial + data).split(b'\n')
+        self.partial = chunks.pop()
+        if skipped and chunks:
+            chunks[0] = b'...'  # First line was cut mid-way
+        return [c.decode('utf-8', errors='replace') for c in chunks]
+
+class LogPager:
+    """Page through a large (optionally .gz) log file
+
+    Keeps a sparse index of the byte offset of every LOG_PAGE_LINES-th line,
+    built only as far as the requested page, so a page is read with a single
+    seek instead of loading the whole file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.page_offsets = [0]
+        self.complete = False
+
+    def _open(self):
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, 'rb')
+        return open(self.path, 'rb')
+
+    def _index_to(self, page):
+        if self.complete or page < len(self.page_offsets):
+            return
+        with self._open() as f:
+            f.seek(self.page_offsets[-1])
+            count = 0
+            while page >= len(self.page_offsets):
+                line = f.readline()
+                if not line:
+                    self.complete = True
+                    break
+                count += 1
+                if count == LOG_PAGE_LINES:
+                    self.page_offsets.append(f.tell())
+                    count = 0
+            else:
+                return
+            # A trailing offset with no lines after it is not a real page
+            if len(self.page_offsets) > 1 and count == 0:
+                self.page_offsets.pop()
+
+    def page_count(self):
+        """Known page count (exact once indexing reached the end)"""
+        return len(self.page_offsets)
+
+    def last_page(self):
+        self._index_to(sys.maxsize)
+        return len(self.page_offsets) - 1
+
+    def read_page(self, page):
+        self._index_to(page)
+        page = min(page, len(self.page_offsets) - 1)
+        lines = []
+        with self._open() as f:
+            f.seek(self.page_offsets[page])
+            for _ in range(LOG_PAGE_LINES):
+                line = f.readline()
+                if not line:
+                    break
+                lines.append(line.decode('utf-8', errors='replace').rstrip('\n'))
+        return page, lines
+
+class LogViewerDialog(QDialog):
+    """Page-by-page viewer for run logs"""
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.pager = LogPager(path)
+        self.page = 0
+
+        self.setWindowTitle(f"Log Viewer - {os.path.basename(path)}")
+        self.resize(900, 600)
+        layout = QVBoxLayout(self)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Menlo", 9))
+        layout.addWidget(self.text)
+
+        nav = QHBoxLayout()
+        first_btn = QPushButton("⏮ First")
+        first_btn.clicked.connect(lambda: self.show_page(0))
+        nav.addWidget(first_btn)
+        prev_btn = QPushButton("◀ Prev")
+        prev_btn.clicked.connect(lambda: self.show_page(self.page - 1))
+        nav.addWidget(prev_btn)
+        self.page_label = QLabel()
+        self.page_label.setAlignment(Qt.AlignCenter)
+        nav.addWidget(self.page_label, 1)
+        next_btn = QPushButton("Next ▶")
+        next_btn.clicked.connect(lambda: self.show_page(self.page + 1))
+        nav.addWidget(next_btn)
+        last_btn = QPushButton("Last ⏭")
+        last_btn.clicked.connect(lambda: self.show_page(self.pager.last_page()))
+        nav.addWidget(last_btn)
+        layout.addLayout(nav)
+
+        self.show_page(0)
+
+    def show_page(self, page):
+        try:
+            self.page, lines = self.pager.read_page(max(page, 0))
+        except (OSError, EOFError) as e:
+            self.text.setPlainText(f"❌ Failed to read log: {str(e)}")
+            return
+        self.text.setPlainText('\n'.join(lines))
+        total = str(self.pager.page_count()) if self.pager.complete else '?'
+        self.page_label.setText(f"Page {self.page + 1} / {total}")
+
+class TokenBucket:
+    """Byte budget shared by all connections of a batch
+
+    rate is in bytes per second; None means unlimited. The rate can be
+    changed at any time and waiting consumers pick it up within a second.
+    """
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            burst = max(self.rate * 0.25, PROXY_CHUNK_BYTES * 2)
+            self.tokens = min(burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate):
+        with self.cond:
+            self._refill()
+            self.rate = rate
+            self.cond.notify_all()
+
+    def consume(self, amount):
+        """Block until amount bytes may pass"""
+        with self.cond:
+            while self.rate is not None:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate if self.rate else 1.0
+                self.cond.wait(min(wait, 1.0))
+
+def socks5_connect(sock, host, port, username=None, password=None):
+    """Ask a SOCKS5 proxy on sock to connect to host:port"""
+    if username:
+        sock.sendall(b'\x05\x02\x00\x02')
+    else:
+        sock.sendall(b'\x05\x01\x00')
+    version, method = _recv_exact(sock, 2)
+    if method == 0x02 and username:
+        user, pwd = username.encode('utf-8'), (password or '').encode('utf-8')
+        sock.sendall(bytes([1, len(user)]) + user + bytes([len(pwd)]) + pwd)
+        if _recv_exact(sock, 2)[1] != 0:
+            raise OSError("SOCKS5 authentication failed")
+    elif method != 0x00:
+        raise OSError("SOCKS5 proxy refused all authentication methods")
+
+    name = host.encode('idna')
+    sock.sendall(b'\x05\x01\x00\x03' + bytes([len(name)]) + name + port.to_bytes(2, 'big'))
+    reply = _recv_exact(sock, 4)
+    if reply[1] != 0:
+        raise OSError(f"SOCKS5 connect failed (code {reply[1]})")
+    address_length = {1: 4, 4: 16}.get(reply[3])
+    if address_length is None:
+        address_length = _recv_exact(sock, 1)[0]
+    _recv_exact(sock, address_length + 2)
+
+def _recv_exact(sock, count):
+    data = b''
+    while len(data) < count:
+        chunk = sock.recv(count - len(data))
+        if not chunk:
+            raise OSError("Connection closed by proxy")
+        data += chunk
+    return data
+
+class ThrottleProxyHandler(socketserver.BaseRequestHandler):
+    """One client connection through a ThrottleProxy"""
+
+    def handle(self):
+        client = self.request
+        head = b''
+        while b'\r\n\r\n' not in head:
+            chunk = client.recv(PROXY_CHUNK_BYTES)
+            if not chunk or len(head) > 65536:
+                return
+            head += chunk
+        head, rest = head.split(b'\r\n\r\n', 1)
+        lines = head.split(b'\r\n')
+        try:
+            method, target, version = lines[0].decode('latin-1').split()
+            if method == 'CONNECT':
+                host, port = target.rsplit(':', 1)
+                upstream = self.server.open_upstream(host.strip('[]'), int(port))
+                client.sendall(b'HTTP/1.1 200 Connection established\r\n\r\n')
+            else:
+                parts = urllib.parse.urlsplit(target)
+                upstream = self.server.open_upstream(parts.hostname, parts.port or 80)
+                path = urllib.parse.urlunsplit(('', '', parts.path or '/', parts.query, ''))
+                lines[0] = f'{method} {path} {version}'.encode('latin-1')
+                rest = b'\r\n'.join(lines) + b'\r\n\r\n' + rest
+        except (OSError, ValueError):
+            client.sendall(b'HTTP/1.1 502 Bad Gateway\r\n\r\n')
+            return
+
+        try:
+            if rest:
+                upstream.sendall(rest)
+            sender = threading.Thread(target=self._pump, args=(client, upstream, False), daemon=True)
+            sender.start()
+            self._pump(upstream, client, True)
+        finally:
+            upstream.close()
+
+    def _pump(self, src, dst, metered):
+        try:
+            while True:
+                data = src.recv(PROXY_CHUNK_BYTES)
+                if not data:
+                    break
+                if metered:
+                    self.server.bucket.consume(len(data))
+                dst.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (src, dst):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+class ThrottleProxy(socketserver.ThreadingTCPServer):
+    """Local HTTP proxy that meters downloads through a shared TokenBucket
+
+    yt-dlp is pointed at it with --proxy, so the bandwidth of downloads that
+    are already running can be changed without restarting them. Outgoing
+    connections follow the item's egress route: bound to its source
+    address, or tunnelled through its HTTP or SOCKS5 proxy.
+    """
+    daemon_threads = True
+
+    def __init__(self, bucket, route=None):
+        super().__init__(('127.0.0.1', 0), ThrottleProxyHandler)
+        self.bucket = bucket
+        self.route = route
+        self.url = f'http://127.0.0.1:{self.server_address[1]}'
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def open_upstream(self, host, port):
+        route = self.route
+        if route is None:
+            return socket.create_connection((host, port), timeout=PROXY_CONNECT_TIMEOUT)
+        if route.source_address:
+            sock = socket.create_connection((host, port), timeout=PROXY_CONNECT_TIMEOUT,
+                                            source_address=(route.source_address, 0))
+            sock.settimeout(None)
+            return sock
+
+        parts = urllib.parse.urlsplit(route.proxy)
+        if parts.scheme in ('socks5', 'socks5h'):
+            sock = socket.create_connection((parts.hostname, parts.port or 1080),
+                                            timeout=PROXY_CONNECT_TIMEOUT)
+            socks5_connect(sock, host, port, parts.username, parts.password)
+        elif parts.scheme == 'http':
+            sock = socket.create_connection((parts.hostname, parts.port or 8080),
+                                            timeout=PROXY_CONNECT_TIMEOUT)
+            sock.sendall(f'CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n'.encode('latin-1'))
+            response = b''
+            while b'\r\n\r\n' not in response:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    raise OSError("Upstream proxy closed the connection")
+                response += chunk
+            if response.split()[1] != b'200':
+                raise OSError(f"Upstream proxy refused CONNECT: {response.splitlines()[0]!r}")
+        else:
+            raise OSError(f"Bandwidth limits cannot be chained through {parts.scheme} proxies")
+        sock.settimeout(None)
+        return sock
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+class ScheduleWindow:
+    """A time window with its bandwidth and concurrency profile"""
+
+    def __init__(self, text, days, start, end, rate, workers):
+        self.text = text
+        self.days = days  # Set of weekday numbers (Monday = 0)
+        self.start = start  # Minutes after midnight
+        self.end = end
+        self.rate = rate  # Bytes per second, None = unlimited
+        self.workers = workers
+
+    def contains(self, now):
+        minute = now.hour * 60 + now.minute
+        day = now.weekday()
+        if self.start < self.end:
+            return day in self.days and self.start <= minute < self.end
+        # Window runs past midnight
+        return ((day in self.days and minute >= self.start) or
+                ((day - 1) % 7 in self.days and minute < self.end))
+
+class BandwidthSchedule:
+    """Time windows with per-window bandwidth and worker limits
+
+    Windows are comma- or semicolon-separated, each written as
+    [DAYS] HH:MM-HH:MM=RATE/WORKERS, e.g.
+
+        Mon-Fri 08:00-18:00=5M/1, 18:00-08:00=max/8
+
+    DAYS is a day, a range (Mon-Fri) or days joined with "+" (Sat+Sun),
+    RATE is bytes per second with an optional K/M/G suffix or "max" for no
+    limit, and WORKERS of 0 means no new items start in that window. The
+    first matching window wins; outside all windows downloads run unlimited
+    with the batch's own worker count.
+    """
+
+    def __init__(self, text):
+        self.windows = [self._parse_window(part.strip())
+                        for part in re.split(r'[;,]', text) if part.strip()]
+
+    def __bool__(self):
+        return bool(self.windows)
+
+    @staticmethod
+    def parse_rate(text):
+        text = text.strip().lower()
+        if text in ('max', 'unlimited', '-'):
+            return None
+        match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([kmg]?)(?:i?b)?(?:/s)?', text)
+        if not match:
+            raise ValueError(f"Invalid rate: {text}")
+        factor = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}[match.group(2)]
+        return int(float(match.group(1)) * factor)
+
+    @staticmethod
+    def format_rate(rate):
+        return "unlimited" if rate is None else f"{rate / 1024 ** 2:.1f} MB/s"
+
+    def _parse_window(self, text):
+        match = re.fullmatch(r'(?:([A-Za-z+\-]+)\s+)?(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})'
+                             r'\s*=\s*([^/]+)/\s*(\d+)', text)
+        if not match:
+            raise ValueError(f"Invalid schedule window: {text}")
+        days_text, h1, m1, h2, m2, rate, workers = match.groups()
+        if not (int(h1) < 24 and int(h2) < 24 and int(m1) < 60 and int(m2) < 60):
+            raise ValueError(f"Invalid time in schedule window: {text}")
+        return ScheduleWindow(text, self._parse_days(days_text),
+                              int(h1) * 60 + int(m1), int(h2) * 60 + int(m2),
+                              self.parse_rate(rate), int(workers))
+
+    @staticmethod
+    def _parse_days(text):
+        if not text:
+            return set(range(7))
+        days = set()
+        for part in text.lower().split('+'):
+            ends = [DAY_NAMES.index(name[:3]) if name[:3] in DAY_NAMES else None
+                    for name in part.split('-')]
+            if None in ends or len(ends) > 2:
+                raise ValueError(f"Invalid days: {text}")
+            day = ends[0]
+            days.add(day)
+            while day != ends[-1]:
+                day = (day + 1) % 7
+                days.add(day)
+        return days
+
+    def window_at(self, now):
+        for window in self.windows:
+            if window.contains(now):
+                return window
+        return None
+
+    def max_workers(self):
+        return max((window.workers for window in self.windows), default=1)
+
+class PartialDownload:
+    """Leftovers of one interrupted yt-dlp download
+
+    Groups the files yt-dlp leaves next to a target file: the .part data,
+    the .ytdl fragment state, .part-FragN fragment files and .temp.* files
+    from an unfinished merge.
+    """
+
+    def __init__(self, target):
+        self.target = target  # Final file the download was writing
+        self.part = None
+        self.ytdl = None
+        self.fragments = []
+        self.temp = []
+        self.status = None  # 'resumable', 'stale' or 'corrupt'
+        self.reason = ''
+
+    def files(self):
+        return [path for path in [self.part, self.ytdl] + self.fragments + self.temp if path]
+
+    def size(self):
+        return sum(os.path.getsize(path) for path in self.files() if os.path.exists(path))
+
+    def mtime(self):
+        return max((os.path.getmtime(path) for path in self.files() if os.path.exists(path)),
+                   default=0)
+
+    def from_ytdlp(self):
+        """True if yt-dlp provably left these files
+
+        Fragment state and .part-FragN files are its own naming; a plain
+        .part or .temp.* only counts next to the .info.json yt-dlp writes
+        before it downloads (the stem may carry a .f<format> suffix).
+        """
+        if self.ytdl or self.fragments:
+            return True
+        stem = os.path.splitext(self.target)[0]
+        return any(os.path.exists(candidate + '.info.json')
+                   for candidate in (stem, PARTIAL_FORMAT_SUFFIX.sub('', stem)))
+
+    def classify(self, max_age_days):
+        if os.path.exists(self.target):
+            return self._set('stale', "already finished")
+        if not self.part:
+            if self.ytdl:
+                return self._set('corrupt', "fragment state without data")
+            return self._set('stale', "unfinished merge" if self.temp else "orphaned fragments")
+        if self.ytdl:
+            try:
+                with open(self.ytdl, 'r', encoding='utf-8') as f:
+                    json.load(f)['downloader']['current_fragment']['index']
+            except (OSError, ValueError, KeyError, TypeError):
+                return self._set('corrupt', "unreadable fragment state")
+        elif self.fragments:
+            return self._set('corrupt', "fragments without state")
+        if not self.fragments and os.path.getsize(self.part) == 0:
+            return self._set('corrupt', "empty")
+        if time.time() - self.mtime() > max_age_days * 86400:
+            return self._set('stale', f"untouched for over {max_age_days} days")
+        return self._set('resumable', "")
+
+    def _set(self, status, reason):
+        self.status = status
+        self.reason = reason
+        return status
+
+    def verify(self):
+        """Prepare a resumable download; returns the fragment files dropped
+
+        Fragments are merged into .part in order and the .ytdl state points
+        at the first fragment not merged yet, so any fragment file still on
+        disk was in flight when the process died and may be truncated.
+        Fragment files are deliberately not checked one by one: the state
+        records no fragment sizes, and yt-dlp fetches every fragment from
+        that index on again anyway. So all of them are dropped, and what
+        is verified and kept is the merged .part.
+        """
+        dropped = 0
+        for path in self.fragments:
+            try:
+                os.remove(path)
+                dropped += 1
+            except OSError:
+                pass
+        self.fragments = []
+        for path in self.temp:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.temp = []
+        return dropped
+
+    def remove(self):
+        """Delete all leftovers; returns the bytes freed"""
+        freed = 0
+        for path in self.files():
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+        return freed
+
+def scan_partial_downloads(directories, max_age_days=PARTIAL_MAX_AGE_DAYS):
+    """Inventory (list of PartialDownload) of yt-dlp's partial downloads in directories
+
+    Only the folders themselves are scanned (yt-dlp writes there, not into
+    subfolders), and only leftovers that PartialDownload.from_ytdlp() claims
+    are returned, so unrelated .part or .temp.* files are never touched.
+    """
+    partials = {}
+    for directory in set(directories):
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            path = os.path.join(directory, name)
+            match = PARTIAL_FRAGMENT_PATTERN.match(name)
+            if match:
+                kind, target = 'fragments', match.group(1)
+            elif name.endswith('.part'):
+                kind, target = 'part', name[:-len('.part')]
+            elif name.endswith('.ytdl'):
+                kind, target = 'ytdl', name[:-len('.ytdl')]
+            else:
+                match = PARTIAL_TEMP_PATTERN.match(name)
+                if not match:
+                    continue
+                kind, target = 'temp', match.group(1) + match.group(2)
+            if not os.path.isfile(path):
+                continue
+
+            target = os.path.join(directory, target)
+            partial = partials.setdefault(target, PartialDownload(target))
+            if kind in ('fragments', 'temp'):
+                getattr(partial, kind).append(path)
+            else:
+                setattr(partial, kind, path)
+
+    partials = [partial for partial in partials.values() if partial.from_ytdlp()]
+    for partial in partials:
+        partial.classify(max_age_days)
+    return partials
+
+def directory_size(path):
+    """Bytes of all files below path"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # Renamed or removed while walking
+    return total
+
+def move_file(source, target):
+    """Move source to target so that target never shows up half-written
+
+    Same volume: a rename. Across volumes: copy to target.moving, rename
+    it into place, then delete the source.
+    """
+    try:
+        os.replace(source, target)
+        return
+    except OSError:
+        pass  # Other volume (or the rename failed): copy instead
+    temp = target + '.moving'
+    try:
+        shutil.copyfile(source, temp)
+        shutil.copystat(source, temp)
+        os.replace(temp, target)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    os.remove(source)
+
+class FinishedFile:
+    """A file yt-dlp finished, travelling through the FilePipeline"""
+
+    def __init__(self, path, item, output_dir):
+        self.path = path
+        self.origin = path  # Path yt-dlp finished it under (stages may rename it)
+        self.item = item
+        self.output_dir = output_dir
+        self.segments = None  # (starts, ends) once voice activity was detected
+
+class FilePipeline:
+    """Post-download stages run on finished files, off the download path
+
+    Each stage has its own bounded thread pool, so slow work (conversion,
+    analysis, moving) never holds up the download workers. A file goes
+    through the stages in order; a stage function takes the FinishedFile
+    and returns the path to hand on (it may be a new file) or None to stop
+    there. Tools a stage runs go through run_tool() so Stop can kill them.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.stages = []  # (name, function, executor)
+        self.pending = 0
+        self.cond = threading.Condition()
+        self.processes = set()
+
+    def __bool__(self):
+        return bool(self.stages)
+
+    def add_stage(self, name, func, workers):
+        self.stages.append((name, func, ThreadPoolExecutor(max_workers=workers)))
+
+    def submit(self, path, item, output_dir, stage=0):
+        """Send a finished file through the stages, from stage (index) on"""
+        self._schedule(stage, FinishedFile(path, item, output_dir))
+
+    def _schedule(self, index, job):
+        if index >= len(self.stages):
+            return
+        with self.cond:
+            self.pending += 1
+        self.stages[index][2].submit(self._run, index, job)
+
+    def _run(self, index, job):
+        name, func, _ = self.stages[index]
+        try:
+            if self.engine.stopped:
+                return
+            with self.engine.profiled(f"pipeline-{name.lower().replace(' ', '-')}"):
+                path = func(job)
+            if path:
+                job.path = path
+                if self.engine.scratch_dir and index + 1 < len(self.stages):
+                    # A later run picks the file up at the stage it still needs
+                    self.engine.journal_move(path, job.output_dir, self.stages[index + 1][0], job.origin)
+                self._schedule(index + 1, job)
+        except Exception as e:
+            self.engine.log(f"❌ {name} failed for {os.path.basename(job.path)}: {str(e)}", job.item)
+        finally:
+            with self.cond:
+                self.pending -= 1
+                self.cond.notify_all()
+
+    def run_tool(self, cmd, timeout=None, binary=False):
+        """Run a helper tool (ffmpeg, ...); returns (exit code, stdout, stderr)"""
+        process = spawn(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=not binary
+        )
+        with self.cond:
+            self.processes.add(process)
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_tree(process, grace=0)
+            stdout, stderr = process.communicate()
+        finally:
+            with self.cond:
+                self.processes.discard(process)
+        return process.returncode, stdout, stderr
+
+    @contextlib.contextmanager
+    def stream_tool(self, cmd):
+        """Run a helper tool whose binary stdout is read incrementally"""
+        process = spawn(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        with self.cond:
+            self.processes.add(process)
+        try:
+            yield process
+        finally:
+            if process.poll() is None:
+                kill_tree(process, grace=0)
+            process.wait()
+            process.stdout.close()
+            with self.cond:
+                self.processes.discard(process)
+
+    def wait_idle(self):
+        """Wait until every file submitted so far has been through all stages"""
+        with self.cond:
+            while self.pending:
+                self.cond.wait(1.0)
+
+    def drain(self):
+        """Wait for the stages to finish, then shut their pools down"""
+        self.wait_idle()
+        for _, _, executor in self.stages:
+            executor.shutdown(wait=True)
+
+    def stop(self):
+        with self.cond:
+            processes = list(self.processes)
+        for process in processes:
+            kill_tree(process, grace=0)
+
+def convert_speech_audio(pipeline, job, audio_format):
+    """Decode a downloaded file to 16 kHz mono WAV or FLAC next to it
+
+    The downloaded original is removed once the conversion succeeded.
+    """
+    source = job.path
+    base, ext = os.path.splitext(source)[0], ('.flac' if audio_format == 'FLAC' else '.wav')
+    target, temp = base + ext, base + '.converting' + ext
+    codec = ['-c:a', 'flac'] if audio_format == 'FLAC' else ['-c:a', 'pcm_s16le']
+    returncode, _, stderr = pipeline.run_tool(
+        ['ffmpeg', '-nostdin', '-v', 'error', '-y', '-i', source,
+         '-vn', '-ac', '1', '-ar', str(SPEECH_SAMPLE_RATE)] + codec + [temp]
+    )
+    if returncode != 0:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise RuntimeError(stderr.strip().splitlines()[-1] if stderr.strip() else f"ffmpeg exit code {returncode}")
+    os.replace(temp, target)
+    if os.path.abspath(source) != os.path.abspath(target):
+        os.remove(source)
+    pipeline.engine.log(f"🎙️ {os.path.basename(target)}", job.item)
+    return target
+
+def verify_media(pipeline, path, expected_duration=None):
+    """What is wrong with a downloaded media file, or None if it looks whole
+
+    ffprobe must find an audio or video stream and a container duration
+    within VERIFY_SLACK of the info JSON's; then the last
+    VERIFY_TAIL_SECONDS are decoded, where a truncated file breaks.
+    """
+    returncode, stdout, stderr = pipeline.run_tool(
+        ['ffprobe', '-v', 'error', '-show_entries', 'format=duration:stream=codec_type',
+         '-of', 'json', path], timeout=VERIFY_TIMEOUT)
+    if returncode != 0:
+        return f"ffprobe: {stderr.strip().splitlines()[-1] if stderr.strip() else f'exit code {returncode}'}"
+    try:
+        probe = json.loads(stdout)
+    except ValueError:
+        return "ffprobe: unreadable output"
+    if not any(stream.get('codec_type') in ('audio', 'video') for stream in probe.get('streams', [])):
+        return "no audio or video stream"
+    duration = float(probe.get('format', {}).get('duration') or 0)
+    if expected_duration:
+        if duration < expected_duration - max(VERIFY_MIN_SLACK_SECONDS, expected_duration * VERIFY_SLACK):
+            return f"only {duration:.0f} s of {expected_duration:.0f} s"
+
+    returncode, _, stderr = pipeline.run_tool(
+        ['ffmpeg', '-nostdin', '-v', 'error', '-xerror', '-sseof', f'-{VERIFY_TAIL_SECONDS}',
+         '-i', path, '-f', 'null', '-'], timeout=VERIFY_TIMEOUT)
+    if returncode != 0:
+        return f"decode error: {stderr.strip().splitlines()[-1] if stderr.strip() else f'exit code {returncode}'}"
+    return None
+
+def in_archive(output_dir, entry):
+    """True if "extractor id" is recorded in a folder's download archive"""
+    try:
+        with open(os.path.join(output_dir, 'download_archive.txt'), 'r', encoding='utf-8') as f:
+            return any(line.strip() == entry for line in f)
+    except OSError:
+        return False
+
+@contextlib.contextmanager
+def archive_lock(f):
+    """Exclusive lock on an open download archive, the one yt-dlp takes to append to it"""
+    if fcntl:
+        fcntl.flock(f, fcntl.LOCK_EX)  # yt-dlp uses flock, which doesn't see lockf locks
+    elif msvcrt:
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # Gives up after 10 s
+                break
+            except OSError:
+                pass
+    try:
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_UN)
+        elif msvcrt:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def remove_archive_entry(output_dir, entry):
+    """Drop "extractor id" from a folder's download archive so it downloads again
+
+    The archive is rewritten in place while holding yt-dlp's own lock on
+    it, so a yt-dlp appending meanwhile waits and then appends to the
+    rewritten file (replacing the file would strand its line in the old one).
+    """
+    path = os.path.join(output_dir, 'download_archive.txt')
+    try:
+        with open(path, 'r+', encoding='utf-8', newline='') as f, archive_lock(f):
+            f.seek(0)
+            lines = f.readlines()
+            kept = [line for line in lines if line.strip() != entry]
+            if len(kept) == len(lines):
+                return False
+            f.seek(0)
+            f.writelines(kept)
+            f.truncate()
+            return True
+    except OSError:
+        return False
+
+# Info JSON fields kept in shard metadata (and compact sidecars); the rest
+# (formats, thumbnails, http headers, ...) is dropped
+INFO_KEEP_FIELDS = (
+    'id', 'title', 'fulltitle', 'description', 'channel', 'channel_id', 'channel_url',
+    'uploader', 'uploader_id', 'upload_date', 'timestamp', 'duration', 'view_count',
+    'like_count', 'language', 'tags', 'categories', 'webpage_url', 'extractor_key',
+    'playlist_id', 'playlist_title', 'playlist_index', 'ext', 'acodec', 'vcodec',
+    'asr', 'audio_channels', 'abr', 'vbr', 'width', 'height', 'fps', 'filesize',
+    'filesize_approx', 'format_id',
+)
+
+# Metadata sidecars written next to loose files (shards carry their own)
+SIDECAR_MODES = ["Full .info.json", "Trimmed .info.json.gz", "Folder pack"]
+INFO_PACK_NAME = 'info-pack.jsonl.gz'
+INFO_PACK_INDEX = 'info-pack.idx.jsonl'
+INFO_PACK_LOCK = 'info-pack.lock'   # Held while a record and its index line are appended
+SIDECAR_WORKERS = 2
+
+def url_host(url):
+    """Site of a URL without www./m. (youtube.com, vimeo.com, ...)"""
+    host = urllib.parse.urlsplit(url if '://' in url else 'https://' + url).netloc.lower().split(':')[0]
+    for prefix in ('www.', 'm.', 'music.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return 'youtube.com' if host == 'youtu.be' else host
+
+def volume_of(path):
+    """Mount point (drive on Windows) holding path, which need not exist yet"""
+    path = os.path.abspath(path)
+    if os.name == 'nt':
+        return os.path.splitdrive(path)[0].upper() or path
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    device = os.stat(path).st_dev
+    while path != os.path.dirname(path) and os.stat(os.path.dirname(path)).st_dev == device:
+        path = os.path.dirname(path)
+    return path
+
+class Catalog:
+    """SQLite store for what the Batcher learns about downloaded files
+
+    Speech segments per file and the throughput history the planner
+    estimates from. One connection shared by all workers, guarded by a lock.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS speech_segments (
+            path TEXT PRIMARY KEY,
+            file_name TEXT NOT NULL,
+            duration REAL NOT NULL,
+            speech_seconds REAL NOT NULL,
+            segment_count INTEGER NOT NULL,
+            starts BLOB NOT NULL,  -- little-endian float32 seconds
+            ends BLOB NOT NULL,
+            analysed_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS throughput (
+            id INTEGER PRIMARY KEY,
+            host TEXT NOT NULL,            -- Site the item came from
+            volume TEXT NOT NULL,          -- Mount point of the output folder
+            quality TEXT NOT NULL,
+            files INTEGER NOT NULL,
+            bytes INTEGER NOT NULL,
+            seconds REAL NOT NULL,         -- Wall time of the yt-dlp run
+            media_seconds REAL NOT NULL,   -- Duration of the downloaded media
+            finished_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS throughput_place ON throughput (host, volume, id);
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.executescript(self.SCHEMA)
+
+    def store_segments(self, path, duration, starts, ends):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO speech_segments VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(path), os.path.basename(path), duration,
+                 float((ends - starts).sum()), len(starts),
+                 starts.astype('<f4').tobytes(), ends.astype('<f4').tobytes(),
+                 datetime.now().isoformat(timespec='seconds'))
+            )
+
+    def segments(self, path):
+        """(starts, ends) arrays in seconds for an analysed file, or None"""
+        with self.lock:
+            row = self.db.execute("SELECT starts, ends FROM speech_segments WHERE path = ?",
+                                  (os.path.abspath(path),)).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype='<f4'), np.frombuffer(row[1], dtype='<f4')
+
+    def record_throughput(self, host, volume, quality, files, size, seconds, media_seconds):
+        """Remember how one finished item downloaded"""
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT INTO throughput (host, volume, quality, files, bytes, seconds, media_seconds, "
+                "finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (host, volume, quality, files, size, seconds, media_seconds,
+                 datetime.now().isoformat(timespec='seconds'))
+            )
+
+    def rates(self, host, volume, quality):
+        """Download history of the latest PLAN_HISTORY_RUNS items, or None
+
+        Returns bytes/s (transfer speed), bytes per media second and bytes
+        per file. Speed comes from the same host and volume if known there,
+        then the host, then anything; sizes from the same host and quality.
+        """
+        def averages(where, args):
+            with self.lock:
+                return self.db.execute(
+                    f"SELECT SUM(bytes), SUM(seconds), SUM(media_seconds), SUM(files), COUNT(*) FROM "
+                    f"(SELECT * FROM throughput WHERE {where} ORDER BY id DESC LIMIT ?)",
+                    args + (PLAN_HISTORY_RUNS,)).fetchone()
+
+        speed = None
+        for where, args in (("host = ? AND volume = ?", (host, volume)), ("host = ?", (host,)), ("1", ())):
+            size, seconds, _, _, count = averages(where, args)
+            if count and seconds:
+                speed = size / seconds
+                break
+        if speed is None:
+            return None
+        rates = {'bytes_per_second': speed, 'bytes_per_media_second': None, 'bytes_per_file': None}
+        for where, args in (("host = ? AND quality = ?", (host, quality)), ("quality = ?", (quality,))):
+            size, _, media_seconds, files, count = averages(where, args)
+            if count:
+                rates['bytes_per_media_second'] = size / media_seconds if media_seconds else None
+                rates['bytes_per_file'] = size / files if files else None
+                break
+        return rates
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+class VoiceActivityDetector:
+    """Streaming energy + zero-crossing voice activity detection (NumPy)
+
+    Feed 16-bit mono PCM in blocks of any size; only the current block and
+    the segment edges found so far are held, so hour-long files run in
+    bounded memory. A frame counts as speech when it is louder than the
+    running noise floor by VAD_FLOOR_MARGIN_DB and its zero-crossing rate is
+    below VAD_MAX_ZCR (noise and hiss cross zero far more often than voice).
+    """
+
+    def __init__(self, sample_rate=VAD_SAMPLE_RATE):
+        self.frame_size = sample_rate * VAD_FRAME_MS // 1000
+        self.frame_seconds = self.frame_size / sample_rate
+        self.carry = np.zeros(0, dtype='<i2')
+        self.frames_seen = 0
+        self.noise_floor = None
+        self.in_speech = False
+        self.starts = []  # Frame indices where speech starts, one array per block
+        self.ends = []
+
+    def feed(self, pcm):
+        samples = np.frombuffer(pcm, dtype='<i2')
+        if self.carry.size:
+            samples = np.concatenate((self.carry, samples))
+        count = samples.size // self.frame_size
+        self.carry = samples[count * self.frame_size:].copy()
+        if not count:
+            return
+
+        frames = samples[:count * self.frame_size].reshape(count, self.frame_size).astype(np.float32) / 32768
+        level = 20 * np.log10(np.maximum(np.sqrt(np.mean(frames ** 2, axis=1)), 1e-5))
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_size - 1)
+
+        floor = float(np.percentile(level, 10))
+        self.noise_floor = floor if self.noise_floor is None else 0.9 * self.noise_floor + 0.1 * floor
+        threshold = max(self.noise_floor + VAD_FLOOR_MARGIN_DB, VAD_MIN_DBFS)
+        voiced = (level > threshold) & (zcr < VAD_MAX_ZCR)
+
+        # Edges, continuing the speech/silence state from the previous block
+        edges = np.diff(np.concatenate(([self.in_speech], voiced)).astype(np.int8))
+        self.starts.append(np.flatnonzero(edges == 1) + self.frames_seen)
+        self.ends.append(np.flatnonzero(edges == -1) + self.frames_seen)
+        self.in_speech = bool(voiced[-1])
+        self.frames_seen += count
+
+    def finish(self):
+        """(starts, ends, duration) in seconds, short gaps merged, blips dropped"""
+        starts = np.concatenate(self.starts) if self.starts else np.zeros(0, dtype=np.int64)
+        ends = np.concatenate(self.ends) if self.ends else np.zeros(0, dtype=np.int64)
+        if self.in_speech:
+            ends = np.append(ends, self.frames_seen)
+        starts = starts * self.frame_seconds
+        ends = ends * self.frame_seconds
+
+        if starts.size:
+            keep = np.concatenate(([True], starts[1:] - ends[:-1] >= VAD_MIN_GAP_SECONDS))
+            starts, ends = starts[keep], ends[np.concatenate((keep[1:], [True]))]
+            long_enough = ends - starts >= VAD_MIN_SPEECH_SECONDS
+            starts, ends = starts[long_enough], ends[long_enough]
+        return starts.astype(np.float32), ends.astype(np.float32), self.frames_seen * self.frame_seconds
+
+def trim_info(info):
+    """Keep the dataset-relevant part of a yt-dlp info dict"""
+    return {key: info[key] for key in INFO_KEEP_FIELDS if info.get(key) is not None}
+
+def info_json_path(media_path):
+    """The .info.json yt-dlp wrote next to a media file (same output template)"""
+    return os.path.splitext(media_path)[0] + '.info.json'
+
+def load_info(media_path):
+    """A media file's info dict from whichever sidecar it has ({} if none)
+
+    Looks for the .info.json, then a trimmed .info.json.gz, then the
+    folder's info pack (by file name).
+    """
+    info_path = info_json_path(media_path)
+    if os.path.exists(info_path):
+        with open(info_path, encoding='utf-8') as f:
+            return json.load(f)
+    if os.path.exists(info_path + '.gz'):
+        with gzip.open(info_path + '.gz', 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    directory = os.path.dirname(media_path)
+    if os.path.exists(os.path.join(directory, INFO_PACK_INDEX)):
+        return InfoPack(directory).find(os.path.basename(media_path)) or {}
+    return {}
+
+class InfoPack:
+    """Trimmed info JSONs of one folder in info-pack.jsonl.gz
+
+    Every record is a gzip member of its own, so the pack reads as one
+    ordinary .jsonl.gz (zcat, pandas) while info-pack.idx.jsonl - one
+    {"key", "file", "offset", "size"} line per record - lets a reader
+    decompress a single record. The record is written before its index
+    line: a crash in between leaves an unindexed record nothing points to.
+    Repacking the same video again appends; the last index line wins.
+
+    Appends hold a file lock (info-pack.lock), so worker nodes and --repack
+    writing to the same (network) folder at once don't interleave.
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, INFO_PACK_NAME)
+        self.index_path = os.path.join(directory, INFO_PACK_INDEX)
+        self.lock_path = os.path.join(directory, INFO_PACK_LOCK)
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def file_lock(self):
+        """Exclusive lock on the pack across processes (and hosts sharing the folder)"""
+        with open(self.lock_path, 'a+b') as f:
+            if fcntl:
+                fcntl.lockf(f, fcntl.LOCK_EX)
+            elif msvcrt:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # Gives up after 10 s
+                        break
+                    except OSError:
+                        pass
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.lockf(f, fcntl.LOCK_UN)
+                elif msvcrt:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def append(self, key, record):
+        data = gzip.compress(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n', mtime=0)
+        with self.lock, self.file_lock():
+            with open(self.path, 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(data)
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'file': record.get('file_name', ''),
+                                    'offset': offset, 'size': len(data)}, ensure_ascii=False) + '\n')
+
+    def index(self):
+        """key -> index entry of the folder's latest record per video"""
+        entries = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line
+                    entries[entry['key']] = entry
+        return entries
+
+    def read(self, entry):
+        with open(self.path, 'rb') as f:
+            f.seek(entry['offset'])
+            return json.loads(gzip.decompress(f.read(entry['size'])))
+
+    def get(self, key):
+        entry = self.index().get(key)
+        return self.read(entry) if entry else None
+
+    def find(self, file_name):
+        for entry in reversed(list(self.index().values())):
+            if entry['file'] == file_name:
+                return self.read(entry)
+        return None
+
+def compact_info_json(info_path, mode, media_name=None, pack=None):
+    """Replace a .info.json by its trimmed form: a .info.json.gz next to it or a pack record"""
+    with open(info_path, encoding='utf-8') as f:
+        info = json.load(f)
+    if media_name is None:
+        # Converter: the file name yt-dlp wrote the media under
+        media_name = os.path.basename(info.get('filepath') or info.get('_filename')
+                                      or info.get('filename') or info_path[:-len('.info.json')])
+    record = trim_info(info)
+    record['file_name'] = media_name
+    if mode == SIDECAR_MODES[1]:
+        temp = info_path + '.gz.tmp'
+        with gzip.open(temp, 'wt', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(temp, info_path + '.gz')
+    else:
+        pack = pack or InfoPack(os.path.dirname(info_path))
+        pack.append(shard_key(media_name, info), record)
+    os.remove(info_path)
+
+def repack_info_jsons(folder, mode, log=print):
+    """Converter: compact every .info.json under folder in place"""
+    converted = before = after = 0
+    for directory, subdirs, names in os.walk(folder):
+        subdirs[:] = [name for name in subdirs if name != QUARANTINE_DIR_NAME]
+        info_names = sorted(name for name in names if name.endswith('.info.json'))
+        if not info_names:
+            continue
+        pack = InfoPack(directory) if mode == SIDECAR_MODES[2] else None
+        pack_size = os.path.getsize(pack.path) if pack and os.path.exists(pack.path) else 0
+        for name in info_names:
+            path = os.path.join(directory, name)
+            try:
+                size = os.path.getsize(path)
+                compact_info_json(path, mode, pack=pack)
+            except (OSError, ValueError) as e:
+                log(f"⚠️ Skipping {path}: {str(e)}")
+                continue
+            converted += 1
+            before += size
+            if not pack:
+                after += os.path.getsize(path + '.gz')
+        if pack and os.path.exists(pack.path):
+            after += os.path.getsize(pack.path) - pack_size
+    log(f"🗜️ Repacked {converted} info JSON file(s): {format_bytes(before)} → {format_bytes(after)}")
+    return converted
+
+class ShardWriter:
+    """Packs finished items into fixed-size tar shards in one output folder
+
+    WebDataset layout: every sample is a group of members sharing a key
+    (<key>.flac, <key>.json, ...). A shard is written as shard-NNNNNN.tar.tmp
+    and only renamed to shard-NNNNNN.tar once full or at the end of the
+    batch, next to shard-NNNNNN.idx.json with the byte offset and size of
+    every member - so anything matching *.tar is complete and can be read
+    while the batch is still running. Samples in a .tar.tmp left behind by a
+    crash are carried over into the next shard.
+    """
+
+    def __init__(self, directory, shard_bytes, log):
+        self.directory = os.path.join(directory, SHARD_DIR_NAME)
+        self.shard_bytes = shard_bytes
+        self.log = log
+        self.tar = None
+        self.temp_path = None
+        self.index = {}
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.number = self._next_number()
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith('.tar.tmp'):
+                self._salvage(os.path.join(self.directory, name))
+
+    def _next_number(self):
+        numbers = [int(m.group(1)) for m in map(SHARD_NAME_PATTERN.match, os.listdir(self.directory)) if m]
+        return max(numbers) + 1 if numbers else 0
+
+    def _open(self):
+        self.temp_path = os.path.join(self.directory, f'shard-{self.number:06d}.tar.tmp')
+        self.tar = tarfile.open(self.temp_path, 'w', format=tarfile.PAX_FORMAT)
+        self.index = {}
+        self.number += 1
+
+    def _add_member(self, name, data):
+        """Append one member from bytes or a (file object, size) pair, streamed"""
+        fileobj, size = (io.BytesIO(data), len(data)) if isinstance(data, bytes) else data
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(time.time())
+        self.tar.addfile(info, fileobj)
+        # tar.offset now sits past the data and its padding to 512-byte blocks
+        offset = self.tar.offset - -(-size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+        key, ext = name.split('.', 1)
+        self.index.setdefault(key, {})[ext] = [offset, size]
+
+    def add_sample(self, key, members):
+        """Add one sample; members maps extension (flac, json, ...) to bytes
+
+        or to a (binary file object, size) pair, which is copied into the
+        shard in chunks, so large media never sits in memory whole.
+        """
+        with self.lock:
+            if self.tar is None:
+                self._open()
+            for ext, data in members.items():
+                self._add_member(f'{key}.{ext}', data)
+            if self.tar.offset >= self.shard_bytes:
+                self._seal()
+
+    def _seal(self):
+        self.tar.close()
+        final_path = self.temp_path[:-len('.tmp')]
+        index_path = final_path[:-len('.tar')] + '.idx.json'
+        with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'shard': os.path.basename(final_path), 'samples': self.index}, f)
+        os.replace(index_path + '.tmp', index_path)
+        os.replace(self.temp_path, final_path)  # The index is there before the shard appears
+        self.log(f"📦 Sealed {os.path.basename(final_path)} ({len(self.index)} samples, "
+                 f"{os.path.getsize(final_path) / 1024 ** 2:.0f} MB)")
+        self.tar = None
+
+    def _salvage(self, path):
+        """Carry complete samples from an unsealed shard over into a new one"""
+        samples = {}
+        file_size = os.path.getsize(path)
+        try:
+            with tarfile.open(path, 'r') as tar:
+                try:
+                    for member in tar:
+                        if member.offset_data + member.size <= file_size:
+                            key, ext = member.name.split('.', 1)
+                            samples.setdefault(key, {})[ext] = member
+                except (tarfile.TarError, OSError, ValueError):
+                    pass  # Truncated: keep what was listed before the damage
+                # The member written last may have been the one cut short
+                complete = {key: members for key, members in samples.items() if 'json' in members}
+                for key, members in complete.items():
+                    self.add_sample(key, {ext: (tar.extractfile(member), member.size)
+                                          for ext, member in members.items()})
+        except (tarfile.TarError, OSError):
+            complete = {}
+        os.remove(path)
+        if complete:
+            self.log(f"📦 Recovered {len(complete)} sample(s) from unsealed {os.path.basename(path)}")
+
+    def close(self):
+        with self.lock:
+            if self.tar is not None:
+                self._seal()
+
+class ShardReader:
+    """Random access to a sealed shard through its index and a memory map
+
+    reader.sample(key) returns {ext: memoryview}; nothing is copied until
+    the caller does. Release the views before close().
+    """
+
+    def __init__(self, path):
+        with open(path[:-len('.tar')] + '.idx.json', encoding='utf-8') as f:
+            self.samples = json.load(f)['samples']
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def keys(self):
+        return list(self.samples)
+
+    def sample(self, key):
+        view = memoryview(self.map)
+        return {ext: view[offset:offset + size] for ext, (offset, size) in self.samples[key].items()}
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+def shard_key(media_path, info):
+    """WebDataset sample key: the video ID, else a hash of the file name"""
+    key = info.get('id') or hashlib.sha1(os.path.basename(media_path).encode('utf-8')).hexdigest()[:16]
+    return re.sub(r'[^A-Za-z0-9_-]', '_', key)  # Keys can't contain dots
+
+class HarvestStore:
+    """Compact SQLite store for harvested metadata (harvest.db per output folder)
+
+    Info JSON and subtitles are kept zlib-compressed, thumbnails as-is,
+    instead of thousands of loose files.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS videos (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            channel TEXT,
+            upload_date TEXT,
+            duration REAL,
+            webpage_url TEXT,
+            info BLOB NOT NULL,  -- zlib-compressed info JSON
+            harvested_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS subtitles (
+            video_id TEXT NOT NULL,
+            lang TEXT NOT NULL,
+            ext TEXT NOT NULL,
+            data BLOB NOT NULL,  -- zlib-compressed
+            PRIMARY KEY (video_id, lang, ext)
+        );
+        CREATE TABLE IF NOT EXISTS thumbnails (
+            video_id TEXT PRIMARY KEY,
+            ext TEXT NOT NULL,
+            data BLOB NOT NULL
+        );
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, HARVEST_DB_NAME)
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.executescript(self.SCHEMA)
+
+    def known_ids(self, ids):
+        """The IDs among ids that were already harvested"""
+        known = set()
+        ids = list(ids)
+        with self.lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self.db.execute(
+                    f"SELECT id FROM videos WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                known.update(row[0] for row in rows)
+        return known
+
+    def ingest(self, directory):
+        """Store and delete the files yt-dlp wrote as <id>.<...>; returns the video IDs"""
+        videos, subtitles, thumbnails = [], [], []
+        now = datetime.now().isoformat(timespec='seconds')
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            video_id, _, rest = name.partition('.')
+            if rest.endswith(('.part', '.temp', '.ytdl')):
+                continue  # Cut short by Stop
+            with open(path, 'rb') as f:
+                data = f.read()
+            if rest == 'info.json':
+                try:
+                    info = json.loads(data)
+                except ValueError:
+                    continue
+                videos.append((video_id, info.get('title'), info.get('channel') or info.get('uploader'),
+                               info.get('upload_date'), info.get('duration'), info.get('webpage_url'),
+                               zlib.compress(data, 9), now))
+            elif '.' in rest:
+                lang, _, ext = rest.rpartition('.')
+                subtitles.append((video_id, lang, ext, zlib.compress(data, 9)))
+            elif rest:
+                thumbnails.append((video_id, rest, data))
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?)", videos)
+            self.db.executemany("INSERT OR REPLACE INTO subtitles VALUES (?, ?, ?, ?)", subtitles)
+            self.db.executemany("INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?)", thumbnails)
+        shutil.rmtree(directory, ignore_errors=True)
+        return [video[0] for video in videos]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+class Harvester:
+    """Skip-download harvest of info JSON, subtitles and thumbnails
+
+    The URL is expanded flat into videos first; the videos not yet in the
+    output folder's HarvestStore are then fetched in chunks by several
+    yt-dlp processes at once, without the sleeps media downloads use.
+    """
+
+    def __init__(self, base_cmd, output_dir, log, progress=None, workers=HARVEST_WORKERS,
+                 throttle_pattern=None):
+        self.base_cmd = base_cmd  # yt-dlp plus cookies/network/extractor options
+        self.output_dir = output_dir
+        self.log = log
+        self.progress = progress or (lambda done, total: None)
+        self.workers = workers
+        self.throttle_pattern = throttle_pattern
+        self.throttled = False
+        self.stopped = False
+        self.paused = False
+        self.processes = set()
+        self.lock = threading.Lock()
+        self.done = 0
+
+    def _popen(self, cmd):
+        process = spawn(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True
+        )
+        with self.lock:
+            self.processes.add(process)
+            if self.paused:
+                suspend_tree(process)
+        return process
+
+    def suspend(self, suspend=True):
+        """Freeze (or thaw) every yt-dlp of this harvest, including ones started while paused"""
+        with self.lock:
+            self.paused = suspend
+            for process in self.processes:
+                suspend_tree(process, suspend)
+
+    def _finish(self, process):
+        process.wait()
+        with self.lock:
+            self.processes.discard(process)
+        return process.returncode
+
+    def _check_line(self, line):
+        line = line.strip()
+        if line.startswith('ERROR') or line.startswith('WARNING: [youtube]'):
+            self.log(line)
+        if self.throttle_pattern and self.throttle_pattern.search(line):
+            self.throttled = True
+
+    def expand(self, url, limit=0):
+        """(video id, URL) of every video behind a channel/playlist/video URL"""
+        process = self._popen(self.base_cmd + [
+            '--flat-playlist', '--ignore-errors', '--print', '%(id)s\t%(webpage_url,url)s', url])
+        videos = []
+        for line in process.stdout:
+            video_id, tab, video_url = line.strip().partition('\t')
+            if tab and video_id != 'NA':
+                videos.append((video_id, video_url))
+            else:
+                self._check_line(line)
+        self._finish(process)
+        return videos[:limit] if limit else videos
+
+    def _harvest_chunk(self, store, chunk, total):
+        """(harvested, failed) videos of one chunk; both 0 when stopped before it started
+
+        Videos cut short by Stop don't count as failed. An error (e.g. an
+        unreadable file) fails this chunk only.
+        """
+        if self.stopped:
+            return 0, 0
+        temp_dir = os.path.join(self.output_dir, f'.harvest-{uuid.uuid4().hex[:8]}')
+        try:
+            harvested = len(self._fetch_chunk(store, chunk, temp_dir))
+        except Exception as e:
+            self.log(f"⚠️ Harvest of {len(chunk)} video(s) failed: {str(e)}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            harvested = 0
+        with self.lock:
+            self.done += len(chunk)
+            done = self.done
+        self.progress(done, total)
+        return harvested, 0 if self.stopped else len(chunk) - harvested
+
+    def _fetch_chunk(self, store, chunk, temp_dir):
+        os.makedirs(temp_dir)
+        process = self._popen(self.base_cmd + [
+            '--skip-download',
+            '--write-info-json',
+            '--write-subs', '--write-auto-subs', '--sub-langs', HARVEST_SUB_LANGS,
+            '--write-thumbnail',
+            '--no-write-playlist-metafiles',
+            '--ignore-errors',
+            '--no-abort-on-error',
+            '-o', os.path.join(temp_dir, '%(id)s.%(ext)s'),
+        ] + [video_url for _, video_url in chunk])
+        for line in process.stdout:
+            self._check_line(line)
+        self._finish(process)
+        return store.ingest(temp_dir)
+
+    def run(self, url, limit=0):
+        """Harvest everything behind url; returns (harvested, failed, skipped by Stop, already had)"""
+        self.log(f"🔎 Listing videos for harvest: {url}")
+        videos = self.expand(url, limit)
+        store = HarvestStore(self.output_dir)
+        try:
+            known = store.known_ids(video_id for video_id, _ in videos)
+            todo = [video for video in videos if video[0] not in known]
+            self.log(f"🗂️ {len(videos)} video(s), {len(known)} already harvested, {len(todo)} to fetch "
+                     f"({self.workers} parallel)")
+
+            chunks = [todo[start:start + HARVEST_CHUNK] for start in range(0, len(todo), HARVEST_CHUNK)]
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(lambda chunk: self._harvest_chunk(store, chunk, len(todo)),
+                                            chunks))
+        finally:
+            store.close()
+        harvested = sum(count for count, _ in results)
+        failed = sum(count for _, count in results)
+        return harvested, failed, len(todo) - harvested - failed, len(known)
+
+    def stop(self):
+        self.stopped = True
+        with self.lock:
+            processes = list(self.processes)
+        for process in processes:
+            kill_tree(process, grace=0)
+
+class FormatBudget:
+    """Size or bitrate budget that drives format selection
+
+    Modes (BUDGET_MODES): a size cap per video, a size cap per batch item
+    (a whole channel or playlist), or a bitrate cap. Within the cap the
+    best format wins; if nothing fits, the smallest one.
+    """
+
+    def __init__(self, mode="Off", value=0):
+        self.mode = mode
+        self.value = value
+
+    def __bool__(self):
+        return self.mode != BUDGET_MODES[0] and self.value > 0
+
+    def __str__(self):
+        if self.mode == BUDGET_MODES[3]:
+            return f"{self.value:g} Mbit/s max"
+        return f"{self.value:g} GB per {'video' if self.mode == BUDGET_MODES[1] else 'item'}"
+
+    @property
+    def per_video(self):
+        return self.mode == BUDGET_MODES[1]
+
+    @property
+    def per_item(self):
+        return self.mode == BUDGET_MODES[2]
+
+    @property
+    def max_bytes(self):
+        return int(self.value * 1024 ** 3) if self.per_video or self.per_item else None
+
+    @property
+    def max_kbps(self):
+        return self.value * 1000 if self.mode == BUDGET_MODES[3] else None
+
+def estimated_format_bytes(fmt, duration):
+    """Size of a format from the extracted format list, exact or estimated"""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if not size and fmt.get('tbr') and duration:
+        size = fmt['tbr'] * 1000 / 8 * duration
+    return int(size) if size else None
+
+def pick_budget_format(info, max_height=None, max_bytes=None, max_kbps=None):
+    """Best single-file format of an info dict within the budget
+
+    Returns (format, projected bytes, fits) or None when no format has a
+    known size. Like the quality presets, only formats carrying both
+    video and audio up to max_height are considered.
+    """
+    duration = info.get('duration') or 0
+    candidates = []
+    for fmt in info.get('formats') or []:
+        if fmt.get('vcodec') in (None, 'none') or fmt.get('acodec') in (None, 'none'):
+            continue
+        if max_height and (fmt.get('height') or 0) > max_height:
+            continue
+        size = estimated_format_bytes(fmt, duration)
+        if size is None:
+            continue
+        kbps = fmt.get('tbr') or (size * 8 / 1000 / duration if duration else 0)
+        candidates.append((size, kbps, fmt))
+    if not candidates:
+        return None
+
+    fitting = [c for c in candidates
+               if (max_bytes is None or c[0] <= max_bytes) and (max_kbps is None or c[1] <= max_kbps)]
+    if fitting:
+        size, _, fmt = max(fitting, key=lambda c: (c[1], c[0]))
+    else:
+        size, _, fmt = min(candidates, key=lambda c: c[0])
+    return fmt, size, bool(fitting)
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.2f} {unit}"
+        size /= 1024
+
+def format_duration(seconds):
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"{max(minutes, 1)}m"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m" if hours < 48 else f"{hours // 24}d {hours % 24}h"
+
+class BatchItemQueue:
+    """Thread-safe queue of batch items shared by the download workers
+
+    Items are (item_number, url, output_dir) tuples, numbered from 1 in the
+    order they were added to the batch.
+    """
+
+    def __init__(self, batch_items):
+        self.items = deque((n, url, output_dir)
+                           for n, (url, output_dir) in enumerate(batch_items, 1))
+        self.total = len(self.items)
+        self.completed = 0  # Nothing is carried over from an earlier run
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.total
+
+    def next_item(self):
+        """Take the next item, or None when the queue is empty"""
+        with self.lock:
+            return self.items.popleft() if self.items else None
+
+    def requeue(self, item):
+        """Put an item back at the front of the queue"""
+        with self.lock:
+            self.items.appendleft(item)
+
+    def peek(self, count):
+        """The next count items, without taking them"""
+        with self.lock:
+            return list(self.items)[:count]
+
+    def prioritize(self, predicate):
+        """Move items for which predicate(item) is true to the front"""
+        with self.lock:
+            first = [item for item in self.items if predicate(item)]
+            rest = [item for item in self.items if not predicate(item)]
+            self.items = deque(first + rest)
+
+    def finish_item(self, item, success, message):
+        """Record the outcome of an item (nothing to persist for a list)"""
+        pass
+
+    def add_retry(self, url, output_dir):
+        """Append a new item during the run; False where the queue can't grow"""
+        with self.lock:
+            self.total += 1
+            self.items.append((self.total, url, output_dir))
+        return True
+
+    def output_dirs(self):
+        return list(dict.fromkeys(output_dir for _, _, output_dir in self.items))
+
+class SqliteBatchQueue:
+    """Batch queue kept in an on-disk SQLite table (~/.the-batcher/queue.db)
+
+    Drop-in for BatchItemQueue that holds nothing per item in memory, so a
+    batch of hundreds of thousands of videos costs the same as ten. Every
+    item is a row with its status (pending, running, done, failed),
+    attempts, priority and timestamps; it survives restarts and crashes.
+    Workers claim the next pending row inside an IMMEDIATE transaction, so
+    no two claimers - threads or processes - get the same item. Items are
+    numbered by position, which the GUI pages through; a claimed item is
+    updated by its row id, so renumbering while it runs can't hit another row.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS queue (
+            id INTEGER PRIMARY KEY,
+            position INTEGER NOT NULL,  -- Item number in the GUI and logs
+            url TEXT NOT NULL,
+            output_dir TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            priority INTEGER NOT NULL DEFAULT 0,
+            message TEXT,
+            added_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS queue_next ON queue (status, priority DESC, position);
+        CREATE INDEX IF NOT EXISTS queue_position ON queue (position);
+    """
+
+    def __init__(self, path=QUEUE_DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit; writes use explicit BEGIN IMMEDIATE transactions
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.executescript(self.SCHEMA)
+        self.claimed = {}  # (position, url, output_dir) handed out -> row id
+        self.completed = 0  # Items already done when this run started
+        self.renumber()
+        self.total = self.count()
+
+    def renumber(self):
+        """Number the rows 1..n again if positions are duplicated or missing"""
+        with self.transaction() as db:
+            count, distinct, last = db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT position), COALESCE(MAX(position), 0) FROM queue").fetchone()
+            if count == distinct == last:
+                return
+            ids = [row[0] for row in db.execute("SELECT id FROM queue ORDER BY position, id")]
+            db.executemany("UPDATE queue SET position = ? WHERE id = ?",
+                           ((position, row_id) for position, row_id in enumerate(ids, 1)))
+
+    @contextlib.contextmanager
+    def transaction(self):
+        with self.lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.db
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+            self.db.execute('COMMIT')
+
+    def __len__(self):
+        return self.total
+
+    def count(self, status=None):
+        with self.lock:
+            if status:
+                return self.db.execute("SELECT COUNT(*) FROM queue WHERE status = ?", (status,)).fetchone()[0]
+            return self.db.execute("SELECT COUNT(*) FROM queue").fetchone()[0]
+
+    # Editing the batch (GUI)
+
+    def add_items(self, items):
+        """Append (url, output_dir) pairs from any iterable"""
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.transaction() as db:
+            last = db.execute("SELECT COALESCE(MAX(position), 0) FROM queue").fetchone()[0]
+            positions = itertools.count(last + 1)
+            db.executemany("INSERT INTO queue (position, url, output_dir, added_at) VALUES (?, ?, ?, ?)",
+                           ((next(positions), url, output_dir, now) for url, output_dir in items))
+        self.total = self.count()
+
+    def remove(self, ids):
+        """Delete rows by id (any iterable) and close the gaps in the numbering"""
+        with self.transaction() as db:
+            found = {}  # id -> position; ids already gone (e.g. removed elsewhere) are skipped
+            for row_id in ids:
+                row = db.execute("SELECT position FROM queue WHERE id = ?", (row_id,)).fetchone()
+                if row is not None:
+                    found[row_id] = row[0]
+            ids, removed = list(found), sorted(found.values())
+            db.executemany("DELETE FROM queue WHERE id = ?", ((row_id,) for row_id in ids))
+            # Rows between the n-th and n+1-th removed position move up by n
+            bounds = removed[1:] + [None]
+            for shift, (low, high) in enumerate(zip(removed, bounds), 1):
+                if high is None:
+                    db.execute("UPDATE queue SET position = position - ? WHERE position > ?", (shift, low))
+                else:
+                    db.execute("UPDATE queue SET position = position - ? WHERE position > ? AND position < ?",
+                               (shift, low, high))
+        self.total = self.count()
+
+    def clear(self):
+        with self.transaction() as db:
+            db.execute("DELETE FROM queue")
+        self.total = 0
+
+    def page(self, start, limit):
+        """Rows after position start: (id, position, url, output_dir, status, attempts)"""
+        with self.lock:
+            return self.db.execute(
+                "SELECT id, position, url, output_dir, status, attempts FROM queue "
+                "WHERE position > ? ORDER BY position LIMIT ?", (start, limit)).fetchall()
+
+    def items(self):
+        """All (url, output_dir) pairs in order, read a page at a time"""
+        position = 0
+        while True:
+            rows = self.page(position, QUEUE_PAGE_ROWS)
+            if not rows:
+                return
+            for _, position, url, output_dir, _, _ in rows:
+                yield url, output_dir
+
+    def remaining(self):
+        """(url, output_dir) of the pending and running items, read a page at a time"""
+        position = 0
+        while True:
+            with self.lock:
+                rows = self.db.execute(
+                    "SELECT position, url, output_dir FROM queue WHERE position > ? "
+                    "AND status IN ('pending', 'running') ORDER BY position LIMIT ?",
+                    (position, QUEUE_PAGE_ROWS)).fetchall()
+            if not rows:
+                return
+            for position, url, output_dir in rows:
+                yield url, output_dir
+
+    def output_dirs(self):
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT DISTINCT output_dir FROM queue")]
+
+    # Running the batch (engine)
+
+    def prepare_run(self):
+        """Make the queue ready for a run; returns how many items are done already
+
+        Failed items and items left running by a crash are tried again; if
+        nothing is left pending, the whole batch is run again.
+        """
+        with self.transaction() as db:
+            db.execute("UPDATE queue SET status = 'pending' WHERE status IN ('running', 'failed')")
+            if not db.execute("SELECT 1 FROM queue WHERE status = 'pending' LIMIT 1").fetchone():
+                db.execute("UPDATE queue SET status = 'pending', priority = 0, attempts = 0")
+            self.completed = db.execute("SELECT COUNT(*) FROM queue WHERE status = 'done'").fetchone()[0]
+        return self.completed
+
+    def next_item(self):
+        """Claim the next pending item, or None when there is none"""
+        with self.transaction() as db:
+            row = db.execute("SELECT id, position, url, output_dir FROM queue WHERE status = 'pending' "
+                             "ORDER BY priority DESC, position LIMIT 1").fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE queue SET status = 'running', attempts = attempts + 1, started_at = ? "
+                       "WHERE id = ?", (datetime.now().isoformat(timespec='seconds'), row[0]))
+        item = (row[1], row[2], row[3])
+        with self.lock:
+            self.claimed[item] = row[0]
+        return item
+
+    def _row_id(self, item):
+        """Row id of a claimed item (released), or looked up by position"""
+        with self.lock:
+            row_id = self.claimed.pop(tuple(item), None)
+            if row_id is None:
+                row = self.db.execute("SELECT id FROM queue WHERE position = ?", (item[0],)).fetchone()
+                row_id = row[0] if row else None
+        return row_id
+
+    def _front_priority(self, db):
+        row = db.execute("SELECT priority FROM queue WHERE status = 'pending' "
+                         "ORDER BY priority DESC LIMIT 1").fetchone()
+        return (row[0] if row else 0) + 1
+
+    def requeue(self, item):
+        """Put an item back at the front of the queue"""
+        row_id = self._row_id(item)
+        with self.transaction() as db:
+            db.execute("UPDATE queue SET status = 'pending', priority = ? WHERE id = ?",
+                       (self._front_priority(db), row_id))
+
+    def peek(self, count):
+        with self.lock:
+            return self.db.execute("SELECT position, url, output_dir FROM queue WHERE status = 'pending' "
+                                   "ORDER BY priority DESC, position LIMIT ?", (count,)).fetchall()
+
+    def prioritize(self, predicate):
+        """Move pending items for which predicate(item) is true to the front"""
+        matches, position = [], 0
+        while True:
+            with self.lock:
+                rows = self.db.execute("SELECT position, url, output_dir FROM queue WHERE status = 'pending' "
+                                       "AND position > ? ORDER BY position LIMIT ?",
+                                       (position, QUEUE_PAGE_ROWS)).fetchall()
+            if not rows:
+                break
+            matches.extend(row[0] for row in rows if predicate(row))
+            position = rows[-1][0]
+        with self.transaction() as db:
+            priority = self._front_priority(db)
+            db.executemany("UPDATE queue SET priority = ? WHERE position = ?",
+                           ((priority, match) for match in matches))
+
+    def finish_item(self, item, success, message):
+        row_id = self._row_id(item)
+        with self.transaction() as db:
+            db.execute("UPDATE queue SET status = ?, message = ?, finished_at = ? WHERE id = ?",
+                       ('done' if success else 'failed', message,
+                        datetime.now().isoformat(timespec='seconds'), row_id))
+
+    def add_retry(self, url, output_dir):
+        """Append a new item at the front of what is pending"""
+        self.add_items([(url, output_dir)])
+        with self.transaction() as db:
+            db.execute("UPDATE queue SET priority = ? WHERE position = (SELECT MAX(position) FROM queue)",
+                       (self._front_priority(db),))
+        return True
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+class EgressRoute:
+    """One way out to the network: a local source address or a proxy
+
+    A spec containing "://" is a proxy (http://, https://, socks4://,
+    socks5://); anything else is a local IP address to bind to.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec.strip()
+        self.proxy = self.spec if '://' in self.spec else None
+        self.source_address = None if self.proxy else self.spec
+        self.in_use = 0
+        self.strikes = 0  # Throttle hits since the last clean item
+        self.cooldown_until = 0.0
+        self.healthy = True
+
+    def __str__(self):
+        return self.spec
+
+    def ytdlp_args(self):
+        if self.proxy:
+            return ['-4', '--proxy', self.proxy]
+        ip_flag = '-6' if ':' in self.source_address else '-4'
+        return [ip_flag, '--source-address', self.source_address]
+
+    def check(self):
+        """Return True if the route can be used right now
+
+        Proxies must accept a TCP connection; source addresses must be
+        assigned to a local interface (binding to them succeeds).
+        """
+        try:
+            if self.proxy:
+                parts = urllib.parse.urlsplit(self.proxy)
+                default_port = 1080 if parts.scheme.startswith('socks') else 8080
+                with socket.create_connection((parts.hostname, parts.port or default_port),
+                                              timeout=ROUTE_CHECK_TIMEOUT):
+                    pass
+            else:
+                family = socket.AF_INET6 if ':' in self.source_address else socket.AF_INET
+                with socket.socket(family, socket.SOCK_STREAM) as sock:
+                    sock.bind((self.source_address, 0))
+            return True
+        except (OSError, ValueError):
+            return False
+
+class ResourcePool:
+    """Pool of interchangeable resources (routes, cookie profiles) shared by workers
+
+    Workers get the least busy resource that is healthy and not cooling
+    down. A resource reported as throttled is rested for cooldown seconds,
+    doubling on every further strike up to max_cooldown. Health
+    (resource.check()) is re-checked in the background every
+    ROUTE_CHECK_INTERVAL. Resources need spec, in_use, strikes,
+    cooldown_until and healthy attributes.
+    """
+
+    def __init__(self, resources, cooldown=ROUTE_COOLDOWN_SECONDS, max_cooldown=ROUTE_MAX_COOLDOWN_SECONDS):
+        self.resources = resources
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cond = threading.Condition()
+        self.closed = False
+        self.checker = None
+
+    def __len__(self):
+        return len(self.resources)
+
+    def start(self):
+        """Run an initial health check and start the background checker"""
+        self.check_all()
+        self.checker = threading.Thread(target=self._check_loop, daemon=True)
+        self.checker.start()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def check_all(self):
+        results = [(resource, resource.check()) for resource in self.resources]
+        with self.cond:
+            for resource, healthy in results:
+                resource.healthy = healthy
+            self.cond.notify_all()
+        return results
+
+    def _check_loop(self):
+        while True:
+            with self.cond:
+                self.cond.wait(ROUTE_CHECK_INTERVAL)
+                if self.closed:
+                    return
+            self.check_all()
+
+    def _pick(self, prefer=None):
+        now = time.time()
+        usable = [r for r in self.resources if r.healthy and r.cooldown_until <= now]
+        for resource in usable:
+            if resource.spec == prefer:
+                return resource
+        return min(usable, key=lambda r: r.in_use) if usable else None
+
+    def peek(self):
+        """The resource acquire() would hand out now, without taking it"""
+        with self.cond:
+            return self._pick()
+
+    def acquire(self, cancelled, prefer=None):
+        """Block until a resource is available; None if cancelled() turns True
+
+        prefer names a resource (by spec) to take if it is usable, e.g. the
+        route an item's metadata was extracted through.
+        """
+        with self.cond:
+            while not cancelled() and not self.closed:
+                resource = self._pick(prefer)
+                if resource:
+                    resource.in_use += 1
+                    return resource
+                self.cond.wait(1.0)
+        return None
+
+    def release(self, resource, clean=True):
+        """Return a resource; clean=True clears its strikes"""
+        with self.cond:
+            resource.in_use -= 1
+            if clean:
+                resource.strikes = 0
+            self.cond.notify_all()
+
+    def report_throttled(self, resource):
+        """Put a resource into cooldown; returns the cooldown in seconds"""
+        with self.cond:
+            resource.strikes += 1
+            cooldown = min(self.cooldown * 2 ** (resource.strikes - 1), self.max_cooldown)
+            resource.cooldown_until = time.time() + cooldown
+            return cooldown
+
+class EgressPool(ResourcePool):
+    """Pool of egress routes handed out to download workers
+
+    A route that gets HTTP 403/429 is rested for ROUTE_COOLDOWN_SECONDS,
+    doubling on every further strike up to ROUTE_MAX_COOLDOWN_SECONDS.
+    """
+
+    def __init__(self, specs):
+        self.routes = [EgressRoute(spec) for spec in specs if spec.strip()]
+        super().__init__(self.routes)
+
+class CookieProfile:
+    """One account identity: a browser profile or a Netscape cookies file
+
+    A spec ending in .txt (or naming an existing file) is a cookies file;
+    anything else goes to --cookies-from-browser as-is, e.g. "firefox",
+    "firefox:work" or "chrome:Profile 2".
+    """
+
+    def __init__(self, spec):
+        self.spec = spec.strip()
+        path = os.path.expanduser(self.spec)
+        self.cookie_file = path if path.lower().endswith('.txt') or os.path.isfile(path) else None
+        self.in_use = 0
+        self.strikes = 0  # Account errors since the last clean item
+        self.cooldown_until = 0.0
+        self.healthy = True
+        self.items = 0
+        self.errors = 0
+        self.account_errors = 0
+        self.recent = deque(maxlen=COOKIE_ERROR_WINDOW)  # True per recent failed item
+
+    def __str__(self):
+        return self.spec
+
+    def ytdlp_args(self):
+        if self.cookie_file:
+            return ['--cookies', self.cookie_file]
+        return ['--cookies-from-browser', self.spec]
+
+    def check(self):
+        """Cookie files must exist; browser profiles are left to yt-dlp"""
+        return not self.cookie_file or os.path.isfile(self.cookie_file)
+
+    def error_rate(self):
+        return sum(self.recent) / len(self.recent) if self.recent else 0.0
+
+class CookiePool(ResourcePool):
+    """Pool of cookie profiles, so parallel workers don't all look like one account
+
+    Each worker keeps the profile it had while that one is usable, so with
+    as many profiles as workers every worker has its own. A profile is rested
+    straight away on an account error (bot check, 429, rotated cookies) and
+    when its recent failure rate runs clearly above the other profiles' -
+    failures every profile sees (private or removed videos) don't count
+    against any of them.
+    """
+
+    def __init__(self, specs):
+        self.profiles = [CookieProfile(spec) for spec in specs if spec.strip()]
+        super().__init__(self.profiles, COOKIE_COOLDOWN_SECONDS, COOKIE_MAX_COOLDOWN_SECONDS)
+
+    def record(self, profile, failed, account_error=False):
+        """Count a finished item; (cooldown, failure rate) if that rests the profile, else None"""
+        with self.cond:
+            profile.items += 1
+            profile.errors += failed or account_error
+            if account_error:
+                profile.account_errors += 1
+                return None  # Rested when it happened
+            profile.recent.append(failed)
+            others = [flag for other in self.profiles if other is not profile for flag in other.recent]
+            baseline = sum(others) / len(others) if others else 0.0
+            if (not failed or len(profile.recent) < COOKIE_MIN_ITEMS
+                    or profile.error_rate() < max(COOKIE_MAX_ERROR_RATE, baseline + COOKIE_ERROR_MARGIN)):
+                return None
+            rate = profile.error_rate()
+            profile.recent.clear()  # A fresh window after the rest
+        return self.report_throttled(profile), rate
+
+    def summary(self):
+        with self.cond:
+            return [(str(profile), profile.items, profile.errors, profile.account_errors)
+                    for profile in self.profiles]
+
+def ytdlp_base_command(profile=None, network=None, cache_dir=YTDLP_CACHE_DIR):
+    """yt-dlp with cookies, network route, the shared cache and extractor options
+
+    profile is a CookieProfile (default: the firefox profile) and network
+    the route's yt-dlp arguments (default: force IPv4).
+    """
+    cmd = ['yt-dlp']
+    cmd.extend(profile.ytdlp_args() if profile else ['--cookies-from-browser', 'firefox'])
+    cmd.extend(['-4'] if network is None else network)
+    cmd.extend(['--cache-dir', cache_dir])
+    cmd.extend(['--extractor-args', 'youtube:player_client=web_safari;player_js_version=actual'])
+    return cmd
+
+def cookie_profile(cookie_pool):
+    """Profile for a one-off yt-dlp call (previews, lookups), or None for the default"""
+    if not cookie_pool:
+        return None
+    cookie_pool.check_all()  # Only file checks; these pools run no background checker
+    return cookie_pool.peek()
+
+class YtdlpCache:
+    """The --cache-dir every yt-dlp of the app shares
+
+    yt-dlp keeps the signature and n-challenge solutions of each player
+    version there, so only the first process to meet a new player has to
+    fetch and solve it. Entries are written to a temp file and renamed into
+    place, so concurrent workers can share the folder as-is.
+
+    Stats: an item is a hit when its yt-dlp found every solution it needed
+    (wrote nothing new) and a miss when it had to solve and store something.
+    Each new entry is counted once, by the first item to finish after it.
+    """
+
+    def __init__(self, path=YTDLP_CACHE_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.lock = threading.Lock()
+        self.known = self.snapshot()
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+
+    def args(self):
+        return ['--cache-dir', self.path]
+
+    def snapshot(self):
+        """{relative path: mtime} of every entry"""
+        entries = {}
+        for directory, _, names in os.walk(self.path):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    entries[os.path.relpath(path, self.path)] = os.stat(path).st_mtime_ns
+                except OSError:
+                    pass  # Replaced while we looked
+        return entries
+
+    def prune(self, max_age_days=YTDLP_CACHE_MAX_AGE_DAYS):
+        """Delete entries not written for max_age_days; returns how many"""
+        cutoff = time.time_ns() - max_age_days * 86400 * 10 ** 9
+        removed = 0
+        for relpath, mtime in self.snapshot().items():
+            if mtime < cutoff:
+                try:
+                    os.remove(os.path.join(self.path, relpath))
+                    removed += 1
+                except OSError:
+                    pass
+        with self.lock:
+            self.known = self.snapshot()
+        return removed
+
+    def update(self, count=True):
+        """Take in what a finished yt-dlp wrote; returns the number of new entries
+
+        count=False (the warm-up) leaves the hit/miss stats alone.
+        """
+        current = self.snapshot()
+        with self.lock:
+            new = sum(1 for relpath, mtime in current.items() if self.known.get(relpath) != mtime)
+            self.known = current
+            self.written += new
+            if count:
+                if new:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        return new
+
+class RangedDownloader:
+    """One file fetched as byte ranges over a pool of connections
+
+    yt-dlp's --concurrent-fragments only helps fragmented formats (DASH,
+    HLS); a progressive file comes down one connection, which the server
+    may throttle. Here the file is split into RANGED_PART_BYTES ranges and
+    every worker thread keeps its own keep-alive connection and writes the
+    ranges it fetches in place into a preallocated <path>.ranged. Finished
+    ranges are journaled in <path>.ranged.json, so a stopped download picks
+    up where it left off, as long as the journal was written for the same
+    file (identity, default the URL), size and range size. A range that fails is retried on its own
+    (RANGED_RETRIES times with a doubling delay) over a fresh connection;
+    an expired or refused URL (RANGED_FATAL_STATUS) fails the download.
+
+    Connections go out bound to source_address, or tunnelled (CONNECT)
+    through an HTTP proxy. cancelled and paused are polled callables;
+    progress(done bytes, total bytes) is called about once a second.
+    """
+
+    def __init__(self, url, path, connections, headers=None, source_address=None, proxy=None,
+                 part_bytes=RANGED_PART_BYTES, cancelled=None, paused=None, progress=None, identity=None):
+        self.url = url
+        self.identity = identity or url  # Signed media URLs change between attempts
+        self.path = path
+        self.connections = max(1, connections)
+        self.headers = dict(headers or {})
+        self.headers['Accept-Encoding'] = 'identity'  # Byte offsets must be the file's
+        self.source_address = source_address
+        self.proxy = proxy
+        self.part_bytes = part_bytes
+        self.cancelled = cancelled or (lambda: False)
+        self.paused = paused or (lambda: False)
+        self.progress = progress
+        self.size = None
+        self.done_bytes = 0
+        self.retries = 0  # Range attempts that failed and were retried
+        self.error = None
+        self.last_progress = 0.0
+        self.lock = threading.Lock()
+
+    def connect(self):
+        """(connection, split URL) for a new connection to the file's host"""
+        parts = urllib.parse.urlsplit(self.url)
+        https = parts.scheme == 'https'
+        port = parts.port or (443 if https else 80)
+        connection_class = http.client.HTTPSConnection if https else http.client.HTTPConnection
+        if self.proxy:
+            proxy = urllib.parse.urlsplit(self.proxy)
+            connection = connection_class(proxy.hostname, proxy.port or 8080, timeout=RANGED_TIMEOUT)
+            connection.set_tunnel(parts.hostname, port)
+        else:
+            source = (self.source_address, 0) if self.source_address else None
+            connection = connection_class(parts.hostname, port, timeout=RANGED_TIMEOUT,
+                                          source_address=source)
+        return connection, parts
+
+    def request(self, connection, parts, start, end):
+        headers = dict(self.headers, Range=f'bytes={start}-{end}')
+        target = urllib.parse.urlunsplit(('', '', parts.path or '/', parts.query, ''))
+        connection.request('GET', target, headers=headers)
+        return connection.getresponse()
+
+    def probe(self):
+        """Size of the file; raises RuntimeError if the server can't serve ranges
+
+        Redirects are followed, and the final URL is the one fetched.
+        """
+        for _ in range(5):
+            connection, parts = self.connect()
+            try:
+                response = self.request(connection, parts, 0, 0)
+                response.read()
+                if response.status in (301, 302, 303, 307, 308) and response.getheader('Location'):
+                    self.url = urllib.parse.urljoin(self.url, response.getheader('Location'))
+                    continue
+                match = re.match(r'bytes 0-0/(\d+)$', response.getheader('Content-Range') or '')
+                if response.status != 206 or not match:
+                    raise RuntimeError(f"server does not serve byte ranges (HTTP {response.status})")
+                return int(match.group(1))
+            finally:
+                connection.close()
+        raise RuntimeError("too many redirects")
+
+    def download(self):
+        """Fetch the file into path; returns stats, or None when cancelled
+
+        Stats: dict of bytes, seconds and retries.
+        """
+        started = time.time()
+        self.size = size = self.probe()
+        temp = self.path + '.ranged'
+        journal = temp + '.json'
+
+        done = set()
+        try:
+            with open(journal, encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                if (header.get('size') == size and header.get('part_bytes') == self.part_bytes
+                        and header.get('identity') == self.identity and os.path.getsize(temp) == size):
+                    done = {int(line) for line in f if line.strip().isdigit()}
+        except (OSError, ValueError):
+            pass
+        if not done:
+            with open(temp, 'wb') as f:
+                f.truncate(size)
+                if hasattr(os, 'posix_fallocate'):
+                    try:
+                        os.posix_fallocate(f.fileno(), 0, size)
+                    except OSError:
+                        pass  # Not supported by this file system: stays sparse
+            with open(journal, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'size': size, 'part_bytes': self.part_bytes,
+                                    'identity': self.identity}) + '\n')
+
+        pending = queue.Queue()
+        for start in range(0, size, self.part_bytes):
+            if start in done:
+                self.done_bytes += min(self.part_bytes, size - start)
+            else:
+                pending.put((start, min(start + self.part_bytes, size) - 1))
+
+        threads = [threading.Thread(target=self.fetch_ranges, args=(pending, temp, journal), daemon=True)
+                   for _ in range(min(self.connections, pending.qsize()))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self.error:
+            raise self.error
+        if self.cancelled():
+            return None  # .ranged and its journal stay for the next attempt
+        os.replace(temp, self.path)
+        os.remove(journal)
+        return {'bytes': size, 'seconds': time.time() - started, 'retries': self.retries}
+
+    def fail(self, error):
+        with self.lock:
+            if self.error is None:
+                self.error = error
+
+    def fetch_ranges(self, pending, temp, journal):
+        """Worker thread: take ranges off pending until none are left"""
+        connection = parts = None
+        with open(temp, 'r+b') as f:
+            while self.error is None and not self.cancelled():
+                try:
+                    start, end = pending.get_nowait()
+                except queue.Empty:
+                    break
+                for attempt in range(RANGED_RETRIES + 1):
+                    try:
+                        if connection is None:
+                            connection, parts = self.connect()
+                        self.fetch(connection, parts, f, start, end)
+                        break
+                    except (OSError, RuntimeError, http.client.HTTPException) as e:
+                        if connection:
+                            connection.close()
+                        connection = None
+                        if self.error or self.cancelled():
+                            return
+                        if attempt == RANGED_RETRIES:
+                            self.fail(RuntimeError(f"bytes {start}-{end} failed {attempt + 1} times: {e}"))
+                            return
+                        with self.lock:
+                            self.retries += 1
+                        time.sleep(RANGED_RETRY_SECONDS * 2 ** attempt)
+                if self.cancelled():
+                    break
+                with self.lock:
+                    with open(journal, 'a', encoding='utf-8') as j:
+                        j.write(f'{start}\n')
+        if connection:
+            connection.close()
+
+    def fetch(self, connection, parts, f, start, end):
+        """Write bytes start-end into f
+
+        A cancel leaves the range short (and unjournaled); on an error the
+        bytes written so far are taken off done_bytes again.
+        """
+        while self.paused() and not self.cancelled():
+            time.sleep(0.2)
+        response = self.request(connection, parts, start, end)
+        if response.status != 206 or not (response.getheader('Content-Range') or '').startswith(f'bytes {start}-'):
+            response.read()
+            error = RuntimeError(f"HTTP {response.status} {response.reason} for bytes {start}-{end}")
+            if response.status in RANGED_FATAL_STATUS:
+                self.fail(error)
+            raise error
+
+        f.seek(start)
+        written = 0
+        remaining = end - start + 1
+        try:
+            while remaining > 0 and not self.cancelled():
+                while self.paused() and not self.cancelled():
+                    time.sleep(0.2)  # A connection dropped meanwhile is retried
+                chunk = response.read(min(RANGED_READ_BYTES, remaining))
+                if not chunk:
+                    raise OSError(f"connection closed {remaining} bytes short")
+                f.write(chunk)
+                written += len(chunk)
+                remaining -= len(chunk)
+                with self.lock:
+                    self.done_bytes += len(chunk)
+                    report = self.progress and time.time() - self.last_progress >= 1
+                    if report:
+                        self.last_progress = time.time()
+                if report:
+                    self.progress(self.done_bytes, self.size)
+        except Exception:
+            with self.lock:
+                self.done_bytes -= written
+            raise
+
+class MetadataPrefetcher:
+    """Extract metadata for upcoming items while the current one downloads
+
+    Runs `yt-dlp -J` (with the batch's format selection) for the next few
+    single-video items and keeps the info JSON on disk, so the download
+    stage can start from it with --load-info-json instead of extracting
+    again. Playlists and channels are left alone: their entries would be
+    extracted one by one inside yt-dlp anyway.
+
+    Results expire after PREFETCH_TTL_SECONDS. Signed media URLs are tied to
+    the IP that requested them, so each result remembers its egress route
+    and is only used by a worker on that same route.
+    """
+
+    def __init__(self, engine, depth):
+        self.engine = engine
+        self.depth = depth
+        self.executor = ThreadPoolExecutor(max_workers=depth)
+        self.entries = {}  # url -> (route spec, Future of (info path, extracted at))
+        self.processes = set()
+        self.lock = threading.Lock()
+        self.closed = False
+        os.makedirs(PREFETCH_DIR, exist_ok=True)
+
+    def schedule(self, upcoming):
+        """Start extracting any of the upcoming items not yet in flight"""
+        for item, url, output_dir in upcoming:
+            if not is_single_video(url):
+                continue
+            with self.lock:
+                if self.closed or url in self.entries:
+                    continue
+                route = self.engine.egress_pool.peek() if self.engine.egress_pool else None
+                self.entries[url] = (route.spec if route else None,
+                                     self.executor.submit(self._extract, item, url, output_dir, route))
+
+    def route_for(self, url):
+        """Spec of the route an item was (or is being) extracted through"""
+        with self.lock:
+            entry = self.entries.get(url)
+        return entry[0] if entry else None
+
+    def take(self, url, route):
+        """(info JSON path or None, age in seconds or None) for url
+
+        Only a fresh result extracted through the same route is returned.
+        """
+        with self.lock:
+            entry = self.entries.pop(url, None)
+        if entry is None:
+            return None, None
+        route_spec, future = entry
+        result = future.result()  # It started ahead of us, so waiting is cheap
+        if not result:
+            return None, None
+
+        path, extracted_at = result
+        age = time.time() - extracted_at
+        if age > PREFETCH_TTL_SECONDS or route_spec != (route.spec if route else None):
+            self.discard(path)
+            return None, age
+        return path, age
+
+    def _extract(self, item, url, output_dir, route):
+        if self.closed:
+            return None
+        cmd = self.engine.build_command(url, output_dir, route, extract_only=True)
+        process = None
+        try:
+            process = spawn(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                universal_newlines=True
+            )
+            with self.lock:
+                self.processes.add(process)
+            try:
+                output, _ = process.communicate(timeout=PREFETCH_TIMEOUT)
+            finally:
+                with self.lock:
+                    self.processes.discard(process)
+            if process.returncode != 0 or not output.strip():
+                return None
+
+            key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+            path = os.path.join(PREFETCH_DIR, f'{key}.info.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.engine.log(f"🔎 Prefetched metadata for item {item}", item)
+            return path, time.time()
+        except Exception:
+            if process:
+                kill_tree(process, grace=0)
+            return None
+
+    def discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def close(self):
+        """Cancel outstanding extractions and delete unused results"""
+        with self.lock:
+            self.closed = True
+            processes = list(self.processes)
+            futures = [future for _, future in self.entries.values()]
+            self.entries.clear()
+        for process in processes:
+            kill_tree(process, grace=0)
+        self.executor.shutdown(wait=True)
+        for future in futures:
+            if not future.cancelled() and future.result():
+                self.discard(future.result()[0])
+
+def summarize_preview(info):
+    """Preview dict of a (flat) yt-dlp info dict
+
+    sizes maps each quality preset to the estimated bytes of the format it
+    would pick; playlists and channels only get a video count and the
+    duration of the videos the flat listing gives one for.
+    """
+    entries = info.get('entries')
+    sizes = {}
+    if entries is None:
+        for quality, max_height in list(QUALITY_MAX_HEIGHTS.items()) + [("Best Available", None)]:
+            picked = pick_budget_format(info, max_height)
+            if picked:
+                sizes[quality] = picked[1]
+        videos = 1
+        durations = [info.get('duration')]
+    else:
+        videos = info.get('playlist_count') or len(entries)
+        durations = [entry.get('duration') for entry in entries if isinstance(entry, dict)]
+    durations = [d for d in durations if d]
+    return {
+        'title': info.get('title') or '',
+        'channel': info.get('channel') or info.get('uploader') or '',
+        'videos': videos,
+        'sizes': sizes,
+        'duration': sum(durations),  # Seconds of the timed videos
+        'timed': len(durations),
+    }
+
+class PreviewCache:
+    """Size-bounded LRU of queue previews, in memory and on disk
+
+    The memory tier is an OrderedDict of the PREVIEW_MEMORY_ENTRIES most
+    recently used previews; the disk tier (~/.the-batcher/previews.db)
+    survives restarts and drops its least recently used rows beyond
+    PREVIEW_DISK_ENTRIES. Failures are only remembered in memory, so the
+    next session tries again.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS previews (
+            url TEXT PRIMARY KEY,
+            preview TEXT NOT NULL,  -- JSON from summarize_preview()
+            resolved_at REAL NOT NULL,
+            used_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS previews_used ON previews (used_at);
+    """
+    TRIM_EVERY = 500  # Writes between disk trims
+
+    def __init__(self, path=PREVIEW_CACHE_PATH, memory_entries=PREVIEW_MEMORY_ENTRIES,
+                 disk_entries=PREVIEW_DISK_ENTRIES):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.executescript(self.SCHEMA)
+        self.memory = OrderedDict()
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.writes = 0
+
+    def _remember(self, url, preview):
+        self.memory[url] = preview
+        self.memory.move_to_end(url)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def peek(self, url):
+        """Preview from memory only (cheap enough for every table refresh)"""
+        with self.lock:
+            preview = self.memory.get(url)
+            if preview is not None:
+                self.memory.move_to_end(url)
+            return preview
+
+    def get(self, url, touch=True):
+        """Preview from memory or disk, or None when it must be resolved
+
+        touch=False reads without counting as a use (for whole-queue scans).
+        """
+        if touch:
+            preview = self.peek(url)
+        else:
+            with self.lock:
+                preview = self.memory.get(url)
+        if preview is not None:
+            return preview
+        with self.lock:
+            row = self.db.execute('SELECT preview, resolved_at FROM previews WHERE url = ?',
+                                  (url,)).fetchone()
+            if not row or time.time() - row[1] > PREVIEW_MAX_AGE_DAYS * 86400:
+                return None
+            preview = json.loads(row[0])
+            if touch:
+                with self.db:
+                    self.db.execute('UPDATE previews SET used_at = ? WHERE url = ?', (time.time(), url))
+                self._remember(url, preview)
+            return preview
+
+    def put(self, url, preview):
+        now = time.time()
+        with self.lock:
+            self._remember(url, preview)
+            if preview.get('error'):
+                return
+            with self.db:
+                self.db.execute('INSERT OR REPLACE INTO previews VALUES (?, ?, ?, ?)',
+                                (url, json.dumps(preview), now, now))
+            self.writes += 1
+            if self.writes % self.TRIM_EVERY == 0:
+                self._trim()
+
+    def _trim(self):
+        with self.db:
+            self.db.execute(
+                'DELETE FROM previews WHERE url IN (SELECT url FROM previews ORDER BY used_at DESC '
+                'LIMIT -1 OFFSET ?)', (self.disk_entries,))
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+class PreviewResolver(QObject):
+    """Resolves queue previews on a small pool of worker threads
+
+    want() replaces the URLs on screen, which are always resolved first;
+    URLs that scrolled out of view before a worker reached them are
+    dropped, so a fast scroll through a huge queue never builds a backlog.
+    pin() queues URLs the planner needs behind them. resolved(url) fires on
+    the GUI thread once the preview is in the cache.
+    """
+    resolved = pyqtSignal(str)
+
+    def __init__(self, cache, workers=PREVIEW_WORKERS, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.cookie_pool = None  # Set from the GUI's cookie profiles
+        self.wanted = []  # Rows on screen
+        self.pinned = deque()  # Planner requests
+        self.in_flight = set()
+        self.processes = set()
+        self.closed = False
+        self.lock = threading.Condition()
+        for n in range(workers):
+            threading.Thread(target=self._work, name=f'preview-{n + 1}', daemon=True).start()
+
+    def want(self, urls):
+        """Resolve these URLs first (and stop caring about earlier visible rows)"""
+        with self.lock:
+            self.wanted = list(urls)
+            self.lock.notify_all()
+
+    def pin(self, urls):
+        """Resolve these URLs whenever no visible row is waiting"""
+        with self.lock:
+            self.pinned.extend(urls)
+            self.lock.notify_all()
+
+    def _next(self):
+        with self.lock:
+            while not self.closed:
+                while self.wanted:
+                    url = self.wanted.pop(0)
+                    if url not in self.in_flight:
+                        self.in_flight.add(url)
+                        return url
+                while self.pinned:
+                    url = self.pinned.popleft()
+                    if url not in self.in_flight and self.cache.peek(url) is None:
+                        self.in_flight.add(url)
+                        return url
+                self.lock.wait()
+            return None
+
+    def _work(self):
+        while True:
+            url = self._next()
+            if url is None:
+                return
+            self._resolve(url)
+
+    def _resolve(self, url):
+        try:
+            command = ytdlp_base_command(cookie_profile(self.cookie_pool)) + ['--flat-playlist', '-J', url]
+            process = spawn(command,
+                            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+            with self.lock:
+                self.processes.add(process)
+            try:
+                output, errors = process.communicate(timeout=PREVIEW_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                kill_tree(process, grace=0)
+                output, errors = '', 'timed out'
+            finally:
+                with self.lock:
+                    self.processes.discard(process)
+            if self.closed:
+                return
+            try:
+                preview = summarize_preview(json.loads(output))
+            except ValueError:
+                lines = (errors or '').strip().splitlines()
+                preview = {'error': lines[-1] if lines else f'yt-dlp exited with {process.returncode}'}
+            self.cache.put(url, preview)
+            self.resolved.emit(url)
+        except Exception as e:
+            self.cache.put(url, {'error': str(e)})
+            self.resolved.emit(url)
+        finally:
+            with self.lock:
+                self.in_flight.discard(url)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.lock.notify_all()
+            processes = list(self.processes)
+        for process in processes:
+            kill_tree(process, grace=0)
+
+class BatchPlanner:
+    """Predicts the bytes and finish time of what is left of a batch
+
+    Item sizes come from the queue previews: the picked format's size for
+    single videos, otherwise the videos' durations (or count) priced with
+    the bytes per media second (or per file) of earlier downloads from the
+    same site. Time divides each item's bytes by the transfer speed seen
+    from that site onto that output volume, spread over the workers; once
+    a run has been going PLAN_MIN_LIVE_SECONDS, its own speed is used.
+    """
+
+    def __init__(self, cache, catalog, quality, workers):
+        self.cache = cache
+        self.catalog = catalog
+        self.quality = quality
+        self.workers = max(1, workers)
+        self.rates = {}  # (host, volume) -> Catalog.rates()
+
+    def item_rates(self, url, output_dir):
+        place = (url_host(url), volume_of(output_dir))
+        if place not in self.rates:
+            self.rates[place] = self.catalog.rates(*place, self.quality)
+        return self.rates[place]
+
+    def estimate(self, preview, rates):
+        """Bytes of one item, or None when neither preview nor history tells"""
+        size = preview['sizes'].get(self.quality)
+        if size:
+            return size
+        if not rates:
+            return None
+        if preview.get('timed') and rates['bytes_per_media_second']:
+            # Untimed videos are taken to be as long as the timed ones
+            return preview['duration'] * preview['videos'] / preview['timed'] * rates['bytes_per_media_second']
+        if rates['bytes_per_file']:
+            return preview['videos'] * rates['bytes_per_file']
+        return None
+
+    def plan(self, items, live_rate=None):
+        """Plan for (url, output_dir) items; returns a dict, see BatchPlanner"""
+        plan = {'items': 0, 'sized': 0, 'bytes': 0, 'seconds': 0.0, 'timed_bytes': 0, 'missing': []}
+        for url, output_dir in items:
+            plan['items'] += 1
+            preview = self.cache.get(url, touch=False)
+            if preview is None:
+                plan['missing'].append(url)
+                continue
+            if preview.get('error'):
+                continue
+            rates = self.item_rates(url, output_dir)
+            size = self.estimate(preview, rates)
+            if size is None:
+                continue
+            plan['sized'] += 1
+            plan['bytes'] += size
+            if rates:
+                plan['seconds'] += size / rates['bytes_per_second']
+                plan['timed_bytes'] += size
+
+        # Unsized items are taken to be like the sized ones
+        if plan['sized'] < plan['items'] and plan['sized']:
+            plan['bytes'] = plan['bytes'] * plan['items'] / plan['sized']
+        if live_rate:
+            plan['seconds'] = plan['bytes'] / live_rate
+        elif plan['timed_bytes']:
+            plan['seconds'] = (plan['seconds'] * plan['bytes'] / plan['timed_bytes']
+                               / min(self.workers, plan['items']))
+        else:
+            plan['seconds'] = None
+        return plan
+
+class PlanThread(QThread):
+    """Runs a BatchPlanner over the queue off the GUI thread"""
+    plan_signal = pyqtSignal(object)
+
+    def __init__(self, queue, cache, quality, workers, live_rate=None):
+        super().__init__()
+        self.queue = queue
+        self.cache = cache
+        self.quality = quality
+        self.workers = workers
+        self.live_rate = live_rate
+
+    def run(self):
+        catalog = Catalog()
+        try:
+            planner = BatchPlanner(self.cache, catalog, self.quality, self.workers)
+            self.plan_signal.emit(planner.plan(self.queue.remaining(), self.live_rate))
+        except Exception as e:
+            self.plan_signal.emit({'error': str(e)})
+        finally:
+            catalog.close()
+
 class BatchDownloadThread(QThread):
     """Thread to handle batch video downloads"""
     log_signal = pyqtSignal(str)
     progress_signal = pyqtSignal(int, int)  # current item, total items
     item_progress_signal = pyqtSignal(str)  # current download status
+    probe_signal = pyqtSignal(str, float)  # signal name, perf_counter() at emit (profiling)
     finished_signal = pyqtSignal(bool, str)
 
-    def __init__(self, batch_items, quality, use_archive):
-        super().__init__()
-        self.batch_items = batch_items  # List of (url, output_dir) tuples
-        self.quality = quality
-        self.use_archive = use_archive
-        self.process = None
-        self.stopped = False
-        self.paused = False
-        self.current_item = 0
+    def __init__(self, batch_items, quality, use_archive, run_log=None,
+                 workers=1, egress_pool=None, prefetch_depth=0, item_queue=None,
+                 schedule=None, recover_partials=False, partial_budget=0,
+                 speech_format="FLAC", shard_bytes=0, detect_speech=False, profiler=None,
+                 budget=None, scratch_dir='', scratch_cap=0, verify=False,
+                 sidecars=SIDECAR_MODES[0], cookie_pool=None, ranged_connections=1):
+        super().__init__()
+        self.batch_items = batch_items  # List of (url, output_dir) tuples, without item_queue
+        self.quality = quality
+        self.use_archive = use_archive
+        self.run_log = run_log  # Optional RunLogWriter
+        self.workers = max(1, workers)
+        self.egress_pool = egress_pool  # Optional EgressPool
+        self.cookie_pool = cookie_pool  # Optional CookiePool (default: the firefox profile)
+        self.ytdlp_cache = YtdlpCache()
+        self.worker_state = threading.local()  # A worker's cookie profile and its account errors
+        self.prefetch_depth = prefetch_depth  # Items to extract ahead (0 = off)
+        self.item_queue = item_queue  # Defaults to a BatchItemQueue over batch_items
+        self.schedule = schedule  # Optional BandwidthSchedule
+        self.window = None  # Active schedule window (None = outside all windows)
+        self.window_applied = False
+        self.allowed_workers = self.workers
+        self.active = 0  # Items being worked on
+        self.bandwidth = None  # TokenBucket while a schedule is set
+        self.throttle_proxies = {}  # route spec -> ThrottleProxy
+        self.recover_partials = recover_partials
+        self.partial_budget = partial_budget  # Bytes; 0 = no limit
+        self.speech_format = speech_format  # FLAC or WAV in speech mode
+        self.shard_bytes = shard_bytes  # 0 = loose files, no tar shards
+        self.shard_writers = {}  # output dir -> ShardWriter
+        self.detect_speech = detect_speech  # VAD stage
+        self.catalog = None
+        self.pipeline = FilePipeline(self)
+        self.harvesters = {}  # item -> Harvester, in harvest mode
+        self.profiler = profiler  # RunProfiler when profiling this run
+        self.budget = budget  # FormatBudget, or None for the plain quality presets
+        self.scratch_dir = scratch_dir  # Fast local disk for in-progress downloads ('' = off)
+        self.scratch_cap = scratch_cap  # Bytes in scratch before new downloads wait; 0 = no cap
+        self.journal_lock = threading.Lock()
+        self.verify = verify  # ffprobe stage for finished files
+        self.verify_retries = {}  # archive entry -> re-downloads after failed verification
+        self.verify_requeued = 0  # Items added by verification, not yet picked up
+        self.sidecars = sidecars  # One of SIDECAR_MODES, for loose files
+        self.info_packs = {}  # output dir -> InfoPack
+        self.ranged_connections = ranged_connections  # Per single-file download; 1 = leave it to yt-dlp
+        self.projected_bytes = 0  # Budget report: yt-dlp's size estimate of finished files
+        self.actual_bytes = 0
+        self.downloaded_bytes = 0  # Finished files of this run, for the live plan
+        self.run_started = None
+        self.prefetcher = None
+        self.processes = {}  # item number -> running yt-dlp process
+        self.ranged_items = set()  # Item numbers in a RangedDownloader transfer
+        self.route_retries = {}  # item number -> times moved off a throttled route
+        self.pause_retries = {}  # item number -> extra tries after failing once paused
+        self.queue_error = None  # Why a worker lost a remote item queue
+        self.lock = threading.Lock()
+        self.stopped = False
+        self.paused = False  # Whole batch: no new items, running ones suspended
+        self.suspended = {}  # item number -> when its processes were suspended
+        self.paused_seconds = {}  # item number -> time suspended during this attempt
+        self.current_item = 0
+        self.started = 0
+        self.successful = 0
+        self.failed = 0
+
+    def log(self, message, item=None):
+        """Send a line to the run log (if any) and to log_signal"""
+        if item is not None and self.workers > 1:
+            # Tag lines so interleaved items stay readable
+            text = message.lstrip('\n')
+            message = f"{message[:len(message) - len(text)]}[{item}] {text}"
+        if self.run_log:
+            self.run_log.write(message, item)
+        self.log_signal.emit(message)
+        if self.profiler:
+            self.probe_signal.emit('log_signal', time.perf_counter())
+
+    def profiled(self, name, snapshot=False):
+        """Profile the calling thread for the duration (no-op unless profiling)"""
+        if self.profiler:
+            return self.profiler.thread(name, snapshot)
+        return contextlib.nullcontext()
+
+    def base_command(self, route=None):
+        """yt-dlp with cookies, network route and extractor options
+
+        Cookies come from the calling worker's profile; other threads
+        (look-ahead, durations) use whichever profile the pool would hand out.
+        """
+        profile = getattr(self.worker_state, 'profile', None)
+        if profile is None and self.cookie_pool:
+            profile = self.cookie_pool.peek()
+
+        # Network route (through the local throttling proxy when scheduled)
+        network = None
+        if self.bandwidth is not None:
+            network = ['-4', '--proxy', self.throttle_proxy(route).url]
+        elif route:
+            network = route.ytdlp_args()
+        return ytdlp_base_command(profile, network, self.ytdlp_cache.path)
+
+    def build_command(self, url, output_dir, route=None, info_json=None, extract_only=False,
+                      feed=None, format_id=None, sort=None):
+        """yt-dlp command for one item
+
+        info_json starts the download from prefetched metadata instead of the
+        URL; extract_only builds the metadata extraction (-J) command; feed
+        is a file yt-dlp appends "<estimated size>\t<duration>\t<path>" of
+        every finished file to. format_id (picked for a budget) replaces the quality preset,
+        sort (-S) ranks the formats the preset allows.
+        """
+        cmd = self.base_command(route)
+
+        # Quality settings
+        if format_id:
+            cmd.extend(['-f', format_id])
+        elif self.quality == "Best (≤1080p)":
+            cmd.extend(['-f', 'best[height<=1080]'])
+        elif self.quality == "Best (≤720p)":
+            cmd.extend(['-f', 'best[height<=720]'])
+        elif self.quality == "Best (≤480p)":
+            cmd.extend(['-f', 'best[height<=480]'])
+        elif self.quality == "Best Available":
+            cmd.extend(['-f', 'best'])
+        elif self.quality == SPEECH_QUALITY:
+            cmd.extend(['-f', 'wa/w'])  # Cheapest audio-only stream
+        if sort:
+            cmd.extend(['-S', sort])
+
+        if extract_only:
+            if output_dir:  # So _filename is where the download will write the file
+                cmd.extend(['-o', os.path.join(self.work_dir(output_dir), '%(title)s.%(ext)s')])
+            cmd.extend(['-J', '--no-playlist', url])
+            return cmd
+
+        # Download archive
+        if self.use_archive:
+            archive_file = os.path.join(output_dir, 'download_archive.txt')
+            cmd.extend(['--download-archive', archive_file])
+
+        # Additional settings
+        cmd.extend([
+            '--sleep-interval', '3',
+            '--max-sleep-interval', '10',
+            '--ignore-errors',
+            '--no-abort-on-error',
+            '--write-info-json',
+            '--concurrent-fragments', '8',
+            '-o', os.path.join(self.work_dir(output_dir), '%(title)s.%(ext)s'),
+        ])
+        if feed:
+            cmd.extend(['--print-to-file',
+                        'after_move:%(filesize,filesize_approx|)s\t%(duration|)s\t%(filepath)s', feed])
+        if info_json:
+            cmd.extend(['--load-info-json', info_json])
+        else:
+            cmd.append(url)
+        return cmd
+
+    def run(self):
+        with self.profiled('batch-thread', snapshot=True):
+            self.run_batch()
+
+    def run_batch(self):
+        try:
+            if self.item_queue is None:
+                self.item_queue = BatchItemQueue(self.batch_items)
+            total_items = len(self.item_queue)
+            self.started = self.item_queue.completed  # Done in an earlier run
+            self.run_started = time.time()
+            self.catalog = Catalog()  # Throughput history (and speech segments)
+
+            if self.recover_partials:
+                self.recover_partial_downloads()
+
+            if self.egress_pool:
+                self.log(f"🌐 Checking {len(self.egress_pool)} egress route(s)...")
+                self.egress_pool.start()
+                for route in self.egress_pool.routes:
+                    self.log(f"   {'✅' if route.healthy else '❌'} {route}")
+
+            if self.cookie_pool:
+                self.log(f"🍪 Checking {len(self.cookie_pool)} cookie profile(s)...")
+                self.cookie_pool.start()
+                for profile in self.cookie_pool.profiles:
+                    self.log(f"   {'✅' if profile.healthy else '❌'} {profile}")
+
+            worker_count = self.workers
+            if self.schedule:
+                self.bandwidth = TokenBucket()
+                self.apply_schedule()
+                threading.Thread(target=self.schedule_loop, daemon=True).start()
+                worker_count = max(worker_count, self.schedule.max_workers())
+
+            if self.prefetch_depth > 0 and self.quality != HARVEST_QUALITY:
+                self.prefetcher = MetadataPrefetcher(self, self.prefetch_depth)
+
+            self.build_pipeline()
+            self.warm_cache()
+
+            self.run_workers(max(1, min(worker_count, total_items)))
+
+            # Files that failed verification after the queue ran dry go round again
+            while self.verify and not self.stopped:
+                if self.pipeline.pending:
+                    self.log(f"⏳ Verifying {self.pipeline.pending} file(s)...")
+                self.pipeline.wait_idle()
+                with self.lock:
+                    requeued, self.verify_requeued = self.verify_requeued, 0
+                if not requeued:
+                    break
+                self.run_workers(max(1, min(worker_count, requeued)))
+
+            if self.prefetcher:
+                self.prefetcher.close()
+            if self.pipeline:
+                if self.pipeline.pending:
+                    self.log(f"⏳ Waiting for {self.pipeline.pending} file(s) still being processed...")
+                self.pipeline.drain()
+            for writer in self.shard_writers.values():
+                writer.close()
+            if self.catalog:
+                self.catalog.close()
+            for proxy in self.throttle_proxies.values():
+                proxy.close()
+            if self.egress_pool:
+                self.egress_pool.close()
+            if self.cookie_pool:
+                self.cookie_pool.close()
+                for spec, items, errors, account_errors in self.cookie_pool.summary():
+                    self.log(f"🍪 {spec}: {items} item(s), {errors} failed "
+                             f"({account_errors} account error(s))")
+
+            cache = self.ytdlp_cache
+            if cache.hits or cache.misses:
+                self.log(f"🔥 yt-dlp cache: {cache.hits} item(s) found every player solution cached, "
+                         f"{cache.misses} had to solve new ones ({cache.written} entr(y/ies) written)")
+
+            if self.budget and self.actual_bytes:
+                self.log(f"📊 Budget total: projected {format_bytes(self.projected_bytes)}, "
+                         f"actual {format_bytes(self.actual_bytes)}")
+
+            # Final summary
+            total_items = len(self.item_queue)  # Verification may have added items
+            successful, failed = self.successful, self.failed
+            if self.stopped:
+                self.finished_signal.emit(False, f"Batch stopped: {successful} successful, {failed} failed, {total_items - successful - failed} not processed")
+            elif self.queue_error:
+                self.finished_signal.emit(False, f"Batch cut short: lost the batch queue ({self.queue_error}) after {successful} successful, {failed} failed")
+            else:
+                self.finished_signal.emit(True, f"Batch complete: {successful} successful, {failed} failed out of {total_items} items")
+
+        except Exception as e:
+            self.log(f"❌ Error: {str(e)}")
+            self.finished_signal.emit(False, str(e))
+
+    def run_workers(self, count):
+        """Run count download workers until the queue is empty"""
+        workers = [threading.Thread(target=self.worker_loop, name=f'worker-{n + 1}', daemon=True)
+                   for n in range(count)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def build_pipeline(self):
+        """Set up the post-download stages this batch needs"""
+        if self.detect_speech and np is None:
+            self.log("⚠️ Speech segments need NumPy (pip install numpy) - skipping them")
+            self.detect_speech = False
+        if (self.quality == SPEECH_QUALITY or self.detect_speech) and not shutil.which('ffmpeg'):
+            raise RuntimeError("Speech audio and speech segments need ffmpeg on PATH")
+        if self.verify and not (shutil.which('ffprobe') and shutil.which('ffmpeg')):
+            raise RuntimeError("Verifying downloads needs ffprobe and ffmpeg on PATH")
+        if self.verify and self.quality != HARVEST_QUALITY:
+            # First, so conversions and moves only see files that passed
+            self.pipeline.add_stage("Verification", self.verify_file, VERIFY_WORKERS)
+        if self.quality == SPEECH_QUALITY:
+            self.pipeline.add_stage(
+                "Speech conversion",
+                lambda job: convert_speech_audio(self.pipeline, job, self.speech_format),
+                CONVERT_WORKERS
+            )
+        if self.detect_speech:
+            self.pipeline.add_stage("Speech segmentation", self.segment_speech, CONVERT_WORKERS)
+        if self.shard_bytes:
+            if self.sidecars != SIDECAR_MODES[0] and self.quality != HARVEST_QUALITY:
+                self.log(f"⚠️ Sidecars \"{self.sidecars}\" not applied: shard samples carry trimmed metadata")
+            # One writer thread: shards are appended to sequentially anyway
+            self.pipeline.add_stage("Shard writer", self.write_shard_sample, 1)
+        else:
+            if self.sidecars != SIDECAR_MODES[0] and self.quality != HARVEST_QUALITY:
+                # Before the mover, so a trimmed .info.json.gz travels with its file
+                self.pipeline.add_stage("Sidecars", self.compact_sidecar, SIDECAR_WORKERS)
+            if self.scratch_dir:
+                # Shards are written straight to the output folder; loose files move there
+                self.pipeline.add_stage("Mover", self.move_to_output, MOVE_WORKERS)
+        if self.scratch_dir:
+            self.resume_moves()  # Also trims the journal, which every stage appends to
+
+    def verify_file(self, job):
+        """Pass a whole file on; quarantine a broken one and download it again"""
+        info_path = info_json_path(job.path)
+        info = load_info(job.path)
+        problem = verify_media(self.pipeline, job.path, info.get('duration'))
+        if problem is None:
+            return job.path
+
+        quarantine = os.path.join(job.output_dir, QUARANTINE_DIR_NAME)
+        os.makedirs(quarantine, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        for path in (job.path, info_path):
+            if os.path.exists(path):
+                move_file(path, os.path.join(quarantine, f'{stamp}-{os.path.basename(path)}'))
+        self.log(f"🚫 {os.path.basename(job.path)} failed verification ({problem}), "
+                 f"moved to {QUARANTINE_DIR_NAME}/", job.item)
+
+        # Drop it from the archive so yt-dlp fetches it again
+        entry = f"{info.get('extractor_key', '').lower()} {info.get('id', '')}"
+        url = info.get('webpage_url')
+        if not info.get('id') or not url:
+            self.log("⚠️ No video ID in its info JSON, not downloading it again", job.item)
+            return None
+        if self.use_archive:
+            with self.lock:
+                remove_archive_entry(job.output_dir, entry)
+        with self.lock:
+            retries = self.verify_retries.get(entry, 0)
+            self.verify_retries[entry] = retries + 1
+        if retries >= VERIFY_MAX_RETRIES or self.stopped:
+            self.log(f"⚠️ Giving up on {url} after {retries} re-download(s)", job.item)
+        elif self.item_queue.add_retry(url, job.output_dir):
+            with self.lock:
+                self.verify_requeued += 1
+            self.log(f"🔁 Queued {url} to download again", job.item)
+        else:
+            self.log(f"🔁 {url} downloads again with the next run", job.item)
+        return None
+
+    def compact_sidecar(self, job):
+        """Trim a finished file's .info.json into a .info.json.gz or its folder's pack"""
+        info_path = info_json_path(job.path)
+        if not os.path.exists(info_path):
+            return job.path
+        pack = None
+        if self.sidecars == SIDECAR_MODES[2]:
+            with self.lock:
+                # The pack lives in the output folder, also while files wait in scratch
+                pack = self.info_packs.get(job.output_dir)
+                if pack is None:
+                    os.makedirs(job.output_dir, exist_ok=True)
+                    pack = self.info_packs[job.output_dir] = InfoPack(job.output_dir)
+        compact_info_json(info_path, self.sidecars, os.path.basename(job.path), pack)
+        return job.path
+
+    def warm_cache(self):
+        """Solve the current YouTube player's challenges once, before the workers start
+
+        Otherwise every worker's first yt-dlp fetches and solves the same
+        player at the same time. Uses the first pending YouTube item.
+        """
+        removed = self.ytdlp_cache.prune()
+        if removed:
+            self.log(f"🔥 Dropped {removed} yt-dlp cache entr(y/ies) older than {YTDLP_CACHE_MAX_AGE_DAYS} days")
+        url = next((url for _, url, _ in self.item_queue.peek(self.workers * 4)
+                    if url_host(url) == 'youtube.com'), None)
+        if url is None or self.quality == HARVEST_QUALITY:
+            return
+
+        self.log("🔥 Warming the yt-dlp cache...")
+        started = time.time()
+        process = spawn(
+            self.base_command() + ['--simulate', '--no-warnings', '--playlist-items', '1',
+                                   '--print', 'id', url],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        with self.lock:
+            self.processes[0] = process  # Item numbers start at 1; stop() ends it like a download
+        try:
+            process.wait(timeout=CACHE_WARM_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            kill_tree(process, grace=0)
+            self.log(f"⚠️ Cache warm-up took over {CACHE_WARM_TIMEOUT} s, skipped")
+            return
+        finally:
+            with self.lock:
+                self.processes.pop(0, None)
+        if self.stopped:
+            return
+        new = self.ytdlp_cache.update(count=False)
+        if new:
+            self.log(f"🔥 yt-dlp cache warmed in {time.time() - started:.1f} s ({new} new entr(y/ies))")
+        else:
+            self.log("🔥 yt-dlp cache already warm for the current player")
+
+    def work_dir(self, output_dir):
+        """Folder yt-dlp downloads an item's files into (its scratch folder, if set)"""
+        if not self.scratch_dir:
+            return output_dir
+        key = hashlib.sha1(os.path.abspath(output_dir).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.scratch_dir, key)
+
+    def journal_move(self, path, output_dir, stage="Mover", origin=None):
+        """Record that a file in scratch still has to go through stage (and the ones after it)
+
+        origin (the path yt-dlp finished the file under) ties the entries of
+        a file renamed by a stage together; the last entry per origin wins.
+        """
+        entry = {'path': path, 'output_dir': output_dir, 'stage': stage, 'origin': origin or path}
+        with self.journal_lock:
+            with open(os.path.join(self.scratch_dir, SCRATCH_JOURNAL), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def resume_moves(self):
+        """Hand files an earlier run left in scratch back to the stage they reached
+
+        Entries written before stages were journaled resume at the mover; so
+        does a stage this run doesn't have (e.g. Verify switched off since).
+        """
+        journal = os.path.join(self.scratch_dir, SCRATCH_JOURNAL)
+        if not os.path.exists(journal):
+            return
+        with open(journal, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        os.remove(journal)
+        latest = {}  # origin -> (line, entry)
+        for line, entry in enumerate(entries):
+            latest[entry.get('origin', entry['path'])] = (line, entry)
+        # The mover journals a renamed file under its new path too: one entry per path
+        by_path = {entry['path']: entry for _, entry in sorted(latest.values(), key=lambda pair: pair[0])}
+        left = [entry for entry in by_path.values() if os.path.exists(entry['path'])]
+        if not left:
+            return
+        names = [name for name, _, _ in self.pipeline.stages]
+        self.log(f"🚚 Resuming {len(left)} file(s) an earlier run left in scratch")
+        for entry in left:
+            stage = entry.get('stage', "Mover")
+            index = names.index(stage) if stage in names else len(names) - 1
+            if index < len(names) - 1:
+                self.log(f"   {os.path.basename(entry['path'])}: from {stage}")
+            self.journal_move(entry['path'], entry['output_dir'], names[index])
+            self.pipeline.submit(entry['path'], None, entry['output_dir'], stage=index)
+
+    def move_to_output(self, job):
+        """Move a finished file and its sidecars from scratch to the output folder
+
+        Every file gets MOVE_RETRIES attempts with a doubling delay; files
+        that still fail stay in scratch and are retried by the next run.
+        """
+        source_dir = os.path.dirname(job.path)
+        stem = os.path.basename(os.path.splitext(job.path)[0]) + '.'
+        sidecars = [os.path.join(source_dir, name) for name in os.listdir(source_dir)
+                    if name.startswith(stem) and os.path.join(source_dir, name) != job.path
+                    and not name.endswith(('.part', '.ytdl', '.moving', '.ranged', '.ranged.json'))
+                    and '.part-Frag' not in name]
+        os.makedirs(job.output_dir, exist_ok=True)
+        for path in sidecars + [job.path]:  # Media last: its arrival means the set is complete
+            self.journal_move(path, job.output_dir)
+            target = os.path.join(job.output_dir, os.path.basename(path))
+            for attempt in range(MOVE_RETRIES):
+                try:
+                    move_file(path, target)
+                    break
+                except OSError as e:
+                    if attempt == MOVE_RETRIES - 1:
+                        self.log(f"❌ Could not move {os.path.basename(path)} to {job.output_dir} "
+                                 f"({str(e)}); left in scratch for the next run", job.item)
+                        return None
+                    delay = MOVE_RETRY_SECONDS * 2 ** attempt
+                    self.log(f"⚠️ Moving {os.path.basename(path)} failed ({str(e)}), "
+                             f"retrying in {delay} s", job.item)
+                    deadline = time.time() + delay
+                    while time.time() < deadline and not self.stopped:
+                        time.sleep(0.5)
+                    if self.stopped:
+                        return None
+        self.log(f"🚚 Moved {os.path.basename(job.path)} to {job.output_dir}", job.item)
+        return None
+
+    def wait_for_scratch(self, item):
+        """Hold a new download while scratch is over its cap and the mover is at work"""
+        if not self.scratch_cap:
+            return
+        waited = False
+        while not self.stopped and self.pipeline.pending and directory_size(self.scratch_dir) >= self.scratch_cap:
+            if not waited:
+                self.log(f"⏸️ Scratch is over {format_bytes(self.scratch_cap)}, waiting for the mover", item)
+                waited = True
+            time.sleep(SCRATCH_CHECK_SECONDS)
+
+    def segment_speech(self, job):
+        """Voice activity index for a finished file, stored in the catalog"""
+        detector = VoiceActivityDetector()
+        block_bytes = VAD_SAMPLE_RATE * 2 * VAD_BLOCK_SECONDS
+        with self.pipeline.stream_tool(
+            ['ffmpeg', '-nostdin', '-v', 'error', '-i', job.path, '-vn', '-ac', '1',
+             '-ar', str(VAD_SAMPLE_RATE), '-f', 's16le', '-']
+        ) as process:
+            while True:
+                data = process.stdout.read(block_bytes)
+                if not data:
+                    break
+                detector.feed(data)
+            returncode = process.wait()
+        if self.stopped:
+            return None
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg could not decode the audio (exit code {returncode})")
+
+        starts, ends, duration = detector.finish()
+        job.segments = (starts, ends)
+        self.catalog.store_segments(job.path, duration, starts, ends)
+        self.log(f"🗣️ {os.path.basename(job.path)}: {len(starts)} speech segment(s), "
+                 f"{float((ends - starts).sum()):.0f}s of {duration:.0f}s", job.item)
+        return job.path
+
+    def write_shard_sample(self, job):
+        """Move a finished file and its trimmed info JSON into the folder's shard"""
+        writer = self.shard_writers.get(job.output_dir)
+        if writer is None:
+            writer = ShardWriter(job.output_dir, self.shard_bytes, self.log)
+            self.shard_writers[job.output_dir] = writer
+
+        info_path = info_json_path(job.path)
+        info = load_info(job.path)
+        ext = os.path.splitext(job.path)[1].lstrip('.').lower() or 'bin'
+        metadata = trim_info(info)
+        metadata['file_name'] = os.path.basename(job.path)
+        if job.segments is not None:
+            metadata['speech_segments'] = [[round(float(start), 2), round(float(end), 2)]
+                                           for start, end in zip(*job.segments)]
+        with open(job.path, 'rb') as media:
+            writer.add_sample(shard_key(job.path, info), {
+                ext: (media, os.fstat(media.fileno()).st_size),  # Streamed into the tar
+                'json': json.dumps(metadata, ensure_ascii=False).encode('utf-8'),  # Last: marks the sample complete
+            })
+
+        os.remove(job.path)
+        if os.path.exists(info_path):
+            os.remove(info_path)
+        return None
+
+    def recover_partial_downloads(self):
+        """Clean up and resume downloads left behind by Stop or a crash
+
+        Scans the batch's output (or scratch) folders. Stale and corrupt leftovers are
+        deleted. Resumable ones get their in-flight fragments dropped; if
+        they use more than the partial budget, the oldest are deleted too.
+        Items with something left to resume go to the front of the queue.
+        """
+        folders = {self.work_dir(output_dir): output_dir for output_dir in self.item_queue.output_dirs()}
+        directories = [directory for directory in folders if os.path.isdir(directory)]
+        partials = scan_partial_downloads(directories)
+        if not partials:
+            return
+
+        freed = 0
+        for partial in partials:
+            if partial.status != 'resumable':
+                self.log(f"🧹 Removing {partial.status} partial download ({partial.reason}): "
+                         f"{os.path.basename(partial.target)}")
+                freed += partial.remove()
+
+        resumable = sorted((p for p in partials if p.status == 'resumable'), key=lambda p: p.mtime())
+        total = sum(p.size() for p in resumable)
+        while self.partial_budget and resumable and total > self.partial_budget:
+            partial = resumable.pop(0)
+            size = partial.remove()
+            total -= size
+            freed += size
+            self.log(f"🧹 Over the partial download budget, removing oldest: "
+                     f"{os.path.basename(partial.target)}")
+
+        dropped = sum(partial.verify() for partial in resumable)
+        self.log(f"🧩 Partial downloads: {len(resumable)} to resume ({total / 1024 ** 2:.1f} MB kept, "
+                 f"{dropped} in-flight fragment(s) dropped), {freed / 1024 ** 2:.1f} MB freed")
+
+        if resumable:
+            resume_dirs = [os.path.abspath(folders[directory]) for directory in directories
+                           if any(os.path.abspath(p.target).startswith(os.path.abspath(directory) + os.sep)
+                                  for p in resumable)]
+            self.item_queue.prioritize(lambda item: os.path.abspath(item[2]) in resume_dirs)
+
+    def throttle_proxy(self, route):
+        """Local throttling proxy for a route (one per route, made on demand)"""
+        key = route.spec if route else None
+        with self.lock:
+            if key not in self.throttle_proxies:
+                self.throttle_proxies[key] = ThrottleProxy(self.bandwidth, route)
+            return self.throttle_proxies[key]
+
+    def apply_schedule(self):
+        """Switch bandwidth and worker limits to the window active now"""
+        window = self.schedule.window_at(datetime.now())
+        if self.window_applied and window is self.window:
+            return
+        self.window = window
+        self.window_applied = True
+        rate = window.rate if window else None
+        workers = window.workers if window else self.workers
+        self.bandwidth.set_rate(rate)
+        with self.lock:
+            self.allowed_workers = workers
+        label = window.text if window else "outside scheduled windows"
+        self.log(f"🕒 {label}: {BandwidthSchedule.format_rate(rate)}, {workers} worker(s)")
+
+    def schedule_loop(self):
+        while not self.stopped and self.isRunning():
+            time.sleep(SCHEDULE_CHECK_SECONDS)
+            self.apply_schedule()
+
+    def claim_slot(self):
+        """Reserve a worker slot if the active window allows another item"""
+        with self.lock:
+            if self.active < self.allowed_workers:
+                self.active += 1
+                return True
+            return False
+
+    def worker_loop(self):
+        """Take items off the queue until it is empty or the batch stops"""
+        with self.profiled(threading.current_thread().name, snapshot=True):
+            self.work()
+
+    def work(self):
+        while not self.stopped:
+            # Wait if paused or the schedule allows no more items right now
+            while not self.stopped and (self.paused or not self.claim_slot()):
+                self.msleep(100)
+
+            if self.stopped:
+                break
+
+            try:
+                if not self.process_next_item():
+                    break
+            except (OSError, xmlrpc.client.Error) as e:
+                # Only a LeasedItemQueue talks to another process
+                self.log(f"❌ Worker stopped: lost the batch queue ({str(e)})")
+                self.queue_error = str(e)
+                break
+            finally:
+                with self.lock:
+                    self.active -= 1
+
+    def process_next_item(self):
+        """Take and download one item; False when this worker should exit"""
+        total_items = len(self.item_queue)
+        entry = self.item_queue.next_item()
+        if entry is None:
+            return False
+        item, url, output_dir = entry
+
+        # Extract the next items while this one downloads
+        if self.prefetcher:
+            self.prefetcher.schedule(self.item_queue.peek(self.prefetch_depth))
+
+        route = None
+        if self.egress_pool:
+            prefer = self.prefetcher.route_for(url) if self.prefetcher else None
+            route = self.egress_pool.acquire(lambda: self.stopped, prefer=prefer)
+            if route is None:
+                self.item_queue.requeue(entry)
+                return False
+
+        profile = None
+        if self.cookie_pool:
+            # Stay on this worker's profile while it is usable
+            last = getattr(self.worker_state, 'last_profile', None)
+            profile = self.cookie_pool.acquire(lambda: self.stopped, prefer=last)
+            if profile is None:
+                if route:
+                    self.egress_pool.release(route)
+                self.item_queue.requeue(entry)
+                return False
+        self.worker_state.profile = self.worker_state.last_profile = profile
+        self.worker_state.account_error = False
+
+        info_json, prefetch_age = None, None
+        if self.prefetcher:
+            info_json, prefetch_age = self.prefetcher.take(url, route)
+
+        throttled = False
+        returncode = 1
+        try:
+            returncode, throttled = self.run_item(item, url, output_dir, route,
+                                                  info_json, prefetch_age)
+        finally:
+            if route:
+                self.egress_pool.release(route, clean=not throttled)
+            if profile:
+                self.release_profile(profile, item, returncode)
+            if info_json:
+                self.prefetcher.discard(info_json)
+        account_error = self.worker_state.account_error
+
+        with self.lock:
+            self.suspended.pop(item, None)
+            was_paused = self.paused_seconds.pop(item, None) is not None
+
+        if self.stopped:
+            self.log(f"\n⏹️  Batch stopped at item {item}/{total_items}", item)
+            self.item_queue.requeue(entry)
+            return False
+
+        # Connections or signed URLs can expire during a long pause; yt-dlp
+        # picks up the .part files again on a second go
+        if was_paused and returncode != 0 and self.pause_retries.get(item, 0) < PAUSE_MAX_RETRIES:
+            self.log(f"🔁 Item {item}/{total_items} failed after a pause, re-queueing it", item)
+            self.pause_retries[item] = self.pause_retries.get(item, 0) + 1
+            self.item_queue.requeue(entry)
+            return True
+
+        # A throttled route (or rested cookie profile) hands its item over to another one
+        if (throttled or account_error) and returncode != 0:
+            retries = self.route_retries.get(item, 0)
+            if retries < ROUTE_MAX_RETRIES and (throttled and self.egress_pool and len(self.egress_pool) > 1
+                                                or account_error and self.cookie_pool
+                                                and len(self.cookie_pool) > 1):
+                self.route_retries[item] = retries + 1
+                self.log(f"🔁 Re-queueing item {item}/{total_items} for another "
+                         f"{'route' if throttled else 'cookie profile'}", item)
+                self.item_queue.requeue(entry)
+                return True
+
+        with self.lock:
+            if returncode == 0:
+                self.successful += 1
+            else:
+                self.failed += 1
+        if returncode == 0:
+            self.log(f"\n✅ Item {item}/{total_items} completed successfully!", item)
+            self.item_queue.finish_item(entry, True, "completed")
+        else:
+            self.log(f"\n❌ Item {item}/{total_items} failed (exit code: {returncode})", item)
+            self.item_queue.finish_item(entry, False, f"exit code {returncode}")
+        return True
+
+    def run_item(self, item, url, output_dir, route=None, info_json=None, prefetch_age=None):
+        """Download one batch item; returns (exit code, route was throttled)"""
+        total_items = len(self.item_queue)
+        with self.lock:
+            if item not in self.route_retries and item not in self.pause_retries:
+                self.started += 1  # Not when it comes back for another try
+            self.current_item = item - 1
+            self.progress_signal.emit(self.started, total_items)
+            if self.profiler:
+                self.probe_signal.emit('progress_signal', time.perf_counter())
+
+        self.log(f"\n{'='*70}", item)
+        self.log(f"📥 Batch Item {item}/{total_items}", item)
+        self.log(f"URL: {url}", item)
+        self.log(f"Output: {output_dir}", item)
+        if route:
+            self.log(f"Route: {route}", item)
+        if self.cookie_pool:
+            self.log(f"Cookies: {self.worker_state.profile}", item)
+        self.log(f"{'='*70}\n", item)
 
-    def run(self):
+        if info_json:
+            self.log(f"⚡ Using metadata prefetched {int(prefetch_age)} s ago", item)
+        elif prefetch_age is not None:
+            self.log("⌛ Prefetched metadata is stale, extracting again", item)
+
+        # Create output directory
+        os.makedirs(output_dir, exist_ok=True)
+
+        if self.quality == HARVEST_QUALITY:
+            return self.harvest_item(item, url, output_dir, route)
+
+        if self.scratch_dir:
+            os.makedirs(self.work_dir(output_dir), exist_ok=True)
+            self.wait_for_scratch(item)
+
+        # Finished files are counted (and handed to the pipeline) as yt-dlp reports them
+        os.makedirs(FEED_DIR, exist_ok=True)
+        feed = os.path.join(FEED_DIR, f'{uuid.uuid4().hex}.txt')
+        feed_tail = FileTail(feed, skip_behind=False)
+
+        format_id, sort = self.budget_format(item, url, route, info_json) if self.budget else (None, None)
+        tally = [0, 0, 0, 0.0]  # Files, projected bytes, actual bytes, media seconds
+        started = time.time()
+
+        # A single-file format is fetched over several connections first;
+        # yt-dlp then finds it downloaded and only writes sidecars and archive
+        own_json = None
+        if self.ranged_connections > 1:
+            own_json = self.ranged_download(item, url, output_dir, route, info_json, format_id, sort)
+            if self.stopped:
+                if own_json:
+                    os.remove(own_json)
+                return 1, False
+        cmd = self.build_command(url, output_dir, route, own_json or info_json, feed=feed,
+                                 format_id=format_id, sort=sort)
+
+        self.item_progress_signal.emit(f"Downloading item {item}/{total_items}...")
+
+        # Run download process
+        process = spawn(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            bufsize=1
+        )
+        with self.lock:
+            self.processes[item] = process
+            if item in self.suspended:
+                suspend_tree(process)  # Paused before yt-dlp started
+
+        throttled = False
         try:
-            total_items = len(self.batch_items)
-            successful = 0
-            failed = 0
+            # Read output line by line; a stop ends the loop without waiting for output
+            for line in iter_lines(process, lambda: self.stopped):
+                self.collect_finished(feed_tail, item, output_dir, tally)
 
-            for idx, (url, output_dir) in enumerate(self.batch_items):
-                if self.stopped:
-                    break
+                line = line.strip()
+                if not line:
+                    continue
+                self.log(line, item)
 
-                # Wait if paused
-                while self.paused and not self.stopped:
-                    self.msleep(100)
+                if route and not throttled and THROTTLE_PATTERN.search(line):
+                    throttled = True
+                    cooldown = self.egress_pool.report_throttled(route)
+                    self.log(f"🚦 Route {route} throttled, cooling down for {cooldown // 60} min", item)
+                    # Hand the item to a healthy route instead of grinding on
+                    if len(self.egress_pool) > 1:
+                        kill_tree(process)
 
-                if self.stopped:
-                    break
+                if self.cookie_pool and not self.worker_state.account_error and ACCOUNT_ERROR_PATTERN.search(line):
+                    self.worker_state.account_error = True
+                    if self.report_account_error(item) and len(self.cookie_pool) > 1:
+                        kill_tree(process)
 
-                self.current_item = idx
-                self.progress_signal.emit(idx + 1, total_items)
-
-                self.log_signal.emit(f"\n{'='*70}")
-                self.log_signal.emit(f"📥 Batch Item {idx + 1}/{total_items}")
-                self.log_signal.emit(f"URL: {url}")
-                self.log_signal.emit(f"Output: {output_dir}")
-                self.log_signal.emit(f"{'='*70}\n")
-
-                # Create output directory
-                os.makedirs(output_dir, exist_ok=True)
-
-                # Build command
-                cmd = [
-                    'yt-dlp',
-                    '--cookies-from-browser', 'firefox',
-                    '-4',  # Force IPv4
-                    '--extractor-args', 'youtube:player_client=web_safari;player_js_version=actual',
-                ]
-
-                # Quality settings
-                if self.quality == "Best (≤1080p)":
-                    cmd.extend(['-f', 'best[height<=1080]'])
-                elif self.quality == "Best (≤720p)":
-                    cmd.extend(['-f', 'best[height<=720]'])
-                elif self.quality == "Best (≤480p)":
-                    cmd.extend(['-f', 'best[height<=480]'])
-                elif self.quality == "Best Available":
-                    cmd.extend(['-f', 'best'])
-
-                # Download archive
-                if self.use_archive:
-                    archive_file = os.path.join(output_dir, 'download_archive.txt')
-                    cmd.extend(['--download-archive', archive_file])
-
-                # Additional settings
-                cmd.extend([
-                    '--sleep-interval', '3',
-                    '--max-sleep-interval', '10',
-                    '--ignore-errors',
-                    '--no-abort-on-error',
-                    '--write-info-json',
-                    '--concurrent-fragments', '8',
-                    '-o', os.path.join(output_dir, '%(title)s.%(ext)s'),
-                    url
-                ])
-
-                self.item_progress_signal.emit(f"Downloading item {idx + 1}/{total_items}...")
-
-                # Run download process
-                self.process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    bufsize=1
-                )
-
-                # Read output line by line
-                for line in self.process.stdout:
-                    if self.stopped:
-                        break
+            if not self.stopped:
+                process.wait()  # stop() reaps the process group itself
+                self.ytdlp_cache.update()
+        finally:
+            with self.lock:
+                self.processes.pop(item, None)
+            self.collect_finished(feed_tail, item, output_dir, tally)
+            if os.path.exists(feed):
+                os.remove(feed)
+            if own_json:
+                os.remove(own_json)
 
-                    line = line.strip()
-                    if line:
-                        self.log_signal.emit(line)
+        # Throughput history for the planner (whole runs only, time spent paused left out)
+        with self.lock:
+            paused_for = self.paused_seconds.get(item, 0)
+        if tally[2] and process.returncode == 0 and not self.stopped:
+            self.catalog.record_throughput(url_host(url), volume_of(output_dir), self.quality,
+                                           tally[0], tally[2], time.time() - started - paused_for, tally[3])
 
-                self.process.wait()
+        if self.budget and tally[0]:
+            files, projected, actual, _ = tally
+            with self.lock:
+                self.projected_bytes += projected
+                self.actual_bytes += actual
+            self.log(f"📊 Budget: {files} file(s), projected {format_bytes(projected)}, "
+                     f"actual {format_bytes(actual)}", item)
 
-                if self.stopped:
-                    self.log_signal.emit(f"\n⏹️  Batch stopped at item {idx + 1}/{total_items}")
-                    break
-                elif self.process.returncode == 0:
-                    successful += 1
-                    self.log_signal.emit(f"\n✅ Item {idx + 1}/{total_items} completed successfully!")
-                else:
-                    failed += 1
-                    self.log_signal.emit(f"\n❌ Item {idx + 1}/{total_items} failed (exit code: {self.process.returncode})")
+        return process.returncode, throttled
 
-            # Final summary
-            if self.stopped:
-                self.finished_signal.emit(False, f"Batch stopped: {successful} successful, {failed} failed, {total_items - successful - failed} not processed")
-            else:
-                self.finished_signal.emit(True, f"Batch complete: {successful} successful, {failed} failed out of {total_items} items")
+    def ranged_download(self, item, url, output_dir, route=None, info_json=None, format_id=None, sort=None):
+        """Fetch a single video's file over ranged_connections connections
+
+        Returns the path of an info JSON extracted here for yt-dlp to load
+        (the caller deletes it), or None. Playlists, merged formats (separate
+        video and audio), streaming protocols (DASH, HLS), files known to be
+        under RANGED_MIN_BYTES and routes through a SOCKS proxy are left to
+        yt-dlp, and so is any file whose ranged download fails.
+        """
+        if not is_single_video(url):
+            return None
+        if self.bandwidth is not None:
+            proxy, source_address = self.throttle_proxy(route).url, None  # Metered like yt-dlp
+        elif route:
+            proxy, source_address = route.proxy, route.source_address
+            if proxy and not proxy.startswith('http://'):
+                return None
+        else:
+            proxy = source_address = None
+
+        own_json = None
+        if info_json and not (format_id or sort):
+            path = info_json
+        else:
+            # Prefetched metadata holds the preset's format, not a budget's pick
+            cmd = self.build_command(url, output_dir, route, extract_only=True,
+                                     format_id=format_id, sort=sort)
+            process = spawn(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            universal_newlines=True)
+            with self.lock:
+                self.processes[item] = process
+                if item in self.suspended:
+                    suspend_tree(process)
+            try:
+                output, _ = process.communicate(timeout=PREFETCH_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                kill_tree(process, grace=0)
+                return None
+            finally:
+                with self.lock:
+                    self.processes.pop(item, None)
+            if process.returncode != 0 or not output.strip():
+                return None
+            os.makedirs(PREFETCH_DIR, exist_ok=True)
+            path = own_json = os.path.join(PREFETCH_DIR, f'{uuid.uuid4().hex}.info.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(output)
+
+        try:
+            with open(path, encoding='utf-8') as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return own_json
+        target = info.get('_filename')
+        known_size = info.get('filesize') or info.get('filesize_approx')
+        if (info.get('requested_formats') or info.get('protocol') not in ('http', 'https')
+                or not info.get('url') or not target or os.path.exists(target)
+                or known_size and known_size < RANGED_MIN_BYTES):
+            return own_json
+        # yt-dlp would skip an archived video and leave the fetched file behind
+        if self.use_archive and in_archive(
+                output_dir, f"{info.get('extractor_key', '').lower()} {info.get('id', '')}"):
+            return own_json
 
+        total_items = len(self.item_queue)
+
+        def progress(done, size):
+            self.item_progress_signal.emit(f"Ranged download item {item}/{total_items}: "
+                                           f"{format_bytes(done)} of {format_bytes(size)}")
+
+        downloader = RangedDownloader(
+            info['url'], target, self.ranged_connections, headers=info.get('http_headers'),
+            source_address=source_address, proxy=proxy, cancelled=lambda: self.stopped,
+            paused=lambda: self.is_suspended(item), progress=progress,
+            identity=f"{info.get('extractor_key', '')} {info.get('id', '')} {info.get('format_id', '')}")
+        self.log(f"⚡ Ranged download over {self.ranged_connections} connections: "
+                 f"{os.path.basename(target)}", item)
+        with self.lock:
+            self.ranged_items.add(item)
+            if self.paused:
+                self._suspend(item, True)  # Batch paused while the metadata was fetched
+        try:
+            stats = downloader.download()
         except Exception as e:
-            self.log_signal.emit(f"❌ Error: {str(e)}")
-            self.finished_signal.emit(False, str(e))
+            self.log(f"⚠️ Ranged download failed ({e}), leaving the file to yt-dlp", item)
+            for leftover in (target + '.ranged', target + '.ranged.json'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            return own_json
+        finally:
+            with self.lock:
+                self.ranged_items.discard(item)
+        if stats:
+            rate = stats['bytes'] / max(stats['seconds'], 0.001)
+            self.log(f"⚡ Fetched {format_bytes(stats['bytes'])} in {stats['seconds']:.1f} s "
+                     f"({format_bytes(rate)}/s, {stats['retries']} range retries)", item)
+        return own_json
+
+    def budget_format(self, item, url, route=None, info_json=None):
+        """(format id, -S sort) that keeps this item within the budget
+
+        With prefetched metadata the format is picked from the extracted
+        format list here; otherwise yt-dlp applies the cap per video via -S.
+        A per-item budget is spread over the item's videos by duration.
+        """
+        if self.quality in (SPEECH_QUALITY, HARVEST_QUALITY):
+            return None, None  # Already the cheapest / nothing downloaded
+
+        if info_json:
+            with open(info_json, encoding='utf-8') as f:
+                info = json.load(f)
+            picked = pick_budget_format(info, QUALITY_MAX_HEIGHTS.get(self.quality),
+                                        self.budget.max_bytes, self.budget.max_kbps)
+            if picked:
+                fmt, size, fits = picked
+                self.log(f"🎯 Format {fmt['format_id']} ({fmt.get('height') or '?'}p, "
+                         f"~{format_bytes(size)}) {'fits' if fits else 'is the smallest; nothing fits'} "
+                         f"the budget ({self.budget})", item)
+                return fmt['format_id'], None
+
+        if self.budget.max_kbps:
+            return None, f'tbr:{int(self.budget.max_kbps)}'
+        if self.budget.per_video:
+            return None, f'size:{self.budget.max_bytes}'
+
+        # Per item: the average bitrate that fits the item's total duration
+        durations = self.item_durations(url, route)
+        if not durations:
+            self.log("⚠️ No video durations found; budget not applied to this item", item)
+            return None, None
+        known = [d for d in durations if d]
+        total_seconds = sum(known) + (len(durations) - len(known)) * (sum(known) / len(known) if known else 600)
+        kbps = self.budget.max_bytes * BUDGET_HEADROOM * 8 / 1000 / max(total_seconds, 1)
+        self.log(f"🎯 {len(durations)} video(s), {total_seconds / 3600:.1f} h: up to {kbps:.0f} kbit/s "
+                 f"fits the budget ({self.budget})", item)
+        return None, f'tbr:{int(kbps)}'
+
+    def item_durations(self, url, route=None):
+        """Durations (seconds, 0 if unknown) of the videos behind an item"""
+        try:
+            result = subprocess.run(
+                self.base_command(route) + ['--flat-playlist', '--ignore-errors',
+                                            '--print', '%(duration|0)s', url],
+                stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                timeout=PREFETCH_TIMEOUT, creationflags=POPEN_FLAGS
+            )
+        except subprocess.TimeoutExpired:
+            return []
+        durations = []
+        for line in result.stdout.splitlines():
+            try:
+                durations.append(float(line.strip() or 0))
+            except ValueError:
+                durations.append(0)
+        return durations
+
+    def harvest_item(self, item, url, output_dir, route=None):
+        """Metadata-only run of one item into the folder's harvest.db"""
+        total_items = len(self.item_queue)
+        harvester = Harvester(
+            self.base_command(route), output_dir,
+            log=lambda message: self.log(message, item),
+            progress=lambda done, total: self.item_progress_signal.emit(
+                f"Harvesting item {item}/{total_items}: {done}/{total} videos"),
+            throttle_pattern=THROTTLE_PATTERN if route else ACCOUNT_ERROR_PATTERN if self.cookie_pool else None
+        )
+        with self.lock:
+            self.harvesters[item] = harvester
+            if item in self.suspended:
+                harvester.suspend()
+        try:
+            harvested, failed, skipped, known = harvester.run(url)
+        finally:
+            with self.lock:
+                self.harvesters.pop(item, None)
+
+        # Without a route the pattern matched account errors: reported as such, not as a throttled route
+        throttled = bool(harvester.throttled and route)
+        if throttled:
+            cooldown = self.egress_pool.report_throttled(route)
+            self.log(f"🚦 Route {route} throttled, cooling down for {cooldown // 60} min", item)
+        elif harvester.throttled:
+            self.worker_state.account_error = True
+            self.report_account_error(item)
+        details = f"{failed} failed, {known} already there" + (f", {skipped} not fetched" if skipped else "")
+        self.log(f"🗂️ Harvested {harvested} video(s) into {HARVEST_DB_NAME} ({details})", item)
+        return (1 if failed else 0), throttled
+
+    def report_account_error(self, item):
+        """Rest the worker's cookie profile after a bot check or rate limit; True if rested"""
+        profile = self.worker_state.profile
+        if profile is None:
+            return False
+        cooldown = self.cookie_pool.report_throttled(profile)
+        self.log(f"🍪 Cookie profile {profile} hit an account error, resting it for {cooldown // 60} min", item)
+        return True
+
+    def release_profile(self, profile, item, returncode):
+        """Return the worker's cookie profile and count the item in its health"""
+        account_error = self.worker_state.account_error
+        self.worker_state.profile = None
+        self.cookie_pool.release(profile, clean=not account_error)
+        if self.stopped:
+            return
+        rested = self.cookie_pool.record(profile, returncode != 0, account_error)
+        if rested:
+            cooldown, rate = rested
+            self.log(f"🍪 Cookie profile {profile} failed {rate * 100:.0f}% of its recent items, "
+                     f"resting it for {cooldown // 60} min", item)
+
+    def collect_finished(self, feed_tail, item, output_dir, tally):
+        """Count files yt-dlp finished since the last call and pass them to the pipeline"""
+        for line in feed_tail.read_new():
+            fields = line.rstrip('\r\n').split('\t', 2)
+            if len(fields) < 3 or not os.path.exists(fields[2]):
+                continue
+            projected, duration, path = fields
+            size = os.path.getsize(path)
+            tally[0] += 1
+            tally[1] += int(float(projected)) if projected else 0
+            tally[2] += size
+            tally[3] += float(duration) if duration else 0.0
+            with self.lock:
+                self.downloaded_bytes += size
+            if self.scratch_dir and self.pipeline:
+                # Taken through the stages by a later run if this one stops first
+                self.journal_move(path, output_dir, self.pipeline.stages[0][0])
+            if self.pipeline and not self.stopped:
+                self.pipeline.submit(path, item, output_dir)
 
     def stop(self):
         """Stop the batch process"""
         self.stopped = True
-        if self.process:
-            self.process.terminate()
-            try:
-                self.process.wait(timeout=5)
-            except:
-                self.process.kill()
+        if self.prefetcher:
+            threading.Thread(target=self.prefetcher.close, daemon=True).start()
+        self.pipeline.stop()
+        with self.lock:
+            processes = list(self.processes.values())
+            harvesters = list(self.harvesters.values())
+        for harvester in harvesters:
+            harvester.stop()
+        for process in processes:
+            kill_tree(process)
+
+    def live_rate(self):
+        """Bytes/s this run has downloaded at, once it ran PLAN_MIN_LIVE_SECONDS"""
+        elapsed = time.time() - self.run_started if self.run_started else 0
+        if elapsed < PLAN_MIN_LIVE_SECONDS or not self.downloaded_bytes:
+            return None
+        return self.downloaded_bytes / elapsed
 
     def pause(self):
-        """Pause the batch process"""
+        """Pause the batch: no new items, and running downloads are suspended"""
         self.paused = True
+        with self.lock:
+            items = set(self.processes) | set(self.harvesters) | self.ranged_items
+            for item in items:
+                self._suspend(item, True)
+        self.log(f"⏸️ Batch paused ({len(items)} download(s) suspended)")
 
     def resume(self):
-        """Resume the batch process"""
+        """Resume the batch and every suspended download"""
+        with self.lock:
+            items = list(self.suspended)
+            for item in items:
+                self._suspend(item, False)
         self.paused = False
+        self.log(f"▶️ Batch resumed ({len(items)} download(s) continued)")
+
+    def pause_item(self, item):
+        """Suspend one running item (right away, or as soon as its yt-dlp starts)"""
+        with self.lock:
+            self._suspend(item, True)
+        self.log(f"⏸️ Item {item} paused", item)
+
+    def resume_item(self, item):
+        with self.lock:
+            self._suspend(item, False)
+        self.log(f"▶️ Item {item} resumed", item)
+
+    def is_suspended(self, item):
+        with self.lock:
+            return item in self.suspended
+
+    def _suspend(self, item, suspend):
+        """Freeze or thaw an item's processes (call with self.lock held)"""
+        if suspend == (item in self.suspended):
+            return
+        if suspend:
+            self.suspended[item] = time.time()
+            self.paused_seconds.setdefault(item, 0)
+        else:
+            self.paused_seconds[item] = self.paused_seconds.get(item, 0) + time.time() - self.suspended.pop(item)
+        if item in self.processes:
+            suspend_tree(self.processes[item], suspend)
+        if item in self.harvesters:
+            self.harvesters[item].suspend(suspend)
+
+class BatchCoordinator:
+    """Central queue of a batch shared by several worker nodes
+
+    Nodes lease one item at a time and must heartbeat while they work on
+    it. Leases not renewed within LEASE_SECONDS go back to the front of the
+    queue. Completions are appended to a JSONL results file next to the
+    batch, and items that already succeeded there are skipped on restart.
+    """
+
+    def __init__(self, items, settings, results_path):
+        self.items = items  # List of (url, output_dir) tuples
+        self.settings = settings
+        self.results_path = results_path
+        self.lock = threading.Lock()
+        self.leases = {}  # lease id -> [item number, node, expires at]
+        self.attempts = {}  # item number -> times leased
+        self.done = {}  # item number -> success
+
+        if os.path.exists(results_path):
+            with open(results_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except ValueError:
+                        continue
+                    if result.get('success'):
+                        self.done[result['item']] = True
+        self.skipped = len(self.done)
+        self.pending = deque(n for n in range(1, len(items) + 1) if n not in self.done)
+
+    def _reap(self):
+        """Re-queue items whose lease ran out (call with the lock held)"""
+        now = time.time()
+        for lease_id, (item, node, expires) in list(self.leases.items()):
+            if expires < now:
+                del self.leases[lease_id]
+                self.pending.appendleft(item)
+                print(f"⌛ Lease on item {item} by {node} expired, re-queued", flush=True)
+
+    def config(self):
+        return dict(self.settings, total=len(self.items))
+
+    def lease(self, node):
+        """Next item for node, {'wait': True} while others hold leases, or {} when done"""
+        with self.lock:
+            self._reap()
+            if not self.pending:
+                return {'wait': True} if self.leases else {}
+            item = self.pending.popleft()
+            lease_id = uuid.uuid4().hex
+            self.leases[lease_id] = [item, node, time.time() + LEASE_SECONDS]
+            self.attempts[item] = self.attempts.get(item, 0) + 1
+            url, output_dir = self.items[item - 1]
+            return {'lease': lease_id, 'item': item, 'url': url, 'output_dir': output_dir}
+
+    def heartbeat(self, node, lease_ids):
+        """Renew leases; returns the ids that are no longer held"""
+        with self.lock:
+            self._reap()
+            lost = []
+            for lease_id in lease_ids:
+                lease = self.leases.get(lease_id)
+                if lease and lease[1] == node:
+                    lease[2] = time.time() + LEASE_SECONDS
+                else:
+                    lost.append(lease_id)
+            return lost
+
+    def release(self, lease_id):
+        """Give an unfinished item back to the queue"""
+        with self.lock:
+            lease = self.leases.pop(lease_id, None)
+            if lease:
+                self.pending.appendleft(lease[0])
+            return True
+
+    def complete(self, lease_id, item, success, message, node):
+        """Record an item's outcome (also accepted after the lease expired)"""
+        with self.lock:
+            self.leases.pop(lease_id, None)
+            if self.done.get(item):
+                return True
+            # Late completion of an expired lease still counts
+            if item in self.pending:
+                self.pending.remove(item)
+            self.done[item] = success
+            url, output_dir = self.items[item - 1]
+            result = {
+                'item': item, 'url': url, 'output_dir': output_dir,
+                'success': success, 'message': message, 'node': node,
+                'attempts': self.attempts.get(item, 0),
+                'finished': datetime.now().isoformat()
+            }
+            with open(self.results_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result) + '\n')
+        print(f"{'✅' if success else '❌'} Item {item}/{len(self.items)} {message} ({node})", flush=True)
+        return True
+
+    def status(self):
+        with self.lock:
+            self._reap()
+            successful = sum(1 for ok in self.done.values() if ok)
+            return {
+                'total': len(self.items), 'pending': len(self.pending),
+                'leased': len(self.leases), 'successful': successful,
+                'failed': len(self.done) - successful
+            }
+
+    def finished(self):
+        with self.lock:
+            return not self.pending and not self.leases
+
+class ThreadingXMLRPCServer(socketserver.ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+class LeasedItemQueue:
+    """Item queue backed by a BatchCoordinator on another process or box
+
+    Drop-in for BatchItemQueue in BatchDownloadThread: items are leased one
+    at a time, leases are kept alive by a heartbeat thread, and outcomes are
+    reported back to the coordinator.
+    """
+
+    def __init__(self, url, node, token=''):
+        self.url = url
+        self.node = node
+        self.token = token
+        self.lock = threading.Lock()
+        self.leases = {}  # item number -> lease id
+        self.stopped = False
+        self.total = self._call('config')['total']
+        self.completed = 0
+        self.heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        self.heartbeat_thread.start()
+
+    def _call(self, method, *args, retries=COORDINATOR_RETRIES):
+        delay = COORDINATOR_RETRY_SECONDS
+        while True:
+            # ServerProxy is not thread-safe, so every call gets its own
+            proxy = xmlrpc.client.ServerProxy(self.url, allow_none=True)
+            try:
+                return getattr(proxy, method)(self.token, *args)
+            except xmlrpc.client.Fault:
+                raise  # The coordinator refused the call; asking again won't help
+            except (OSError, xmlrpc.client.Error) as e:
+                if retries <= 0 or self.stopped:
+                    raise
+                print(f"⚠️  Coordinator call {method} failed ({str(e)}), retrying in {delay} s", flush=True)
+            time.sleep(delay)
+            retries -= 1
+            delay *= 2
+
+    def __len__(self):
+        return self.total
+
+    def config(self):
+        return self._call('config')
+
+    def next_item(self):
+        while not self.stopped:
+            lease = self._call('lease', self.node)
+            if not lease:
+                return None
+            if lease.get('wait'):
+                # Other nodes hold the rest; their leases may still expire
+                time.sleep(LEASE_POLL_SECONDS)
+                continue
+            with self.lock:
+                self.leases[lease['item']] = lease['lease']
+            return lease['item'], lease['url'], lease['output_dir']
+        return None
+
+    def requeue(self, item):
+        with self.lock:
+            lease_id = self.leases.pop(item[0], None)
+        if lease_id:
+            self._call('release', lease_id)
+
+    def peek(self, count):
+        return []  # Other nodes may take them, so nothing is extracted ahead
+
+    def output_dirs(self):
+        return []  # Other nodes may be writing there; no partial recovery
+
+    def add_retry(self, url, output_dir):
+        return False  # The coordinator owns the item list
+
+    def finish_item(self, item, success, message):
+        with self.lock:
+            lease_id = self.leases.pop(item[0], None)
+        self._call('complete', lease_id or '', item[0], success, message, self.node)
+
+    def close(self):
+        self.stopped = True
+
+    def _heartbeat_loop(self):
+        while not self.stopped:
+            time.sleep(HEARTBEAT_SECONDS)
+            with self.lock:
+                lease_ids = list(self.leases.values())
+            if not lease_ids:
+                continue
+            try:
+                lost = self._call('heartbeat', self.node, lease_ids, retries=0)
+            except (OSError, xmlrpc.client.Error) as e:
+                print(f"⚠️  Heartbeat failed: {str(e)}", flush=True)
+                continue
+            if lost:
+                print(f"⚠️  Lost {len(lost)} lease(s) to expiry", flush=True)
+
+def load_batch_file(filename):
+    """Read a batch saved by "Save Batch" (or a plain list of URLs)
+
+    A text file is taken as one "URL [output folder]" per line; lines
+    without a folder use the current directory.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        text = f.read()
+    try:
+        batch_data = json.loads(text)
+    except ValueError:
+        batch_data = {'items': []}
+        for line in text.splitlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                parts = line.split(None, 1)
+                batch_data['items'].append((parts[0], parts[1] if len(parts) > 1 else os.getcwd()))
+    batch_data['items'] = [tuple(item) for item in batch_data['items']]
+    return batch_data
+
+def expand_batch_items(items, cookie_pool=None):
+    """Expand channel/playlist items into one item per video
+
+    Lets a coordinator hand out single videos instead of whole channels.
+    Items that fail to expand are kept as they are.
+    """
+    expanded = []
+    for url, output_dir in items:
+        if is_single_video(url):
+            expanded.append((url, output_dir))
+            continue
+        print(f"🔎 Expanding {url}...", flush=True)
+        result = subprocess.run(
+            ytdlp_base_command(cookie_profile(cookie_pool)) + ['--flat-playlist', '--print', 'url', url],
+            capture_output=True, text=True, creationflags=POPEN_FLAGS
+        )
+        videos = [line.strip() for line in result.stdout.splitlines() if line.strip()]
+        if result.returncode != 0 or not videos:
+            print(f"⚠️  Could not expand {url}, keeping it as one item", flush=True)
+            expanded.append((url, output_dir))
+            continue
+        print(f"   {len(videos)} videos", flush=True)
+        expanded.extend((video, output_dir) for video in videos)
+    return expanded
+
+def canonical_url(url):
+    """(canonical URL, dedup key) of a URL
+
+    YouTube variants collapse to one form: youtu.be, shorts, live and embed
+    links and watch?v= with tracking parameters become watch?v=<id> (key
+    "video:<id>"); playlists become playlist?list=<id>; channel links keep
+    their /@handle or /channel/<id> form (plus tab), lowercased handles.
+    Other sites are kept as they are, keyed by the URL itself.
+    """
+    url = url.strip()
+    if not re.match(r'^[a-z][a-z0-9+.-]*://', url, re.IGNORECASE):
+        url = 'https://' + url
+    parts = urllib.parse.urlsplit(url)
+    host = parts.netloc.lower().split(':')[0]
+    for prefix in ('www.', 'm.', 'music.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    segments = [segment for segment in parts.path.split('/') if segment]
+    query = urllib.parse.parse_qs(parts.query)
+
+    if host == 'youtu.be' and segments and YOUTUBE_ID_PATTERN.match(segments[0]):
+        return f'https://www.youtube.com/watch?v={segments[0]}', f'video:{segments[0]}'
+    if host not in YOUTUBE_HOSTS:
+        return url, url
+
+    video_id = query.get('v', [''])[0]
+    if len(segments) > 1 and segments[0] in ('shorts', 'live', 'embed', 'v'):
+        video_id = segments[1]
+    playlist_id = query.get('list', [''])[0]
+    if YOUTUBE_ID_PATTERN.match(video_id):
+        if playlist_id.startswith('RD'):  # Mixes depend on their seed video
+            return (f'https://www.youtube.com/watch?v={video_id}&list={playlist_id}',
+                    f'mix:{video_id}:{playlist_id}')
+        if playlist_id:  # yt-dlp downloads the playlist, as the Batcher does
+            return f'https://www.youtube.com/playlist?list={playlist_id}', f'playlist:{playlist_id}'
+        return f'https://www.youtube.com/watch?v={video_id}', f'video:{video_id}'
+    if segments[:1] == ['playlist'] and playlist_id:
+        return f'https://www.youtube.com/playlist?list={playlist_id}', f'playlist:{playlist_id}'
+
+    if segments and segments[0].startswith('@'):
+        name, kind, rest = segments[0].lower(), 'handle', segments[1:]
+    elif len(segments) > 1 and segments[0] in ('channel', 'c', 'user'):
+        name = segments[1] if segments[0] == 'channel' else segments[1].lower()
+        kind, rest = segments[0], segments[2:]
+    else:
+        return url, url
+    tab = f'/{rest[0].lower()}' if rest and rest[0].lower() in CHANNEL_TABS else ''
+    path = name if kind == 'handle' else f'{kind}/{name}'
+    return f'https://www.youtube.com/{path}{tab}', f'{kind}:{name}{tab}'
+
+def read_import_file(filename):
+    """(url, output folder or None) pairs from a text, CSV or JSONL file
+
+    CSV and JSONL take the URL and folder from a "url"/"output_dir"-like
+    column or key; a CSV without such a header and any text file yield
+    every URL they contain ("URL folder" lines keep their folder, as in
+    load_batch_file).
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+        if extension == '.csv':
+            sample = f.read(64 * 1024)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            rows = csv.reader(f, dialect)
+            first_row = next(rows, [])
+            header = [cell.strip().lower() for cell in first_row]  # Only for matching column names
+            url_column = next((header.index(c) for c in IMPORT_URL_COLUMNS if c in header), None)
+            folder_column = next((header.index(c) for c in IMPORT_FOLDER_COLUMNS if c in header), None)
+            if url_column is None:
+                rows = itertools.chain([first_row], rows)  # No header: the row is data, case and all
+            for row in rows:
+                if url_column is None:
+                    for cell in row:
+                        for url in IMPORT_URL_PATTERN.findall(cell):
+                            yield url, None
+                elif url_column < len(row) and row[url_column].strip():
+                    folder = row[folder_column].strip() if folder_column is not None and folder_column < len(row) else ''
+                    yield row[url_column].strip(), folder or None
+        elif extension in ('.jsonl', '.ndjson'):
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, str):
+                    yield record, None
+                elif isinstance(record, dict):
+                    url = next((record[k] for k in IMPORT_URL_COLUMNS if record.get(k)), None)
+                    folder = next((record[k] for k in IMPORT_FOLDER_COLUMNS if record.get(k)), None)
+                    if isinstance(url, str):
+                        yield url, folder if isinstance(folder, str) else None
+        else:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                urls = IMPORT_URL_PATTERN.findall(line)
+                rest = line.split(None, 1)
+                if len(urls) == 1 and line.startswith(urls[0]) and len(rest) > 1:
+                    yield urls[0], rest[1]
+                else:
+                    for url in urls:
+                        yield url, None
+
+def read_archive_ids(output_dir):
+    """Video IDs in an output folder's download_archive.txt"""
+    try:
+        with open(os.path.join(output_dir, 'download_archive.txt'), 'r', encoding='utf-8') as f:
+            return {line.split()[1] for line in f if len(line.split()) == 2}
+    except OSError:
+        return set()
+
+def run_coordinator(args):
+    batch_data = load_batch_file(args.coordinator)
+    items = batch_data['items']
+    if args.expand:
+        items = expand_batch_items(
+            items, CookiePool(args.cookie_profiles.split(',')) if args.cookie_profiles else None)
+
+    settings = {key: batch_data[key] for key in ('quality', 'speech_format', 'use_archive',
+                                                 'workers', 'prefetch', 'schedule',
+                                                 'shards', 'shard_size_mb', 'vad',
+                                                 'budget_mode', 'budget_value', 'verify',
+                                                 'sidecars', 'ranged_connections')
+                if key in batch_data}
+    results_path = os.path.splitext(args.coordinator)[0] + '.results.jsonl'
+    coordinator = BatchCoordinator(items, settings, results_path)
+
+    server = ThreadingXMLRPCServer((args.host, args.port), allow_none=True, logRequests=False)
+
+    def guarded(method):
+        def call(token, *call_args):
+            if token != args.token:
+                raise PermissionError("Invalid coordinator token")
+            return method(*call_args)
+        return call
+
+    for name in ('config', 'lease', 'heartbeat', 'release', 'complete', 'status'):
+        server.register_function(guarded(getattr(coordinator, name)), name)
+
+    print(f"📡 Coordinator for {args.coordinator} listening on {args.host}:{args.port}", flush=True)
+    print(f"   {len(items)} items, {coordinator.skipped} already done ({results_path})", flush=True)
+
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    try:
+        while not coordinator.finished():
+            time.sleep(1)
+        # Give nodes a moment to see that the queue is empty
+        time.sleep(LEASE_POLL_SECONDS * 2)
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+
+    status = coordinator.status()
+    print(f"🏁 Batch complete: {status['successful']} successful, {status['failed']} failed "
+          f"out of {status['total']} items", flush=True)
+
+def run_worker_node(args):
+    app = QCoreApplication(sys.argv)
+
+    node = args.name or f"{socket.gethostname()}-{os.getpid()}"
+    try:
+        item_queue = LeasedItemQueue(args.worker, node, args.token)
+        config = item_queue.config()
+    except (OSError, xmlrpc.client.Error) as e:
+        print(f"❌ Cannot reach coordinator at {args.worker}: {str(e)}", flush=True)
+        sys.exit(1)
+    try:
+        schedule = BandwidthSchedule(config.get('schedule', '')) or None
+        budget = FormatBudget(config.get('budget_mode', BUDGET_MODES[0]), config.get('budget_value', 0)) or None
+    except ValueError as e:
+        print(f"❌ Invalid batch settings from coordinator at {args.worker}: {str(e)}", flush=True)
+        item_queue.close()
+        sys.exit(1)
+
+    run_dir = os.path.join(LOG_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + f'-{node}')
+    run_log = RunLogWriter(run_dir)
+    run_log.start()
+
+    thread = BatchDownloadThread(
+        batch_items=None,
+        quality=config.get('quality', "Best (≤1080p)"),
+        use_archive=config.get('use_archive', True),
+        run_log=run_log,
+        workers=args.workers or config.get('workers', 1),
+        prefetch_depth=0,
+        item_queue=item_queue,
+        schedule=schedule,
+        speech_format=config.get('speech_format', "FLAC"),
+        shard_bytes=config.get('shard_size_mb', SHARD_DEFAULT_MB) * 1024 ** 2 if config.get('shards') else 0,
+        detect_speech=config.get('vad', False),
+        profiler=RunProfiler(os.path.basename(run_dir)) if profiling_requested() else None,
+        budget=budget,
+        verify=config.get('verify', False),
+        sidecars=config.get('sidecars', SIDECAR_MODES[0]),
+        ranged_connections=config.get('ranged_connections', 1),
+        cookie_pool=CookiePool(args.cookie_profiles.split(',')) if args.cookie_profiles else None,
+        scratch_dir=args.scratch,
+        scratch_cap=args.scratch_cap * 1024 ** 3
+    )
+    thread.log_signal.connect(lambda line: print(line, flush=True))
+    if thread.profiler:
+        thread.probe_signal.connect(thread.profiler.signal_delivered)
+        thread.profiler.start()
+
+    def finished(success, message):
+        print(message, flush=True)
+        if thread.profiler:
+            thread.wait()
+            print(f"🔬 Profile written to {thread.profiler.dump()}", flush=True)
+        item_queue.close()
+        run_log.close()
+        run_log.join()
+        if thread.queue_error:
+            print(f"❌ Lost the coordinator at {args.worker}; its leases return to the queue when they expire",
+                  flush=True)
+            app.exit(1)
+        else:
+            app.quit()
+
+    thread.finished_signal.connect(finished)
+    print(f"🛠️  Node {node} working for {args.worker} (log: {run_dir})", flush=True)
+    thread.start()
+    sys.exit(app.exec_())
+
+class ImportThread(QThread):
+    """Bulk-import a URL list into the batch queue
+
+    URLs are canonicalized, then dropped when they repeat within the file,
+    are already queued, or (with the archive on) already sit in their
+    folder's download_archive.txt. When both /@handle and /channel/ links
+    are involved, handles are resolved to channel IDs first.
+    """
+    log_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(bool, str)
+
+    def __init__(self, filename, queue, default_dir, use_archive, cookie_pool=None):
+        super().__init__()
+        self.filename = filename
+        self.queue = queue
+        self.default_dir = default_dir
+        self.use_archive = use_archive
+        self.cookie_pool = cookie_pool  # For the @handle lookups
+
+    def run(self):
+        try:
+            self.finished_signal.emit(True, self.import_file())
+        except Exception as e:
+            self.finished_signal.emit(False, str(e))
+
+    def import_file(self):
+        self.log_signal.emit(f"📥 Importing {self.filename}...")
+        entries, no_folder = [], 0
+        for url, folder in read_import_file(self.filename):
+            if folder:
+                folder = os.path.join(self.default_dir or os.getcwd(), os.path.expanduser(folder))
+            elif self.default_dir:
+                folder = self.default_dir
+            else:
+                no_folder += 1
+                continue
+            canonical, key = canonical_url(url)
+            entries.append((canonical, key, folder))
+        queued = [canonical_url(url)[1] for url, _ in self.queue.items()]
+
+        handles = {key.split('/')[0] for key in itertools.chain(queued, (e[1] for e in entries))
+                   if key.startswith('handle:')}
+        channels_present = any(key.startswith('channel:')
+                               for key in itertools.chain(queued, (e[1] for e in entries)))
+        channel_ids = self.resolve_handles(handles) if handles and channels_present else {}
+
+        def dedup_key(key):
+            name, slash, tab = key.partition('/')
+            return channel_ids.get(name, name) + slash + tab
+
+        seen = {dedup_key(key) for key in queued}
+        archives = {}
+        items, duplicates, in_queue, archived = [], 0, 0, 0
+        queued_keys = set(seen)
+        for canonical, key, folder in entries:
+            key = dedup_key(key)
+            if key in seen:
+                if key in queued_keys:
+                    in_queue += 1
+                else:
+                    duplicates += 1
+                continue
+            seen.add(key)
+            if self.use_archive and key.startswith('video:'):
+                if folder not in archives:
+                    archives[folder] = read_archive_ids(folder)
+                if key[len('video:'):] in archives[folder]:
+                    archived += 1
+                    continue
+            items.append((canonical, folder))
+
+        self.queue.add_items(items)
+        message = (f"{len(items)} added, {duplicates} duplicate(s) in the file, {in_queue} already queued, "
+                   f"{archived} already downloaded")
+        if no_folder:
+            message += f", {no_folder} without an output folder"
+        return message
+
+    def resolve_handles(self, handles):
+        """Map "handle:@name" keys to "channel:<UC id>" with one lookup per handle"""
+        self.log_signal.emit(f"🔎 Resolving {len(handles)} @handle(s) to channel IDs...")
+
+        def lookup(key):
+            result = subprocess.run(
+                ytdlp_base_command(cookie_profile(self.cookie_pool)) + [
+                    '--flat-playlist', '--playlist-items', '0', '-J',
+                    f'https://www.youtube.com/{key[len("handle:"):]}'],
+                capture_output=True, text=True, timeout=PREVIEW_TIMEOUT, creationflags=POPEN_FLAGS
+            )
+            try:
+                channel_id = json.loads(result.stdout).get('channel_id')
+            except ValueError:
+                channel_id = None
+            return key, f'channel:{channel_id}' if channel_id else key
+
+        with ThreadPoolExecutor(max_workers=HARVEST_WORKERS) as executor:
+            return dict(executor.map(lookup, handles))
 
 class YouTubeBatcherGUI(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.batch_items = []  # List of (url, output_dir) tuples
+        self.queue = SqliteBatchQueue()  # The batch, on disk; the table shows one page
+        self.page_start = 0  # Position before the first row shown
         self.download_thread = None
+        self.run_log = None  # RunLogWriter of the current batch run
+        self.log_tail = None  # FileTail following the current run log
+        self.tail_timer = QTimer(self)
+        self.tail_timer.setInterval(LOG_TAIL_INTERVAL_MS)
+        self.tail_timer.timeout.connect(self.poll_run_log)
+        self.queue_timer = QTimer(self)
+        self.queue_timer.setInterval(QUEUE_REFRESH_MS)
+        self.queue_timer.timeout.connect(self.refresh_queue_table)
+        self.preview_cache = PreviewCache()
+        self.preview_resolver = PreviewResolver(self.preview_cache, parent=self)
+        self.preview_resolver.resolved.connect(self.preview_resolved)
+        self.preview_timer = QTimer(self)  # Resolves the visible rows once scrolling settles
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DEBOUNCE_MS)
+        self.preview_timer.timeout.connect(self.resolve_visible_previews)
+        self.plan_thread = None
+        self.plan_active = False  # A plan is shown and kept current
+        self.plan_pin = False  # Next plan queues previews for unsized items
+        self.plan_timer = QTimer(self)  # Re-plans while a batch runs
+        self.plan_timer.setInterval(PLAN_REFRESH_MS)
+        self.plan_timer.timeout.connect(self.update_plan)
+        self.plan_resolve_timer = QTimer(self)  # Re-plans while previews come in
+        self.plan_resolve_timer.setSingleShot(True)
+        self.plan_resolve_timer.setInterval(PLAN_RESOLVE_DEBOUNCE_MS)
+        self.plan_resolve_timer.timeout.connect(self.update_plan)
         self.init_ui()
+        self.refresh_queue_table()
 
     def init_ui(self):
         self.setWindowTitle("YouTube Batch Downloader - The Batcher")
@@ -185,7 +5273,7 @@ class YouTubeBatcherGUI(QMainWindow):
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
 
-        subtitle = QLabel("Add multiple downloads • Sequential processing • Individual output folders")
+        subtitle = QLabel("Add multiple downloads • Parallel workers • Individual output folders")
         subtitle.setFont(QFont("Arial", 9))
         subtitle.setAlignment(Qt.AlignCenter)
         subtitle.setStyleSheet("color: #1976D2;")
@@ -232,14 +5320,32 @@ class YouTubeBatcherGUI(QMainWindow):
         batch_layout = QVBoxLayout()
 
         self.batch_table = QTableWidget()
-        self.batch_table.setColumnCount(3)
-        self.batch_table.setHorizontalHeaderLabels(["#", "URL", "Output Folder"])
+        self.batch_table.setColumnCount(5 + len(PREVIEW_COLUMNS))
+        self.batch_table.setHorizontalHeaderLabels(["#", "URL", "Output Folder", "Status", "Tries"]
+                                                   + PREVIEW_COLUMNS)
         self.batch_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.batch_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.batch_table.horizontalHeader().setSectionResizeMode(5, QHeaderView.Stretch)
         self.batch_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.batch_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # Previews are resolved lazily for the rows on screen
+        self.batch_table.verticalScrollBar().valueChanged.connect(self.preview_timer.start)
+        self.batch_table.verticalScrollBar().rangeChanged.connect(self.preview_timer.start)
         batch_layout.addWidget(self.batch_table)
 
+        # Paging through the queue
+        page_layout = QHBoxLayout()
+        self.prev_page_btn = QPushButton("◀ Previous")
+        self.prev_page_btn.clicked.connect(lambda: self.show_page(self.page_start - QUEUE_PAGE_ROWS))
+        page_layout.addWidget(self.prev_page_btn)
+        self.page_label = QLabel()
+        page_layout.addWidget(self.page_label)
+        self.next_page_btn = QPushButton("Next ▶")
+        self.next_page_btn.clicked.connect(lambda: self.show_page(self.page_start + QUEUE_PAGE_ROWS))
+        page_layout.addWidget(self.next_page_btn)
+        page_layout.addStretch()
+        batch_layout.addLayout(page_layout)
+
         # Batch controls
         batch_controls = QHBoxLayout()
 
@@ -251,6 +5357,12 @@ class YouTubeBatcherGUI(QMainWindow):
         self.clear_batch_btn.clicked.connect(self.clear_batch)
         batch_controls.addWidget(self.clear_batch_btn)
 
+        self.pause_item_btn = QPushButton("⏯️ Pause/Resume Selected")
+        self.pause_item_btn.setToolTip("Suspend the selected running items, or continue them")
+        self.pause_item_btn.clicked.connect(self.toggle_item_pause)
+        self.pause_item_btn.setEnabled(False)
+        batch_controls.addWidget(self.pause_item_btn)
+
         batch_controls.addStretch()
 
         self.save_batch_btn = QPushButton("💾 Save Batch")
@@ -261,6 +5373,17 @@ class YouTubeBatcherGUI(QMainWindow):
         self.load_batch_btn.clicked.connect(self.load_batch)
         batch_controls.addWidget(self.load_batch_btn)
 
+        self.import_btn = QPushButton("📥 Import URLs")
+        self.import_btn.setToolTip("Add URLs from a text, CSV or JSONL file (duplicates and "
+                                   "already downloaded videos are skipped)")
+        self.import_btn.clicked.connect(self.import_urls)
+        batch_controls.addWidget(self.import_btn)
+
+        self.plan_btn = QPushButton("📐 Plan")
+        self.plan_btn.setToolTip("Estimate total size and finish time (looks up every item)")
+        self.plan_btn.clicked.connect(self.plan_batch)
+        batch_controls.addWidget(self.plan_btn)
+
         batch_layout.addLayout(batch_controls)
 
         batch_group.setLayout(batch_layout)
@@ -268,22 +5391,186 @@ class YouTubeBatcherGUI(QMainWindow):
 
         # Settings
         settings_group = QGroupBox("Download Settings")
-        settings_layout = QHBoxLayout()
+        settings_layout = QVBoxLayout()
+        options_layout = QHBoxLayout()
 
-        settings_layout.addWidget(QLabel("Quality:"))
+        options_layout.addWidget(QLabel("Quality:"))
         self.quality_combo = QComboBox()
         self.quality_combo.addItems([
             "Best (≤1080p)",
             "Best (≤720p)",
             "Best (≤480p)",
-            "Best Available"
+            "Best Available",
+            SPEECH_QUALITY,
+            HARVEST_QUALITY
         ])
-        settings_layout.addWidget(self.quality_combo)
+        self.quality_combo.currentTextChanged.connect(self.quality_changed)
+        options_layout.addWidget(self.quality_combo)
+
+        self.speech_format_combo = QComboBox()
+        self.speech_format_combo.addItems(SPEECH_FORMATS)
+        self.speech_format_combo.setToolTip("Format of the converted speech audio")
+        self.speech_format_combo.setEnabled(False)
+        options_layout.addWidget(self.speech_format_combo)
 
         self.archive_check = QCheckBox("Use Download Archive (skip duplicates)")
         self.archive_check.setChecked(True)
-        settings_layout.addWidget(self.archive_check)
-        settings_layout.addStretch()
+        options_layout.addWidget(self.archive_check)
+
+        options_layout.addWidget(QLabel("Workers:"))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setMinimum(1)
+        self.workers_spin.setMaximum(MAX_WORKERS)
+        self.workers_spin.setValue(1)
+        self.workers_spin.setToolTip("Number of batch items downloaded in parallel")
+        options_layout.addWidget(self.workers_spin)
+
+        options_layout.addWidget(QLabel("Look-ahead:"))
+        self.prefetch_spin = QSpinBox()
+        self.prefetch_spin.setMinimum(0)
+        self.prefetch_spin.setMaximum(PREFETCH_MAX_DEPTH)
+        self.prefetch_spin.setValue(PREFETCH_DEFAULT_DEPTH)
+        self.prefetch_spin.setSpecialValueText("Off")
+        self.prefetch_spin.setToolTip("Single-video items whose metadata is extracted "
+                                      "while the current item downloads")
+        options_layout.addWidget(self.prefetch_spin)
+
+        options_layout.addWidget(QLabel("Connections:"))
+        self.ranged_spin = QSpinBox()
+        self.ranged_spin.setMinimum(1)
+        self.ranged_spin.setMaximum(RANGED_MAX_CONNECTIONS)
+        self.ranged_spin.setValue(1)
+        self.ranged_spin.setSpecialValueText("Off")
+        self.ranged_spin.setToolTip("Connections per file for single-file formats of "
+                                    f"{RANGED_MIN_BYTES // 1024 ** 2} MB and up, fetched as byte ranges "
+                                    "(Off: yt-dlp downloads them over one connection)")
+        options_layout.addWidget(self.ranged_spin)
+        options_layout.addStretch()
+        settings_layout.addLayout(options_layout)
+
+        # Size / bitrate budget
+        budget_layout = QHBoxLayout()
+        budget_layout.addWidget(QLabel("Budget:"))
+        self.budget_combo = QComboBox()
+        self.budget_combo.addItems(BUDGET_MODES)
+        self.budget_combo.setToolTip("Pick each video's format to fit a size or bitrate budget "
+                                     "(within the quality limit)")
+        self.budget_combo.currentIndexChanged.connect(
+            lambda index: self.budget_spin.setEnabled(index > 0))
+        budget_layout.addWidget(self.budget_combo)
+        self.budget_spin = QDoubleSpinBox()
+        self.budget_spin.setDecimals(2)
+        self.budget_spin.setMinimum(0.01)
+        self.budget_spin.setMaximum(100000)
+        self.budget_spin.setValue(2)
+        self.budget_spin.setEnabled(False)
+        budget_layout.addWidget(self.budget_spin)
+        budget_layout.addStretch()
+        settings_layout.addLayout(budget_layout)
+
+        # Partial download recovery
+        recovery_layout = QHBoxLayout()
+        self.recover_check = QCheckBox("Recover partial downloads at start")
+        self.recover_check.setChecked(True)
+        self.recover_check.setToolTip("Resume interrupted downloads first and delete "
+                                      "stale or corrupt leftovers")
+        recovery_layout.addWidget(self.recover_check)
+        recovery_layout.addWidget(QLabel("Partial budget (GB):"))
+        self.partial_budget_spin = QSpinBox()
+        self.partial_budget_spin.setMinimum(0)
+        self.partial_budget_spin.setMaximum(10000)
+        self.partial_budget_spin.setValue(PARTIAL_DEFAULT_BUDGET_GB)
+        self.partial_budget_spin.setSpecialValueText("No limit")
+        recovery_layout.addWidget(self.partial_budget_spin)
+        recovery_layout.addStretch()
+        settings_layout.addLayout(recovery_layout)
+
+        # Scratch storage
+        scratch_layout = QHBoxLayout()
+        scratch_layout.addWidget(QLabel("Scratch Folder:"))
+        self.scratch_input = QLineEdit()
+        self.scratch_input.setPlaceholderText("Optional fast local folder for downloads in progress "
+                                              "(files move to their output folder when done)")
+        scratch_layout.addWidget(self.scratch_input)
+        scratch_browse_btn = QPushButton("Browse...")
+        scratch_browse_btn.clicked.connect(self.browse_scratch)
+        scratch_layout.addWidget(scratch_browse_btn)
+        scratch_layout.addWidget(QLabel("Cap (GB):"))
+        self.scratch_cap_spin = QSpinBox()
+        self.scratch_cap_spin.setMinimum(0)
+        self.scratch_cap_spin.setMaximum(100000)
+        self.scratch_cap_spin.setValue(SCRATCH_DEFAULT_CAP_GB)
+        self.scratch_cap_spin.setSpecialValueText("No limit")
+        self.scratch_cap_spin.setToolTip("New downloads wait while scratch holds more than this")
+        scratch_layout.addWidget(self.scratch_cap_spin)
+        settings_layout.addLayout(scratch_layout)
+
+        # Dataset output
+        shards_layout = QHBoxLayout()
+        self.shards_check = QCheckBox("Write tar shards")
+        self.shards_check.setToolTip("Pack finished files and their metadata into tar shards "
+                                     "(WebDataset layout) in a 'shards' folder per output folder")
+        self.shards_check.toggled.connect(lambda checked: self.shard_size_spin.setEnabled(checked))
+        shards_layout.addWidget(self.shards_check)
+        shards_layout.addWidget(QLabel("Shard size (MB):"))
+        self.shard_size_spin = QSpinBox()
+        self.shard_size_spin.setMinimum(16)
+        self.shard_size_spin.setMaximum(65536)
+        self.shard_size_spin.setValue(SHARD_DEFAULT_MB)
+        self.shard_size_spin.setEnabled(False)
+        shards_layout.addWidget(self.shard_size_spin)
+        self.vad_check = QCheckBox("Speech segments (VAD)")
+        if np is None:
+            self.vad_check.setEnabled(False)
+            self.vad_check.setToolTip("Needs NumPy (pip install numpy)")
+        else:
+            self.vad_check.setToolTip("Detect where the speech is in every finished file and "
+                                      "store the segments in the catalog")
+        shards_layout.addWidget(self.vad_check)
+        self.verify_check = QCheckBox("Verify downloads")
+        self.verify_check.setToolTip("Check every finished file with ffprobe against the expected "
+                                     "duration; broken files go to a 'quarantine' folder and are "
+                                     "downloaded again")
+        shards_layout.addWidget(self.verify_check)
+        shards_layout.addWidget(QLabel("Sidecars:"))
+        self.sidecars_combo = QComboBox()
+        self.sidecars_combo.addItems(SIDECAR_MODES)
+        self.sidecars_combo.setToolTip("Metadata kept next to loose files: yt-dlp's full info JSON, "
+                                       "a trimmed gzipped copy, or one compressed pack per folder "
+                                       f"({INFO_PACK_NAME} + index)")
+        self.shards_check.toggled.connect(lambda checked: self.sidecars_combo.setEnabled(not checked))
+        shards_layout.addWidget(self.sidecars_combo)
+        shards_layout.addStretch()
+        settings_layout.addLayout(shards_layout)
+
+        # Egress routes
+        routes_layout = QHBoxLayout()
+        routes_layout.addWidget(QLabel("Egress Routes:"))
+        self.routes_input = QLineEdit()
+        self.routes_input.setPlaceholderText("Optional: source IPs and/or proxies, comma-separated "
+                                             "(e.g. 192.0.2.10, socks5://127.0.0.1:1080)")
+        routes_layout.addWidget(self.routes_input)
+        settings_layout.addLayout(routes_layout)
+
+        # Cookie profiles
+        cookies_layout = QHBoxLayout()
+        cookies_layout.addWidget(QLabel("Cookie Profiles:"))
+        self.cookies_input = QLineEdit()
+        self.cookies_input.setPlaceholderText("Optional: browser profiles and/or cookies.txt files, comma-separated, "
+                                              "one per worker (e.g. firefox:work, chrome:Profile 2, ~/acct2.txt)")
+        self.cookies_input.setToolTip("Default: the firefox profile for all workers")
+        self.cookies_input.textChanged.connect(self.cookie_profiles_changed)
+        cookies_layout.addWidget(self.cookies_input)
+        settings_layout.addLayout(cookies_layout)
+
+        # Time windows
+        schedule_layout = QHBoxLayout()
+        schedule_layout.addWidget(QLabel("Schedule:"))
+        self.schedule_input = QLineEdit()
+        self.schedule_input.setPlaceholderText("Optional time windows with bandwidth/workers "
+                                               "(e.g. Mon-Fri 08:00-18:00=5M/1, 18:00-08:00=max/8)")
+        schedule_layout.addWidget(self.schedule_input)
+        settings_layout.addLayout(schedule_layout)
 
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
@@ -299,6 +5586,10 @@ class YouTubeBatcherGUI(QMainWindow):
         self.progress_label = QLabel("Ready to start batch download")
         progress_layout.addWidget(self.progress_label)
 
+        self.plan_label = QLabel("Plan: press \"📐 Plan\" for a size and time estimate")
+        self.plan_label.setStyleSheet("color: #555;")
+        progress_layout.addWidget(self.plan_label)
+
         progress_group.setLayout(progress_layout)
         layout.addWidget(progress_group)
 
@@ -310,6 +5601,14 @@ class YouTubeBatcherGUI(QMainWindow):
         self.start_btn.setStyleSheet("background-color: #4CAF50; color: white; padding: 10px; font-weight: bold;")
         control_layout.addWidget(self.start_btn)
 
+        self.pause_btn = QPushButton("⏸️  Pause")
+        self.pause_btn.setToolTip("Suspend running downloads (bandwidth is freed right away) "
+                                  "and start no new items")
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        self.pause_btn.setEnabled(False)
+        self.pause_btn.setStyleSheet("background-color: #FF9800; color: white; padding: 10px; font-weight: bold;")
+        control_layout.addWidget(self.pause_btn)
+
         self.stop_btn = QPushButton("⏹️  Stop")
         self.stop_btn.clicked.connect(self.stop_batch)
         self.stop_btn.setEnabled(False)
@@ -320,14 +5619,26 @@ class YouTubeBatcherGUI(QMainWindow):
         self.clear_log_btn.clicked.connect(self.clear_log)
         control_layout.addWidget(self.clear_log_btn)
 
+        self.view_logs_btn = QPushButton("📜 View Logs")
+        self.view_logs_btn.clicked.connect(self.view_logs)
+        control_layout.addWidget(self.view_logs_btn)
+
+        self.profile_check = QCheckBox("🔬 Profile")
+        self.profile_check.setChecked(profiling_requested())
+        self.profile_check.setToolTip("Debug: capture cProfile, tracemalloc and signal latency "
+                                      f"reports for the next run ({PROFILE_ENV}=1 turns this on)")
+        control_layout.addWidget(self.profile_check)
+
         layout.addLayout(control_layout)
 
         # Log output
         log_group = QGroupBox("Download Log")
         log_layout = QVBoxLayout()
 
-        self.log_output = QTextEdit()
+        # Only the tail of the log is kept here; full history is on disk
+        self.log_output = QPlainTextEdit()
         self.log_output.setReadOnly(True)
+        self.log_output.setMaximumBlockCount(LOG_TAIL_LINES)
         self.log_output.setFont(QFont("Menlo", 9))
         log_layout.addWidget(self.log_output)
 
@@ -342,6 +5653,11 @@ class YouTubeBatcherGUI(QMainWindow):
         if directory:
             self.dir_input.setText(directory)
 
+    def browse_scratch(self):
+        directory = QFileDialog.getExistingDirectory(self, "Select Scratch Folder")
+        if directory:
+            self.scratch_input.setText(directory)
+
     def add_batch_item(self):
         url = self.url_input.text().strip()
         output_dir = self.dir_input.text().strip()
@@ -354,21 +5670,15 @@ class YouTubeBatcherGUI(QMainWindow):
             QMessageBox.warning(self, "Input Error", "Please select an output directory")
             return
 
-        # Add to batch
-        self.batch_items.append((url, output_dir))
-
-        # Add to table
-        row = self.batch_table.rowCount()
-        self.batch_table.insertRow(row)
-        self.batch_table.setItem(row, 0, QTableWidgetItem(str(row + 1)))
-        self.batch_table.setItem(row, 1, QTableWidgetItem(url))
-        self.batch_table.setItem(row, 2, QTableWidgetItem(output_dir))
+        # Add to batch and show the page it landed on
+        self.queue.add_items([(url, output_dir)])
+        self.show_page(len(self.queue) - 1)
 
         # Clear inputs
         self.url_input.clear()
         self.dir_input.clear()
 
-        self.statusBar().showMessage(f"Added to batch | Total items: {len(self.batch_items)}")
+        self.statusBar().showMessage(f"Added to batch | Total items: {len(self.queue)}")
         self.log_message(f"✅ Added to batch: {url} → {output_dir}")
 
     def remove_batch_item(self):
@@ -378,33 +5688,184 @@ class YouTubeBatcherGUI(QMainWindow):
             QMessageBox.warning(self, "Selection Error", "Please select an item to remove")
             return
 
-        # Remove in reverse order to maintain indices
-        for row in sorted(selected_rows, reverse=True):
-            self.batch_table.removeRow(row)
-            del self.batch_items[row]
+        # Remaining items are renumbered by the queue
+        self.queue.remove(self.batch_table.item(row, 0).data(Qt.UserRole) for row in selected_rows)
+        self.refresh_queue_table()
 
-        # Renumber remaining items
-        for row in range(self.batch_table.rowCount()):
-            self.batch_table.setItem(row, 0, QTableWidgetItem(str(row + 1)))
-
-        self.statusBar().showMessage(f"Removed from batch | Total items: {len(self.batch_items)}")
+        self.statusBar().showMessage(f"Removed from batch | Total items: {len(self.queue)}")
 
     def clear_batch(self):
-        if not self.batch_items:
+        if not len(self.queue):
             return
 
         reply = QMessageBox.question(self, "Clear Batch",
-                                     f"Clear all {len(self.batch_items)} items from batch?",
+                                     f"Clear all {len(self.queue)} items from batch?",
                                      QMessageBox.Yes | QMessageBox.No)
 
         if reply == QMessageBox.Yes:
-            self.batch_items.clear()
-            self.batch_table.setRowCount(0)
+            self.queue.clear()
+            self.show_page(0)
             self.statusBar().showMessage("Batch cleared")
             self.log_message("🗑️  Batch queue cleared")
 
+    def show_page(self, start):
+        """Show the page of the queue that holds position start + 1"""
+        last_page = max(0, (len(self.queue) - 1) // QUEUE_PAGE_ROWS * QUEUE_PAGE_ROWS)
+        self.page_start = min(max(0, start // QUEUE_PAGE_ROWS * QUEUE_PAGE_ROWS), last_page)
+        self.refresh_queue_table()
+
+    def refresh_queue_table(self):
+        rows = self.queue.page(self.page_start, QUEUE_PAGE_ROWS)
+        self.batch_table.setRowCount(len(rows))
+        for row, (row_id, position, url, output_dir, status, attempts) in enumerate(rows):
+            number = QTableWidgetItem(str(position))
+            number.setData(Qt.UserRole, row_id)
+            self.batch_table.setItem(row, 0, number)
+            self.batch_table.setItem(row, 1, QTableWidgetItem(url))
+            self.batch_table.setItem(row, 2, QTableWidgetItem(output_dir))
+            if (status == 'running' and self.download_thread is not None
+                    and self.download_thread.isRunning() and self.download_thread.is_suspended(position)):
+                status = 'paused'
+            self.batch_table.setItem(row, 3, QTableWidgetItem(status))
+            self.batch_table.setItem(row, 4, QTableWidgetItem(str(attempts)))
+            self.show_preview(row, self.preview_cache.peek(url))
+
+        total = len(self.queue)
+        if total:
+            self.page_label.setText(f"Items {self.page_start + 1}-{self.page_start + len(rows)} of {total}")
+        else:
+            self.page_label.setText("No items")
+        self.prev_page_btn.setEnabled(self.page_start > 0)
+        self.next_page_btn.setEnabled(self.page_start + QUEUE_PAGE_ROWS < total)
+        self.preview_timer.start()
+
+    def visible_rows(self):
+        """Table rows currently on screen"""
+        count = self.batch_table.rowCount()
+        if not count:
+            return range(0)
+        first = self.batch_table.rowAt(0)
+        last = self.batch_table.rowAt(self.batch_table.viewport().height() - 1)
+        return range(max(first, 0), (last if last >= 0 else count - 1) + 1)
+
+    def resolve_visible_previews(self):
+        """Fill visible rows from the cache and resolve the rest in the background"""
+        missing = []
+        for row in self.visible_rows():
+            url = self.batch_table.item(row, 1).text()
+            preview = self.preview_cache.get(url)
+            self.show_preview(row, preview)
+            if preview is None:
+                missing.append(url)
+        self.preview_resolver.want(missing)
+
+    def preview_resolved(self, url):
+        if self.plan_active and not self.plan_resolve_timer.isActive():
+            self.plan_resolve_timer.start()
+        preview = self.preview_cache.peek(url)
+        for row in self.visible_rows():
+            if self.batch_table.item(row, 1).text() == url:
+                self.show_preview(row, preview)
+
+    def show_preview(self, row, preview):
+        if preview is None:
+            cells = ["…", "", "", ""]
+        elif preview.get('error'):
+            cells = [f"⚠️ {preview['error']}", "", "", ""]
+        else:
+            size = preview['sizes'].get(self.quality_combo.currentText())
+            cells = [preview['title'], preview['channel'], str(preview['videos']),
+                     f"~{format_bytes(size)}" if size else "—"]
+        for column, text in enumerate(cells, 5):
+            cell = QTableWidgetItem(text)
+            cell.setToolTip(text)
+            self.batch_table.setItem(row, column, cell)
+
+    def plan_batch(self):
+        """Plan the batch, looking up previews of the items that have none"""
+        self.plan_active = True
+        self.plan_pin = True
+        self.update_plan()
+
+    def update_plan(self):
+        if not self.plan_active:
+            return
+        if self.plan_thread:
+            self.plan_resolve_timer.start()  # Try again once this one is done
+            return
+        running = self.download_thread is not None and self.download_thread.isRunning()
+        self.plan_thread = PlanThread(self.queue, self.preview_cache, self.quality_combo.currentText(),
+                                      self.workers_spin.value(),
+                                      self.download_thread.live_rate() if running else None)
+        self.plan_thread.plan_signal.connect(self.show_plan)
+        self.plan_thread.start()
+
+    def show_plan(self, plan):
+        self.plan_thread.wait()
+        self.plan_thread = None
+        if 'error' in plan:
+            self.plan_label.setText(f"Plan: ⚠️ {plan['error']}")
+            return
+        if self.plan_pin and plan['missing']:
+            self.preview_resolver.pin(plan['missing'])
+        self.plan_pin = False
+
+        if not plan['items']:
+            self.plan_label.setText("Plan: nothing left to download")
+            return
+        text = f"Plan: {plan['items']} item(s) left"
+        if plan['sized']:
+            text += f", ~{format_bytes(plan['bytes'])}"
+            if plan['seconds'] is not None:
+                finish = datetime.fromtimestamp(time.time() + plan['seconds'])
+                text += f", ETA {format_duration(plan['seconds'])} (done ~{finish.strftime('%a %H:%M')})"
+            else:
+                text += ", ETA unknown until a first download finishes"
+        if plan['sized'] < plan['items']:
+            text += f" | {plan['sized']} sized"
+            if plan['missing']:
+                text += f", {len(plan['missing'])} being looked up"
+        self.plan_label.setText(text)
+
+    def set_queue_editable(self, editable):
+        for widget in (self.add_btn, self.remove_btn, self.clear_batch_btn, self.load_batch_btn,
+                       self.import_btn):
+            widget.setEnabled(editable)
+
+    def import_urls(self):
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Import URLs", "",
+            "URL Lists (*.txt *.csv *.jsonl *.ndjson);;All Files (*)"
+        )
+        if not filename:
+            return
+
+        # Rows without their own folder go to the folder in "Output Folder"
+        self.set_queue_editable(False)
+        self.start_btn.setEnabled(False)
+        cookie_profiles = self.cookie_specs()
+        self.import_thread = ImportThread(filename, self.queue, self.dir_input.text().strip(),
+                                          self.archive_check.isChecked(),
+                                          CookiePool(cookie_profiles) if cookie_profiles else None)
+        self.import_thread.log_signal.connect(self.log_message)
+        self.import_thread.finished_signal.connect(self.import_finished)
+        self.import_thread.start()
+
+    def import_finished(self, success, message):
+        self.import_thread.wait()
+        self.import_thread = None
+        self.set_queue_editable(True)
+        self.start_btn.setEnabled(True)
+        self.show_page(len(self.queue) - 1)
+        if success:
+            self.log_message(f"✅ Import done: {message}")
+            self.statusBar().showMessage(f"Imported | Total items: {len(self.queue)}")
+        else:
+            self.log_message(f"❌ Import failed: {message}")
+            QMessageBox.critical(self, "Import Error", f"Failed to import URLs:\n{message}")
+
     def save_batch(self):
-        if not self.batch_items:
+        if not len(self.queue):
             QMessageBox.warning(self, "Save Error", "No items in batch to save")
             return
 
@@ -415,9 +5876,27 @@ class YouTubeBatcherGUI(QMainWindow):
         if filename:
             try:
                 batch_data = {
-                    'items': self.batch_items,
+                    'items': list(self.queue.items()),
                     'quality': self.quality_combo.currentText(),
+                    'speech_format': self.speech_format_combo.currentText(),
                     'use_archive': self.archive_check.isChecked(),
+                    'workers': self.workers_spin.value(),
+                    'routes': self.route_specs(),
+                    'cookie_profiles': self.cookie_specs(),
+                    'prefetch': self.prefetch_spin.value(),
+                    'ranged_connections': self.ranged_spin.value(),
+                    'schedule': self.schedule_input.text().strip(),
+                    'recover_partials': self.recover_check.isChecked(),
+                    'partial_budget_gb': self.partial_budget_spin.value(),
+                    'scratch_dir': self.scratch_input.text().strip(),
+                    'scratch_cap_gb': self.scratch_cap_spin.value(),
+                    'shards': self.shards_check.isChecked(),
+                    'shard_size_mb': self.shard_size_spin.value(),
+                    'vad': self.vad_check.isChecked(),
+                    'verify': self.verify_check.isChecked(),
+                    'sidecars': self.sidecars_combo.currentText(),
+                    'budget_mode': self.budget_combo.currentText(),
+                    'budget_value': self.budget_spin.value(),
                     'created': datetime.now().isoformat()
                 }
 
@@ -439,18 +5918,10 @@ class YouTubeBatcherGUI(QMainWindow):
                 with open(filename, 'r') as f:
                     batch_data = json.load(f)
 
-                # Clear existing batch
-                self.batch_items.clear()
-                self.batch_table.setRowCount(0)
-
-                # Load items
-                for url, output_dir in batch_data['items']:
-                    self.batch_items.append((url, output_dir))
-                    row = self.batch_table.rowCount()
-                    self.batch_table.insertRow(row)
-                    self.batch_table.setItem(row, 0, QTableWidgetItem(str(row + 1)))
-                    self.batch_table.setItem(row, 1, QTableWidgetItem(url))
-                    self.batch_table.setItem(row, 2, QTableWidgetItem(output_dir))
+                # Replace the existing batch
+                self.queue.clear()
+                self.queue.add_items((url, output_dir) for url, output_dir in batch_data['items'])
+                self.show_page(0)
 
                 # Load settings
                 if 'quality' in batch_data:
@@ -458,54 +5929,248 @@ class YouTubeBatcherGUI(QMainWindow):
                     if index >= 0:
                         self.quality_combo.setCurrentIndex(index)
 
+                if 'speech_format' in batch_data:
+                    index = self.speech_format_combo.findText(batch_data['speech_format'])
+                    if index >= 0:
+                        self.speech_format_combo.setCurrentIndex(index)
+
                 if 'use_archive' in batch_data:
                     self.archive_check.setChecked(batch_data['use_archive'])
 
-                QMessageBox.information(self, "Success", f"Loaded {len(self.batch_items)} items from {filename}")
-                self.log_message(f"📂 Batch loaded: {filename} ({len(self.batch_items)} items)")
+                if 'workers' in batch_data:
+                    self.workers_spin.setValue(batch_data['workers'])
+
+                if 'recover_partials' in batch_data:
+                    self.recover_check.setChecked(batch_data['recover_partials'])
+
+                if 'partial_budget_gb' in batch_data:
+                    self.partial_budget_spin.setValue(batch_data['partial_budget_gb'])
+
+                if 'scratch_dir' in batch_data:
+                    self.scratch_input.setText(batch_data['scratch_dir'])
+
+                if 'scratch_cap_gb' in batch_data:
+                    self.scratch_cap_spin.setValue(batch_data['scratch_cap_gb'])
+
+                if 'shards' in batch_data:
+                    self.shards_check.setChecked(batch_data['shards'])
+
+                if 'shard_size_mb' in batch_data:
+                    self.shard_size_spin.setValue(batch_data['shard_size_mb'])
+
+                if 'vad' in batch_data and np is not None:
+                    self.vad_check.setChecked(batch_data['vad'])
+
+                if 'verify' in batch_data:
+                    self.verify_check.setChecked(batch_data['verify'])
+
+                if 'sidecars' in batch_data:
+                    index = self.sidecars_combo.findText(batch_data['sidecars'])
+                    if index >= 0:
+                        self.sidecars_combo.setCurrentIndex(index)
+
+                if 'budget_mode' in batch_data:
+                    index = self.budget_combo.findText(batch_data['budget_mode'])
+                    if index >= 0:
+                        self.budget_combo.setCurrentIndex(index)
+
+                if 'budget_value' in batch_data:
+                    self.budget_spin.setValue(batch_data['budget_value'])
+
+                if 'schedule' in batch_data:
+                    self.schedule_input.setText(batch_data['schedule'])
+
+                if 'prefetch' in batch_data:
+                    self.prefetch_spin.setValue(batch_data['prefetch'])
+
+                if 'ranged_connections' in batch_data:
+                    self.ranged_spin.setValue(batch_data['ranged_connections'])
+
+                if 'routes' in batch_data:
+                    self.routes_input.setText(', '.join(batch_data['routes']))
+
+                if 'cookie_profiles' in batch_data:
+                    self.cookies_input.setText(', '.join(batch_data['cookie_profiles']))
+
+                QMessageBox.information(self, "Success", f"Loaded {len(self.queue)} items from {filename}")
+                self.log_message(f"📂 Batch loaded: {filename} ({len(self.queue)} items)")
 
             except Exception as e:
                 QMessageBox.critical(self, "Load Error", f"Failed to load batch: {str(e)}")
 
     def start_batch(self):
-        if not self.batch_items:
+        if not len(self.queue):
             QMessageBox.warning(self, "Batch Error", "No items in batch queue")
             return
 
+        try:
+            schedule = BandwidthSchedule(self.schedule_input.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Schedule Error", str(e))
+            return
+
+        budget = FormatBudget(self.budget_combo.currentText(), self.budget_spin.value())
+
         # Start batch download
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
-        self.add_btn.setEnabled(False)
+        self.pause_btn.setEnabled(True)
+        self.pause_item_btn.setEnabled(True)
+        self.set_queue_editable(False)
         self.progress_bar.setValue(0)
+        already_done = self.queue.prepare_run()
+
+        routes = self.route_specs()
+        cookie_profiles = self.cookie_specs()
+
+        # Persist this run's output; the log view tails run.log from here on
+        self.poll_run_log()
+        run_dir = os.path.join(LOG_DIR, datetime.now().strftime('%Y%m%d-%H%M%S'))
+        self.run_log = RunLogWriter(run_dir)
+        self.run_log.start()
+        self.log_tail = FileTail(self.run_log.run_log_path)
+        self.tail_timer.start()
 
         self.download_thread = BatchDownloadThread(
-            batch_items=self.batch_items.copy(),
+            batch_items=None,
             quality=self.quality_combo.currentText(),
-            use_archive=self.archive_check.isChecked()
+            use_archive=self.archive_check.isChecked(),
+            run_log=self.run_log,
+            workers=self.workers_spin.value(),
+            egress_pool=EgressPool(routes) if routes else None,
+            cookie_pool=CookiePool(cookie_profiles) if cookie_profiles else None,
+            prefetch_depth=self.prefetch_spin.value(),
+            item_queue=SqliteBatchQueue(),  # Own connection for the engine's threads
+            schedule=schedule or None,
+            recover_partials=self.recover_check.isChecked(),
+            partial_budget=self.partial_budget_spin.value() * 1024 ** 3,
+            speech_format=self.speech_format_combo.currentText(),
+            shard_bytes=self.shard_size_spin.value() * 1024 ** 2 if self.shards_check.isChecked() else 0,
+            detect_speech=self.vad_check.isChecked(),
+            verify=self.verify_check.isChecked(),
+            sidecars=self.sidecars_combo.currentText(),
+            ranged_connections=self.ranged_spin.value(),
+            profiler=RunProfiler(os.path.basename(run_dir)) if self.profile_check.isChecked() else None,
+            budget=budget or None,
+            scratch_dir=self.scratch_input.text().strip(),
+            scratch_cap=self.scratch_cap_spin.value() * 1024 ** 3
         )
 
-        self.download_thread.log_signal.connect(self.log_message)
+        if self.download_thread.profiler:
+            self.download_thread.probe_signal.connect(self.download_thread.profiler.signal_delivered)
+            self.download_thread.profiler.start()
         self.download_thread.progress_signal.connect(self.update_progress)
         self.download_thread.item_progress_signal.connect(self.update_item_progress)
         self.download_thread.finished_signal.connect(self.batch_finished)
         self.download_thread.start()
+        self.refresh_queue_table()
+        self.queue_timer.start()
+        self.plan_active = True
+        self.plan_timer.start()
+        self.update_plan()
 
         self.log_message(f"\n{'='*70}")
         self.log_message(f"🚀 Batch started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        self.log_message(f"Total items: {len(self.batch_items)}")
+        self.log_message(f"Total items: {len(self.queue)}")
+        if already_done:
+            self.log_message(f"Resuming: {already_done} item(s) already done in an earlier run")
         self.log_message(f"Quality: {self.quality_combo.currentText()}")
+        if self.quality_combo.currentText() == SPEECH_QUALITY:
+            self.log_message(f"Speech audio: {self.speech_format_combo.currentText()}, "
+                             f"{SPEECH_SAMPLE_RATE} Hz mono, {CONVERT_WORKERS} conversions in parallel")
         self.log_message(f"Archive: {'Enabled' if self.archive_check.isChecked() else 'Disabled'}")
+        self.log_message(f"Workers: {self.workers_spin.value()}")
+        self.log_message(f"Look-ahead: {self.prefetch_spin.value() or 'Off'}")
+        if self.ranged_spin.value() > 1:
+            self.log_message(f"Ranged downloads: {self.ranged_spin.value()} connections per file")
+        if self.verify_check.isChecked():
+            self.log_message(f"Verify: on ({VERIFY_WORKERS} files at once)")
+        if not self.shards_check.isChecked() and self.sidecars_combo.currentIndex() > 0:
+            self.log_message(f"Sidecars: {self.sidecars_combo.currentText()}")
+        if budget:
+            self.log_message(f"Budget: {budget}")
+        if self.scratch_input.text().strip():
+            cap = self.scratch_cap_spin.value()
+            self.log_message(f"Scratch: {self.scratch_input.text().strip()} "
+                             f"({f'{cap} GB cap' if cap else 'no cap'}, {MOVE_WORKERS} movers)")
+        if routes:
+            self.log_message(f"Egress routes: {', '.join(routes)}")
+        if cookie_profiles:
+            self.log_message(f"Cookie profiles: {', '.join(cookie_profiles)}")
+        if schedule:
+            self.log_message(f"Schedule: {self.schedule_input.text().strip()}")
+        self.log_message(f"Log: {run_dir}")
+        if self.download_thread.profiler:
+            self.log_message(f"Profiling: {self.download_thread.profiler.directory}")
         self.log_message(f"{'='*70}\n")
 
+    def quality_changed(self, quality):
+        self.speech_format_combo.setEnabled(quality == SPEECH_QUALITY)
+        self.refresh_queue_table()  # Size estimates depend on the quality
+        self.update_plan()
+
+    def route_specs(self):
+        return [spec.strip() for spec in self.routes_input.text().split(',') if spec.strip()]
+
+    def cookie_specs(self):
+        return [spec.strip() for spec in self.cookies_input.text().split(',') if spec.strip()]
+
+    def cookie_profiles_changed(self):
+        """Queue previews use the cookie profiles the downloads will use"""
+        specs = self.cookie_specs()
+        self.preview_resolver.cookie_pool = CookiePool(specs) if specs else None
+
     def stop_batch(self):
         if self.download_thread:
             self.log_message("\n⏹️  Stopping batch...")
             self.download_thread.stop()
 
+    def toggle_pause(self):
+        if not self.download_thread:
+            return
+        if self.download_thread.paused:
+            self.download_thread.resume()
+            self.pause_btn.setText("⏸️  Pause")
+            self.statusBar().showMessage("Batch resumed")
+        else:
+            self.download_thread.pause()
+            self.pause_btn.setText("▶️  Resume")
+            self.statusBar().showMessage("Batch paused")
+        self.refresh_queue_table()
+
+    def toggle_item_pause(self):
+        if not self.download_thread:
+            return
+        rows = sorted(set(cell.row() for cell in self.batch_table.selectedItems()))
+        running = [int(self.batch_table.item(row, 0).text()) for row in rows
+                   if self.batch_table.item(row, 3).text() in ('running', 'paused')]
+        if not running:
+            QMessageBox.warning(self, "Selection Error", "Please select a running item")
+            return
+        for item in running:
+            if self.download_thread.is_suspended(item):
+                self.download_thread.resume_item(item)
+            else:
+                self.download_thread.pause_item(item)
+        self.refresh_queue_table()
+
     def batch_finished(self, success, message):
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
-        self.add_btn.setEnabled(True)
+        self.pause_btn.setEnabled(False)
+        self.pause_btn.setText("⏸️  Pause")
+        self.pause_item_btn.setEnabled(False)
+        self.set_queue_editable(True)
+        self.queue_timer.stop()
+        self.plan_timer.stop()
+        self.refresh_queue_table()
+
+        # run() has emitted its last signal; let it return before cleaning up
+        self.download_thread.wait()
+        self.download_thread.item_queue.close()
+        self.update_plan()
+        if self.download_thread.profiler:
+            self.log_message(f"🔬 Profile written to {self.download_thread.profiler.dump()}")
 
         self.log_message(f"\n{'='*70}")
         if success:
@@ -517,6 +6182,10 @@ class YouTubeBatcherGUI(QMainWindow):
             self.statusBar().showMessage(f"Batch stopped: {message}")
         self.log_message(f"{'='*70}\n")
 
+        # Writer flushes and exits; the tail timer drains what is left
+        if self.run_log:
+            self.run_log.close()
+
     def update_progress(self, current, total):
         if total > 0:
             percentage = int((current / total) * 100)
@@ -527,14 +6196,84 @@ class YouTubeBatcherGUI(QMainWindow):
         self.progress_label.setText(status)
 
     def log_message(self, message):
-        self.log_output.append(message)
+        # During a run everything goes through the run log and is tailed back
+        if self.run_log and not self.run_log.closed:
+            self.run_log.write(message)
+        else:
+            self.append_log_lines([message])
+
+    def append_log_lines(self, lines):
+        for line in lines:
+            self.log_output.appendPlainText(line)
         self.log_output.moveCursor(QTextCursor.End)
 
+    def poll_run_log(self):
+        if not self.log_tail:
+            return
+        lines = self.log_tail.read_new()
+        if lines:
+            self.append_log_lines(lines)
+        elif self.run_log.closed and not self.run_log.is_alive():
+            self.tail_timer.stop()
+            self.run_log = None
+            self.log_tail = None
+
+    def view_logs(self):
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Open Run Log", LOG_DIR if os.path.isdir(LOG_DIR) else "",
+            "Log Files (*.log *.log.*.gz);;All Files (*)"
+        )
+        if filename:
+            LogViewerDialog(filename, self).exec_()
+
     def clear_log(self):
         self.log_output.clear()
 
+    def closeEvent(self, event):
+        self.preview_resolver.close()  # Don't hold the exit for pending previews
+        super().closeEvent(event)
+
 def main():
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="YouTube Batch Downloader - The Batcher")
+    parser.add_argument('--coordinator', metavar='BATCH',
+                        help="serve a saved batch (or URL list) to worker nodes instead of opening the GUI")
+    parser.add_argument('--expand', action='store_true',
+                        help="coordinator: split channels/playlists into one item per video")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="coordinator: address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=COORDINATOR_PORT,
+                        help=f"coordinator: port to listen on (default: {COORDINATOR_PORT})")
+    parser.add_argument('--worker', metavar='URL',
+                        help="run headless as a worker node of the coordinator at URL (http://host:port)")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="worker node: parallel downloads (default: from the batch)")
+    parser.add_argument('--name', help="worker node: name reported to the coordinator")
+    parser.add_argument('--scratch', default='', metavar='DIR',
+                        help="worker node: download into this local folder, then move files to their output folder")
+    parser.add_argument('--scratch-cap', type=int, default=SCRATCH_DEFAULT_CAP_GB, metavar='GB',
+                        help=f"worker node: scratch size before new downloads wait (default: {SCRATCH_DEFAULT_CAP_GB})")
+    parser.add_argument('--cookie-profiles', default='', metavar='SPECS',
+                        help="worker node: comma-separated browser profiles / cookies.txt files, one per worker "
+                             "(coordinator: used by --expand)")
+    parser.add_argument('--repack', metavar='FOLDER',
+                        help="compact every .info.json under FOLDER in place instead of opening the GUI")
+    parser.add_argument('--sidecars', choices=['trimmed', 'pack'], default='pack',
+                        help="repack: a trimmed .info.json.gz per file, or one pack per folder (default: pack)")
+    parser.add_argument('--token', default=os.environ.get('BATCHER_TOKEN', ''),
+                        help="shared secret between coordinator and nodes (or BATCHER_TOKEN)")
+    args, qt_args = parser.parse_known_args()
+
+    if args.repack:
+        repack_info_jsons(args.repack, SIDECAR_MODES[1] if args.sidecars == 'trimmed' else SIDECAR_MODES[2])
+        return
+    if args.coordinator:
+        run_coordinator(args)
+        return
+    if args.worker:
+        run_worker_node(args)
+        return
+
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')
 
     window = YouTubeBatcherGUI()
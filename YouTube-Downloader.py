@@ -8,20 +8,317 @@ Professional-grade YouTube downloader with all latest fixes
 - High-quality downloads with multiple format options
 - Download archive tracking
 - Real-time progress display
+- Harvest mode: info JSON, subtitles and thumbnails only, into a compact SQLite store
 """
 
 import sys
 import os
+import json
+import queue
+import shutil
+import signal
+import sqlite3
 import subprocess
 import threading
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                            QHBoxLayout, QLabel, QLineEdit, QPushButton,
-                           QTextEdit, QComboBox, QProgressBar, QGroupBox,
+                           QPlainTextEdit, QComboBox, QProgressBar, QGroupBox,
                            QCheckBox, QSpinBox, QMessageBox, QFileDialog)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QFont, QTextCursor
 
+# Harvest mode: metadata, subtitles and thumbnails only
+HARVEST_QUALITY = "Metadata + Subtitles Only"
+HARVEST_DB_NAME = 'harvest.db'
+HARVEST_WORKERS = 8                   # Parallel yt-dlp processes
+HARVEST_CHUNK = 25                    # Videos per yt-dlp process
+HARVEST_SUB_LANGS = 'en.*,.*-orig'    # English plus auto captions in the original language
+
+# Hide console windows of child processes (Windows only, 0 elsewhere)
+POPEN_FLAGS = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+# Child process supervision: every tool runs in its own process group so a
+# cancel also reaches the ffmpeg/aria2c processes yt-dlp starts
+STOP_GRACE_SECONDS = 3             # SIGTERM -> SIGKILL delay for a process group
+LINE_POLL_SECONDS = 0.2            # How often output readers check for a cancel
+LOG_MAX_LINES = 10000              # Lines kept in the log view (oldest are dropped)
+
+def spawn(cmd, **kwargs):
+    """subprocess.Popen in a new process group (console hidden on Windows)"""
+    if os.name == 'nt':
+        kwargs['creationflags'] = POPEN_FLAGS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+    return subprocess.Popen(cmd, **kwargs)
+
+def kill_tree(process, grace=STOP_GRACE_SECONDS):
+    """Terminate process and everything it started; never blocks the caller
+
+    POSIX: SIGTERM to the process group, SIGKILL to whatever is left after
+    grace seconds. Windows: taskkill /T /F on the process tree.
+    """
+    def reap():
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           creationflags=POPEN_FLAGS)
+            return
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(process.pid, sig)
+            except (ProcessLookupError, PermissionError):
+                return  # Group already gone
+            try:
+                process.wait(timeout=grace)
+            except subprocess.TimeoutExpired:
+                pass
+    threading.Thread(target=reap, name=f'reap-{process.pid}', daemon=True).start()
+
+def iter_lines(process, cancelled):
+    """Lines of process.stdout, ending within LINE_POLL_SECONDS of cancelled()
+
+    A reader thread drains the pipe so a silent child (long fragment
+    download, ffmpeg merge) cannot hold the caller past a cancel.
+    """
+    lines = queue.Queue()
+
+    def pump():
+        try:
+            for line in process.stdout:
+                lines.put(line)
+        except (OSError, ValueError):
+            pass  # Pipe closed under us
+        finally:
+            lines.put(None)
+
+    threading.Thread(target=pump, name=f'pipe-{process.pid}', daemon=True).start()
+    while not cancelled():
+        try:
+            line = lines.get(timeout=LINE_POLL_SECONDS)
+        except queue.Empty:
+            continue
+        if line is None:
+            return
+        yield line
+
+class HarvestStore:
+    """Compact SQLite store for harvested metadata (harvest.db per output folder)
+
+    Info JSON and subtitles are kept zlib-compressed, thumbnails as-is,
+    instead of thousands of loose files.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS videos (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            channel TEXT,
+            upload_date TEXT,
+            duration REAL,
+            webpage_url TEXT,
+            info BLOB NOT NULL,  -- zlib-compressed info JSON
+            harvested_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS subtitles (
+            video_id TEXT NOT NULL,
+            lang TEXT NOT NULL,
+            ext TEXT NOT NULL,
+            data BLOB NOT NULL,  -- zlib-compressed
+            PRIMARY KEY (video_id, lang, ext)
+        );
+        CREATE TABLE IF NOT EXISTS thumbnails (
+            video_id TEXT PRIMARY KEY,
+            ext TEXT NOT NULL,
+            data BLOB NOT NULL
+        );
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, HARVEST_DB_NAME)
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.executescript(self.SCHEMA)
+
+    def known_ids(self, ids):
+        """The IDs among ids that were already harvested"""
+        known = set()
+        ids = list(ids)
+        with self.lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self.db.execute(
+                    f"SELECT id FROM videos WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                known.update(row[0] for row in rows)
+        return known
+
+    def ingest(self, directory):
+        """Store and delete the files yt-dlp wrote as <id>.<...>; returns the video IDs"""
+        videos, subtitles, thumbnails = [], [], []
+        now = datetime.now().isoformat(timespec='seconds')
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            video_id, _, rest = name.partition('.')
+            if rest.endswith(('.part', '.temp', '.ytdl')):
+                continue  # Cut short by Stop
+            with open(path, 'rb') as f:
+                data = f.read()
+            if rest == 'info.json':
+                try:
+                    info = json.loads(data)
+                except ValueError:
+                    continue
+                videos.append((video_id, info.get('title'), info.get('channel') or info.get('uploader'),
+                               info.get('upload_date'), info.get('duration'), info.get('webpage_url'),
+                               zlib.compress(data, 9), now))
+            elif '.' in rest:
+                lang, _, ext = rest.rpartition('.')
+                subtitles.append((video_id, lang, ext, zlib.compress(data, 9)))
+            elif rest:
+                thumbnails.append((video_id, rest, data))
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?)", videos)
+            self.db.executemany("INSERT OR REPLACE INTO subtitles VALUES (?, ?, ?, ?)", subtitles)
+            self.db.executemany("INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?)", thumbnails)
+        shutil.rmtree(directory, ignore_errors=True)
+        return [video[0] for video in videos]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+class Harvester:
+    """Skip-download harvest of info JSON, subtitles and thumbnails
+
+    The URL is expanded flat into videos first; the videos not yet in the
+    output folder's HarvestStore are then fetched in chunks by several
+    yt-dlp processes at once, without the sleeps media downloads use.
+    """
+
+    def __init__(self, base_cmd, output_dir, log, progress=None, workers=HARVEST_WORKERS,
+                 throttle_pattern=None):
+        self.base_cmd = base_cmd  # yt-dlp plus cookies/network/extractor options
+        self.output_dir = output_dir
+        self.log = log
+        self.progress = progress or (lambda done, total: None)
+        self.workers = workers
+        self.throttle_pattern = throttle_pattern
+        self.throttled = False
+        self.stopped = False
+        self.processes = set()
+        self.lock = threading.Lock()
+        self.done = 0
+
+    def _popen(self, cmd):
+        process = spawn(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True
+        )
+        with self.lock:
+            self.processes.add(process)
+        return process
+
+    def _finish(self, process):
+        process.wait()
+        with self.lock:
+            self.processes.discard(process)
+        return process.returncode
+
+    def _check_line(self, line):
+        line = line.strip()
+        if line.startswith('ERROR') or line.startswith('WARNING: [youtube]'):
+            self.log(line)
+        if self.throttle_pattern and self.throttle_pattern.search(line):
+            self.throttled = True
+
+    def expand(self, url, limit=0):
+        """(video id, URL) of every video behind a channel/playlist/video URL"""
+        process = self._popen(self.base_cmd + [
+            '--flat-playlist', '--ignore-errors', '--print', '%(id)s\t%(webpage_url,url)s', url])
+        videos = []
+        for line in process.stdout:
+            video_id, tab, video_url = line.strip().partition('\t')
+            if tab and video_id != 'NA':
+                videos.append((video_id, video_url))
+            else:
+                self._check_line(line)
+        self._finish(process)
+        return videos[:limit] if limit else videos
+
+    def _harvest_chunk(self, store, chunk, total):
+        """(harvested, failed) videos of one chunk; both 0 when stopped before it started
+
+        Videos cut short by Stop don't count as failed. An error (e.g. an
+        unreadable file) fails this chunk only.
+        """
+        if self.stopped:
+            return 0, 0
+        temp_dir = os.path.join(self.output_dir, f'.harvest-{uuid.uuid4().hex[:8]}')
+        try:
+            harvested = len(self._fetch_chunk(store, chunk, temp_dir))
+        except Exception as e:
+            self.log(f"⚠️ Harvest of {len(chunk)} video(s) failed: {str(e)}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            harvested = 0
+        with self.lock:
+            self.done += len(chunk)
+            done = self.done
+        self.progress(done, total)
+        return harvested, 0 if self.stopped else len(chunk) - harvested
+
+    def _fetch_chunk(self, store, chunk, temp_dir):
+        os.makedirs(temp_dir)
+        process = self._popen(self.base_cmd + [
+            '--skip-download',
+            '--write-info-json',
+            '--write-subs', '--write-auto-subs', '--sub-langs', HARVEST_SUB_LANGS,
+            '--write-thumbnail',
+            '--no-write-playlist-metafiles',
+            '--ignore-errors',
+            '--no-abort-on-error',
+            '-o', os.path.join(temp_dir, '%(id)s.%(ext)s'),
+        ] + [video_url for _, video_url in chunk])
+        for line in process.stdout:
+            self._check_line(line)
+        self._finish(process)
+        return store.ingest(temp_dir)
+
+    def run(self, url, limit=0):
+        """Harvest everything behind url; returns (harvested, failed, skipped by Stop, already had)"""
+        self.log(f"🔎 Listing videos for harvest: {url}")
+        videos = self.expand(url, limit)
+        store = HarvestStore(self.output_dir)
+        try:
+            known = store.known_ids(video_id for video_id, _ in videos)
+            todo = [video for video in videos if video[0] not in known]
+            self.log(f"🗂️ {len(videos)} video(s), {len(known)} already harvested, {len(todo)} to fetch "
+                     f"({self.workers} parallel)")
+
+            chunks = [todo[start:start + HARVEST_CHUNK] for start in range(0, len(todo), HARVEST_CHUNK)]
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(lambda chunk: self._harvest_chunk(store, chunk, len(todo)),
+                                            chunks))
+        finally:
+            store.close()
+        harvested = sum(count for count, _ in results)
+        failed = sum(count for _, count in results)
+        return harvested, failed, len(todo) - harvested - failed, len(known)
+
+    def stop(self):
+        self.stopped = True
+        with self.lock:
+            processes = list(self.processes)
+        for process in processes:
+            kill_tree(process, grace=0)
+
 class YtdlpUpdateThread(QThread):
     """Thread to check and update yt-dlp"""
     update_signal = pyqtSignal(str)
@@ -79,6 +376,7 @@ class DownloadThread(QThread):
         self.use_archive = use_archive
         self.max_downloads = max_downloads
         self.process = None
+        self.harvester = None
         self.stopped = False
 
     def run(self):
@@ -86,6 +384,10 @@ class DownloadThread(QThread):
             # Create output directory
             os.makedirs(self.output_dir, exist_ok=True)
 
+            if self.quality == HARVEST_QUALITY:
+                self.harvest()
+                return
+
             # Build command with all latest fixes
             cmd = [
                 'yt-dlp',
@@ -130,7 +432,7 @@ class DownloadThread(QThread):
             self.log_signal.emit("")
 
             # Run download process
-            self.process = subprocess.Popen(
+            self.process = spawn(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
@@ -141,11 +443,8 @@ class DownloadThread(QThread):
             current_item = 0
             total_items = 0
 
-            # Read output line by line
-            for line in self.process.stdout:
-                if self.stopped:
-                    break
-
+            # Read output line by line; a stop ends the loop without waiting for output
+            for line in iter_lines(self.process, lambda: self.stopped):
                 line = line.strip()
                 if line:
                     self.log_signal.emit(line)
@@ -162,7 +461,8 @@ class DownloadThread(QThread):
                         except:
                             pass
 
-            self.process.wait()
+            if not self.stopped:
+                self.process.wait()  # stop() reaps the process group itself
 
             if self.stopped:
                 self.finished_signal.emit(False, "Download stopped by user")
@@ -175,15 +475,38 @@ class DownloadThread(QThread):
             self.log_signal.emit(f"❌ Error: {str(e)}")
             self.finished_signal.emit(False, str(e))
 
+    def harvest(self):
+        """Metadata-only run into the output folder's harvest.db"""
+        self.harvester = Harvester(
+            [
+                'yt-dlp',
+                '--cookies-from-browser', 'firefox',
+                '-4',  # Force IPv4
+                '--extractor-args', 'youtube:player_client=web_safari;player_js_version=actual',
+            ],
+            self.output_dir,
+            log=self.log_signal.emit,
+            progress=self.progress_signal.emit
+        )
+        harvested, failed, skipped, known = self.harvester.run(self.url, limit=self.max_downloads)
+
+        message = f"{harvested} harvested, {failed} failed, {known} already there"
+        if skipped:
+            message += f", {skipped} not fetched"
+        if self.stopped:
+            self.finished_signal.emit(False, f"Harvest stopped ({message})")
+        elif failed:
+            self.finished_signal.emit(False, f"Harvest finished with errors ({message})")
+        else:
+            self.finished_signal.emit(True, f"Harvest completed into {HARVEST_DB_NAME}! ({message})")
+
     def stop(self):
         """Stop the download process"""
         self.stopped = True
+        if self.harvester:
+            self.harvester.stop()
         if self.process:
-            self.process.terminate()
-            try:
-                self.process.wait(timeout=5)
-            except:
-                self.process.kill()
+            kill_tree(self.process)
 
 class YouTubeDownloaderGUI(QMainWindow):
     def __init__(self):
@@ -262,7 +585,8 @@ class YouTubeDownloaderGUI(QMainWindow):
             "Best (≤1080p)",
             "Best (≤720p)",
             "Best (≤480p)",
-            "Best Available"
+            "Best Available",
+            HARVEST_QUALITY
         ])
         options_layout.addWidget(self.quality_combo)
 
@@ -326,8 +650,9 @@ class YouTubeDownloaderGUI(QMainWindow):
         log_group = QGroupBox("Download Log")
         log_layout = QVBoxLayout()
 
-        self.log_output = QTextEdit()
+        self.log_output = QPlainTextEdit()
         self.log_output.setReadOnly(True)
+        self.log_output.setMaximumBlockCount(LOG_MAX_LINES)
         self.log_output.setFont(QFont("Menlo", 9))  # macOS monospace font
         log_layout.addWidget(self.log_output)
 
@@ -420,10 +745,11 @@ class YouTubeDownloaderGUI(QMainWindow):
         if total > 0:
             percentage = int((current / total) * 100)
             self.progress_bar.setValue(percentage)
-            self.progress_label.setText(f"Downloading: {current} / {total} videos ({percentage}%)")
+            action = "Harvesting" if self.quality_combo.currentText() == HARVEST_QUALITY else "Downloading"
+            self.progress_label.setText(f"{action}: {current} / {total} videos ({percentage}%)")
 
     def log_message(self, message):
-        self.log_output.append(message)
+        self.log_output.appendPlainText(message)
         self.log_output.moveCursor(QTextCursor.End)
 
     def clear_log(self):
@@ -0,0 +1,341 @@
+"""
+GUI responsiveness benchmark for The Batcher and the YouTube Downloader
+
+Replays yt-dlp output into the real windows, offscreen, at a configurable
+rate from several worker threads - the way log_signal / progress_signal fire
+during a big batch - and measures:
+
+  - event loop lag: how late a 5 ms timer on the GUI thread fires
+  - append cost: time spent adding log lines to the log view, per line
+  - memory growth: resident memory from after warm-up to the end
+
+Exits with code 1 when a result is over its threshold, so it can guard
+changes to the log and progress paths:
+
+    python benchmark-gui.py                       # both windows, 10 s each
+    python benchmark-gui.py --gui batcher --rate 5000 --seconds 30
+    python benchmark-gui.py --replay ~/.the-batcher/logs/20250101-120000/run.log
+"""
+
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import Qt, QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TICK_SECONDS = 0.01     # Worker threads emit in bursts this often
+LAG_TIMER_MS = 5        # Probe timer on the GUI thread
+EVENTS_SLICE_MS = 50    # Longest single processEvents() call, so a backlog can't hang the run
+WARMUP_SECONDS = 1.0    # Memory is measured from here on
+
+# Output of a typical yt-dlp run, replayed line by line unless --replay is given
+RECORDED_OUTPUT = [
+    "[youtube] Extracting URL: https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "[youtube] dQw4w9WgXcQ: Downloading webpage",
+    "[youtube] dQw4w9WgXcQ: Downloading tv client config",
+    "[youtube] dQw4w9WgXcQ: Downloading player 9c6dfc4a-main",
+    "[youtube] dQw4w9WgXcQ: Downloading web safari player API JSON",
+    "[youtube] dQw4w9WgXcQ: Downloading m3u8 information",
+    "[info] dQw4w9WgXcQ: Downloading 1 format(s): 18",
+    "[info] Writing video metadata as JSON to: Rick Astley - Never Gonna Give You Up.info.json",
+    "[download] Destination: Rick Astley - Never Gonna Give You Up.mp4",
+] + [
+    f"[download] {percent:5.1f}% of   12.34MiB at    {1.5 + percent / 40:.2f}MiB/s ETA 00:{59 - int(percent) * 59 // 100:02d}"
+    for percent in (x / 2 for x in range(201))
+] + [
+    "[download] 100% of   12.34MiB in 00:00:08 at 1.52MiB/s",
+    "[Merger] Merging formats into \"Rick Astley - Never Gonna Give You Up.mp4\"",
+    "Deleting original file Rick Astley - Never Gonna Give You Up.f137.mp4 (pass -k to keep)",
+]
+
+def use_temp_home():
+    """Point the home folder at a new temp folder; returns it
+
+    Called before the scripts are loaded: their app data (~/.the-batcher
+    queue, preview cache, catalog, run logs) is placed under the home
+    folder at import time, so the benchmark never opens the user's real
+    queue or starts lookups for what is in it.
+    """
+    home = tempfile.mkdtemp(prefix='gui-bench-home-')
+    os.environ['HOME'] = os.environ['USERPROFILE'] = home
+    return home
+
+def load_script(name):
+    """Import one of the GUI scripts by file name (they aren't packages)"""
+    path = os.path.join(HERE, name)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(name)[0].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def rss_bytes():
+    """Resident memory of this process (peak RSS where the current one isn't available)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return 0
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class Flood:
+    """Worker threads replaying lines into emit_line / emit_progress at a fixed total rate"""
+
+    def __init__(self, lines, rate, progress_rate, threads, emit_line, emit_progress):
+        self.lines = lines
+        self.rate = rate
+        self.progress_rate = progress_rate
+        self.threads = threads
+        self.emit_line = emit_line
+        self.emit_progress = emit_progress
+        self.stopped = threading.Event()
+        self.sent = 0
+        self.lock = threading.Lock()
+        self.workers = []
+
+    def start(self):
+        for n in range(self.threads):
+            worker = threading.Thread(target=self._run, args=(n + 1,), daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        self.stopped.set()
+        for worker in self.workers:
+            worker.join()
+
+    def _run(self, worker):
+        # Fractional carry keeps the average rate exact at any rate / thread count
+        line_carry = progress_carry = 0.0
+        position = worker * 37  # Threads start at different points of the recording
+        progress = 0
+        next_tick = time.perf_counter()
+        while not self.stopped.is_set():
+            line_carry += self.rate * TICK_SECONDS / self.threads
+            progress_carry += self.progress_rate * TICK_SECONDS / self.threads
+            count = int(line_carry)
+            line_carry -= count
+            for _ in range(count):
+                self.emit_line(self.lines[position % len(self.lines)], worker)
+                position += 1
+            updates = int(progress_carry)
+            progress_carry -= updates
+            for _ in range(updates):
+                progress = (progress + 1) % 1000
+                self.emit_progress(progress, 1000)
+            with self.lock:
+                self.sent += count
+
+            next_tick += TICK_SECONDS
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()  # Behind: don't try to catch up in one burst
+
+class Probe:
+    """Measures GUI thread lag and the time spent in wrapped methods"""
+
+    def __init__(self, app):
+        self.app = app
+        self.lags = []
+        self.append_calls = []  # (seconds, lines) per call
+        self.memory = []  # (seconds since start, RSS bytes)
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(LAG_TIMER_MS)
+        self.timer.timeout.connect(self._tick)
+        self.last = None
+        self.started = None
+
+    def wrap(self, obj, name, lines_of):
+        """Replace obj.name by a timed version; lines_of(args) gives the lines it appends"""
+        original = getattr(obj, name)
+
+        def timed(*args):
+            started = time.perf_counter()
+            result = original(*args)
+            self.append_calls.append((time.perf_counter() - started, lines_of(args)))
+            return result
+        setattr(obj, name, timed)
+        return timed
+
+    def start(self):
+        self.started = self.last = time.perf_counter()
+        self.timer.start()
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.lags.append(max(0.0, now - self.last - LAG_TIMER_MS / 1000))
+        self.last = now
+        elapsed = now - self.started
+        if not self.memory or elapsed - self.memory[-1][0] >= 0.5:
+            self.memory.append((elapsed, rss_bytes()))
+
+    def run_for(self, seconds):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            self.app.processEvents(QEventLoop.AllEvents, EVENTS_SLICE_MS)
+            time.sleep(0.0005)  # Idle like exec_() would, instead of spinning
+
+    def stop(self):
+        self.timer.stop()
+
+    def results(self):
+        seconds = sum(call[0] for call in self.append_calls)
+        lines = sum(call[1] for call in self.append_calls)
+        warm = [rss for at, rss in self.memory if at >= WARMUP_SECONDS]
+        return {
+            'lag_p50_ms': percentile(self.lags, 0.5) * 1000,
+            'lag_p95_ms': percentile(self.lags, 0.95) * 1000,
+            'lag_max_ms': max(self.lags, default=0.0) * 1000,
+            'appended': lines,
+            'append_us_per_line': seconds / lines * 1e6 if lines else 0.0,
+            'append_p95_ms': percentile([call[0] for call in self.append_calls], 0.95) * 1000,
+            'memory_growth_mb': (warm[-1] - warm[0]) / 1024 ** 2 if len(warm) > 1 else 0.0,
+        }
+
+def bench_batcher(app, args, lines):
+    """The Batcher: engine lines go through the run log and are tailed into the view"""
+    batcher = load_script('YouTube-Batcher-Windows.py' if sys.platform == 'win32' else 'YouTube-Batcher.py')
+    window = batcher.YouTubeBatcherGUI()
+    window.show()
+    probe = Probe(app)
+    probe.wrap(window, 'append_log_lines', lambda call: len(call[0]))
+
+    # What start_batch() sets up, minus the downloads
+    run_dir = tempfile.mkdtemp(prefix='batcher-bench-', dir=os.path.expanduser('~'))  # The temp home
+    window.run_log = batcher.RunLogWriter(run_dir)
+    window.run_log.start()
+    window.log_tail = batcher.FileTail(window.run_log.run_log_path)
+    window.tail_timer.start()
+    engine = batcher.BatchDownloadThread([], "Best (≤1080p)", True, run_log=window.run_log,
+                                         workers=args.threads)
+    engine.progress_signal.connect(window.update_progress)
+    engine.item_progress_signal.connect(window.update_item_progress)
+
+    def progress(current, total):
+        engine.progress_signal.emit(current, total)
+        engine.item_progress_signal.emit(f"Downloading item {current}/{total}...")
+
+    results = run_flood(app, probe, args, lines, engine.log, progress)
+    window.run_log.close()
+    window.close()
+    return results
+
+def bench_downloader(app, args, lines):
+    """The single-video Downloader: every line is appended as its signal arrives"""
+    downloader = load_script('YouTube-Downloader.py')
+    window = downloader.YouTubeDownloaderGUI()
+    window.show()
+    probe = Probe(app)
+    probe.wrap(window, 'log_message', lambda call: 1)
+
+    thread = downloader.DownloadThread('', tempfile.gettempdir(), "Best (≤1080p)", True, 0)
+    thread.log_signal.connect(window.log_message)
+    thread.progress_signal.connect(window.update_progress)
+
+    results = run_flood(app, probe, args, lines,
+                        lambda line, worker: thread.log_signal.emit(line), thread.progress_signal.emit)
+    window.close()
+    return results
+
+def run_flood(app, probe, args, lines, emit_line, emit_progress):
+    flood = Flood(lines, args.rate, args.progress_rate, args.threads, emit_line, emit_progress)
+    probe.start()
+    flood.start()
+    try:
+        probe.run_for(args.seconds)
+    finally:
+        flood.stop()
+    probe.run_for(1.0)  # Let queued signals and the last tail poll land
+    probe.stop()
+    results = probe.results()
+    results['sent'] = flood.sent
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Offscreen GUI responsiveness benchmark")
+    parser.add_argument('--gui', choices=['batcher', 'downloader', 'both'], default='both')
+    parser.add_argument('--rate', type=int, default=2000, help="log lines per second (default: 2000)")
+    parser.add_argument('--progress-rate', type=int, default=1000,
+                        help="progress updates per second (default: 1000)")
+    parser.add_argument('--threads', type=int, default=4, help="emitting worker threads (default: 4)")
+    parser.add_argument('--seconds', type=float, default=10, help="flood duration per window (default: 10)")
+    parser.add_argument('--replay', metavar='FILE', help="replay this yt-dlp output / run.log instead")
+    parser.add_argument('--max-lag-ms', type=float, default=50,
+                        help="fail when the 95th percentile event loop lag is higher (default: 50)")
+    parser.add_argument('--max-append-us', type=float, default=200,
+                        help="fail when appending costs more per line (default: 200)")
+    parser.add_argument('--max-behind', type=float, default=1,
+                        help="fail when more percent of the lines are still queued after the flood (default: 1)")
+    parser.add_argument('--max-growth-mb', type=float, default=100,
+                        help="fail when memory grows more during the flood (default: 100)")
+    args = parser.parse_args()
+
+    lines = RECORDED_OUTPUT
+    if args.replay:
+        with open(args.replay, encoding='utf-8', errors='replace') as f:
+            lines = [line.rstrip('\r\n') for line in f if line.strip()] or RECORDED_OUTPUT
+
+    home = use_temp_home()
+    app = QApplication(sys.argv[:1])
+    app.setStyle('Fusion')
+
+    benches = {'batcher': bench_batcher, 'downloader': bench_downloader}
+    names = list(benches) if args.gui == 'both' else [args.gui]
+    print(f"Flooding {args.rate} lines/s and {args.progress_rate} progress updates/s "
+          f"from {args.threads} threads for {args.seconds:g} s per window\n")
+
+    try:
+        runs = [(name, benches[name](app, args, lines)) for name in names]
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    failures = []
+    for name, results in runs:
+        print(f"{name}:")
+        print(f"  lines sent / appended   {results['sent']} / {results['appended']}")
+        print(f"  event loop lag          p50 {results['lag_p50_ms']:.1f} ms, "
+              f"p95 {results['lag_p95_ms']:.1f} ms, max {results['lag_max_ms']:.1f} ms")
+        print(f"  append cost             {results['append_us_per_line']:.1f} µs/line, "
+              f"p95 {results['append_p95_ms']:.2f} ms per call")
+        print(f"  memory growth           {results['memory_growth_mb']:.1f} MB\n")
+        behind = (results['sent'] - results['appended']) * 100 / max(results['sent'], 1)
+        checks = [
+            ('lines not shown', behind, args.max_behind, '%'),
+            ('event loop lag p95', results['lag_p95_ms'], args.max_lag_ms, 'ms'),
+            ('append cost', results['append_us_per_line'], args.max_append_us, 'µs/line'),
+            ('memory growth', results['memory_growth_mb'], args.max_growth_mb, 'MB'),
+        ]
+        failures.extend(f"{name}: {label} {value:.1f} {unit} > {limit:g} {unit}"
+                        for label, value, limit, unit in checks if value > limit)
+
+    if failures:
+        print("FAIL")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("PASS")
+
+if __name__ == '__main__':
+    main()
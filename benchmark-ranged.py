@@ -0,0 +1,202 @@
+"""
+Ranged download benchmark for The Batcher
+
+Serves a generated file from a local HTTP server that honours Range
+requests and caps every connection's speed (the way media servers pace a
+single stream), then fetches it:
+
+  - over one connection with a plain GET (what yt-dlp does for a
+    single-file format)
+  - with RangedDownloader over each of the given connection counts
+
+Every copy is checked against the file's SHA-256. A small share of range
+responses is cut short on purpose, so the per-range retries are part of
+the measurement. Exits with code 1 when a copy is corrupt or the most
+connections aren't --min-speedup times faster than one:
+
+    python benchmark-ranged.py                              # 64 MB at 4 MB/s per connection
+    python benchmark-ranged.py --size-mb 256 --connections 2,4,8,16
+    python benchmark-ranged.py --per-connection-mbps 0 --min-speedup 0   # unthrottled, report only
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SEND_BYTES = 64 * 1024  # Server write size (and throttle granularity)
+
+def load_script(name):
+    """Import one of the GUI scripts by file name (they aren't packages)"""
+    path = os.path.join(HERE, name)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(name)[0].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """GET with optional single Range, paced per connection"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so a connection serves many ranges
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        data = self.server.data
+        size = len(data)
+        start, end = 0, size - 1
+        match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            if start >= size or start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+
+        # Drop some range responses halfway, like a flaky CDN edge
+        cut = None
+        if match and end > start and random.random() < self.server.fail_rate:
+            cut = start + (end - start) // 2
+
+        rate = self.server.per_connection_bytes
+        began = time.perf_counter()
+        sent = 0
+        position = start
+        while position <= end:
+            if cut is not None and position >= cut:
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            chunk = data[position:min(position + SEND_BYTES, end + 1)]
+            try:
+                self.wfile.write(chunk)
+            except OSError:
+                return  # Client went away (stopped or gave up on the range)
+            position += len(chunk)
+            sent += len(chunk)
+            if rate:
+                ahead = sent / rate - (time.perf_counter() - began)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+class RangeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, data, per_connection_bytes, fail_rate):
+        super().__init__(('127.0.0.1', 0), RangeHandler)
+        self.data = data
+        self.per_connection_bytes = per_connection_bytes
+        self.fail_rate = fail_rate
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/video.mp4'
+
+def sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def fetch_single(url, path):
+    """Plain GET over one connection; returns seconds"""
+    started = time.perf_counter()
+    with urllib.request.urlopen(url) as response, open(path, 'wb') as f:
+        shutil.copyfileobj(response, f, SEND_BYTES)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranged download benchmark against a local range server")
+    parser.add_argument('--size-mb', type=int, default=64, help="size of the served file (default: 64)")
+    parser.add_argument('--per-connection-mbps', type=float, default=4,
+                        help="server speed cap per connection in MB/s, 0 = none (default: 4)")
+    parser.add_argument('--connections', default='4,8',
+                        help="comma-separated connection counts to try (default: 4,8)")
+    parser.add_argument('--part-mb', type=float, default=None,
+                        help="range size in MB (default: the app's RANGED_PART_BYTES)")
+    parser.add_argument('--fail-rate', type=float, default=0.02,
+                        help="share of range responses cut short (default: 0.02)")
+    parser.add_argument('--min-speedup', type=float, default=2,
+                        help="fail when the most connections aren't this many times faster than one "
+                             "(default: 2, 0 = report only)")
+    args = parser.parse_args()
+
+    batcher = load_script('YouTube-Batcher.py')
+    connection_counts = [int(count) for count in args.connections.split(',') if count.strip()]
+    part_bytes = int(args.part_mb * 1024 ** 2) if args.part_mb else batcher.RANGED_PART_BYTES
+    size = args.size_mb * 1024 ** 2
+
+    data = os.urandom(size)
+    expected = hashlib.sha256(data).hexdigest()
+    server = RangeServer(data, int(args.per_connection_mbps * 1024 ** 2), args.fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    cap = f"{args.per_connection_mbps:g} MB/s per connection" if args.per_connection_mbps else "no speed cap"
+    print(f"Serving {args.size_mb} MB ({cap}, {args.fail_rate:.0%} of ranges cut short) "
+          f"in {part_bytes / 1024 ** 2:g} MB ranges\n")
+
+    failures = []
+    rates = {}
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'single.mp4')
+        seconds = fetch_single(server.url, path)
+        rates[1] = size / seconds
+        print(f"   1 connection  (plain GET)  {seconds:6.2f} s  {rates[1] / 1024 ** 2:7.1f} MB/s")
+        if sha256_of(path) != expected:
+            failures.append("plain GET: corrupt copy")
+
+        for count in connection_counts:
+            path = os.path.join(folder, f'ranged-{count}.mp4')
+            downloader = batcher.RangedDownloader(server.url, path, count, part_bytes=part_bytes)
+            try:
+                stats = downloader.download()
+            except Exception as e:
+                failures.append(f"{count} connections: {e}")
+                print(f"  {count:2d} connections (ranged)     failed: {e}")
+                continue
+            rates[count] = size / stats['seconds']
+            print(f"  {count:2d} connections (ranged)     {stats['seconds']:6.2f} s  "
+                  f"{rates[count] / 1024 ** 2:7.1f} MB/s  x{rates[count] / rates[1]:.1f}  "
+                  f"{stats['retries']} range retries")
+            if sha256_of(path) != expected:
+                failures.append(f"{count} connections: corrupt copy")
+    server.shutdown()
+
+    most = max(connection_counts, default=1)
+    if args.min_speedup and most in rates and rates[most] < rates[1] * args.min_speedup:
+        failures.append(f"{most} connections only x{rates[most] / rates[1]:.1f} "
+                        f"the speed of one (< x{args.min_speedup:g})")
+
+    print()
+    if failures:
+        print("FAIL")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("PASS")
+
+if __name__ == '__main__':
+    main()
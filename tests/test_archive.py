@@ -0,0 +1,62 @@
+"""Download archive helpers: lookups, removing an entry, and appends racing the rewrite"""
+
+import importlib.util
+import multiprocessing
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def load_script(name):
+    """Import one of the GUI scripts by file name (they aren't packages)"""
+    path = os.path.join(HERE, '..', name)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(name)[0].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+batcher = load_script('YouTube-Batcher.py')
+
+def write_archive(folder, text):
+    (folder / 'download_archive.txt').write_text(text, encoding='utf-8')
+
+def read_archive(folder):
+    return (folder / 'download_archive.txt').read_text(encoding='utf-8')
+
+def test_remove_entry(tmp_path):
+    write_archive(tmp_path, "youtube aaa\nyoutube bbb\nyoutube ccc\n")
+    assert batcher.in_archive(str(tmp_path), 'youtube bbb')
+    assert batcher.remove_archive_entry(str(tmp_path), 'youtube bbb')
+    assert read_archive(tmp_path) == "youtube aaa\nyoutube ccc\n"
+    assert not batcher.in_archive(str(tmp_path), 'youtube bbb')
+
+def test_remove_missing_entry_or_archive(tmp_path):
+    assert not batcher.remove_archive_entry(str(tmp_path), 'youtube aaa')
+    write_archive(tmp_path, "youtube aaa\n")
+    assert not batcher.remove_archive_entry(str(tmp_path), 'youtube zzz')
+    assert read_archive(tmp_path) == "youtube aaa\n"
+
+def append_like_ytdlp(path, count):
+    """Append the way yt-dlp records a download: one locked append per line"""
+    for n in range(count):
+        with open(path, 'a', encoding='utf-8') as f, batcher.archive_lock(f):
+            f.write(f"youtube keep{n}\n")
+        with open(path, 'a', encoding='utf-8') as f, batcher.archive_lock(f):
+            f.write(f"youtube drop{n}\n")
+
+def test_appends_during_removals_are_kept(tmp_path):
+    write_archive(tmp_path, "")
+    count = 300
+    appender = multiprocessing.Process(target=append_like_ytdlp,
+                                       args=(str(tmp_path / 'download_archive.txt'), count))
+    appender.start()
+    pending = {f"youtube drop{n}" for n in range(count)}
+    while True:
+        appending = appender.is_alive()
+        pending = {entry for entry in pending if not batcher.remove_archive_entry(str(tmp_path), entry)}
+        if not (pending and appending):
+            break
+    appender.join(30)
+    assert appender.exitcode == 0
+    assert not pending
+
+    assert read_archive(tmp_path).splitlines() == [f"youtube keep{n}" for n in range(count)]
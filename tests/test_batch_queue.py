@@ -0,0 +1,75 @@
+"""SqliteBatchQueue: removing items, then finishing and requeueing claimed ones"""
+
+import importlib.util
+import os
+import sqlite3
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def load_script(name):
+    """Import one of the GUI scripts by file name (they aren't packages)"""
+    path = os.path.join(HERE, '..', name)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(name)[0].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+batcher = load_script('YouTube-Batcher.py')
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = batcher.SqliteBatchQueue(str(tmp_path / 'queue.db'))
+    queue.add_items((f'https://youtu.be/video{n}', '/out') for n in range(1, 6))
+    yield queue
+    queue.close()
+
+def rows(queue):
+    return queue.db.execute("SELECT position, url, status FROM queue ORDER BY position").fetchall()
+
+def ids_at(queue, positions):
+    return [row[0] for row in queue.page(0, 100) if row[1] in positions]
+
+def test_remove_takes_a_generator(queue):
+    queue.remove(row_id for row_id in ids_at(queue, {2, 4}))
+    assert [(position, url) for position, url, _ in rows(queue)] == [
+        (1, 'https://youtu.be/video1'), (2, 'https://youtu.be/video3'), (3, 'https://youtu.be/video5')]
+    assert len(queue) == 3
+
+def test_finish_and_requeue_hit_one_row_after_remove(queue):
+    queue.prepare_run()
+    first = queue.next_item()
+    second = queue.next_item()
+    assert (first[0], second[0]) == (1, 2)
+
+    # Removing item 1 renumbers the claimed item 2 as 1
+    queue.remove(ids_at(queue, {1}))
+    queue.finish_item(second, True, "completed")
+    assert rows(queue) == [(1, 'https://youtu.be/video2', 'done'), (2, 'https://youtu.be/video3', 'pending'),
+                           (3, 'https://youtu.be/video4', 'pending'), (4, 'https://youtu.be/video5', 'pending')]
+
+    third = queue.next_item()
+    queue.remove(ids_at(queue, {1}))
+    queue.requeue(third)
+    assert [status for _, _, status in rows(queue)] == ['pending', 'pending', 'pending']
+    assert queue.next_item()[1] == 'https://youtu.be/video3'
+
+def test_duplicate_positions_are_renumbered_on_open(tmp_path):
+    path = str(tmp_path / 'queue.db')
+    batcher.SqliteBatchQueue(path).add_items((f'https://youtu.be/video{n}', '/out') for n in range(1, 6))
+    db = sqlite3.connect(path)
+    db.execute("UPDATE queue SET position = position - 1 WHERE position > 2")
+    db.execute("DELETE FROM queue WHERE position = 1 AND id = 1")
+    db.commit()
+    db.close()
+
+    queue = batcher.SqliteBatchQueue(path)
+    assert [position for position, _, _ in rows(queue)] == [1, 2, 3, 4]
+    queue.close()
+
+def test_remove_skips_unknown_ids(queue):
+    known = ids_at(queue, {3})
+    queue.remove(known + [9999, known[0]])
+    assert [position for position, _, _ in rows(queue)] == [1, 2, 3, 4]
+    assert len(queue) == 4
@@ -0,0 +1,55 @@
+"""CookiePool: which failures rest a cookie profile, and how profiles are handed out"""
+
+import importlib.util
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def load_script(name):
+    """Import one of the GUI scripts by file name (they aren't packages)"""
+    path = os.path.join(HERE, '..', name)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(name)[0].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+batcher = load_script('YouTube-Batcher.py')
+
+def test_profile_failing_well_above_the_others_is_rested():
+    pool = batcher.CookiePool(['firefox:a', 'firefox:b'])
+    bad, good = pool.profiles
+    for _ in range(batcher.COOKIE_MIN_ITEMS):
+        assert pool.record(good, False) is None
+    for _ in range(batcher.COOKIE_MIN_ITEMS - 1):
+        assert pool.record(bad, True) is None  # Too few items to judge yet
+
+    cooldown, rate = pool.record(bad, True)
+    assert (cooldown, rate) == (batcher.COOKIE_COOLDOWN_SECONDS, 1.0)
+    assert bad.cooldown_until > 0 and not bad.recent  # Rested, with a fresh window
+    assert pool.peek() is good
+
+def test_failures_every_profile_sees_rest_none():
+    pool = batcher.CookiePool(['firefox:a', 'firefox:b'])
+    first, second = pool.profiles
+    for _ in range(batcher.COOKIE_ERROR_WINDOW):
+        assert pool.record(first, True) is None
+        assert pool.record(second, True) is None  # Not above the baseline: first fails as often
+    assert first.cooldown_until == second.cooldown_until == 0
+
+def test_account_errors_are_counted_but_not_in_the_rate():
+    pool = batcher.CookiePool(['firefox:a'])
+    profile, = pool.profiles
+    assert pool.record(profile, False, account_error=True) is None
+    assert (profile.items, profile.errors, profile.account_errors) == (1, 1, 1)
+    assert not profile.recent
+    assert pool.summary() == [('firefox:a', 1, 1, 1)]
+
+def test_cookie_files_and_browser_profiles(tmp_path):
+    cookies = tmp_path / 'acct.txt'
+    cookies.write_text("# Netscape HTTP Cookie File\n")
+    pool = batcher.CookiePool([str(cookies), 'chrome:Profile 2', str(tmp_path / 'missing.txt')])
+    present, browser, missing = pool.profiles
+    assert present.ytdlp_args() == ['--cookies', str(cookies)]
+    assert browser.ytdlp_args() == ['--cookies-from-browser', 'chrome:Profile 2']
+    pool.check_all()
+    assert [profile.healthy for profile in pool.profiles] == [True, True, False]
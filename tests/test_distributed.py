@@ -0,0 +1,102 @@
+"""Coordinator and worker node over local XML-RPC, in separate processes"""
+
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import xmlrpc.client
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(HERE, '..', 'YouTube-Batcher.py')
+
+def load_script(name):
+    """Import one of the GUI scripts by file name (they aren't packages)"""
+    path = os.path.join(HERE, '..', name)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(name)[0].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+batcher = load_script('YouTube-Batcher.py')
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_coordinator(batch, port):
+    """Run --coordinator in its own process; returns it once it is listening"""
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', BATCHER_TOKEN='secret')
+    process = subprocess.Popen([sys.executable, SCRIPT, '--coordinator', str(batch), '--port', str(port)],
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    pytest.fail("coordinator did not start")
+
+@pytest.fixture
+def batch(tmp_path):
+    path = tmp_path / 'batch.txt'
+    path.write_text("https://youtu.be/aaaaaaaaaaa /out/a\nhttps://youtu.be/bbbbbbbbbbb /out/b\n")
+    return path
+
+def test_worker_rides_out_a_coordinator_restart(batch, monkeypatch, capsys):
+    monkeypatch.setattr(batcher, 'COORDINATOR_RETRY_SECONDS', 0.2)  # 6 s of retries in all
+    port = free_port()
+    coordinator = start_coordinator(batch, port)
+    item_queue = restart = None
+    restarted = []
+    try:
+        item_queue = batcher.LeasedItemQueue(f'http://127.0.0.1:{port}', 'node-1', 'secret')
+        assert len(item_queue) == 2
+        first = item_queue.next_item()
+        assert first == (1, 'https://youtu.be/aaaaaaaaaaa', '/out/a')
+        item_queue.finish_item(first, True, "completed")
+
+        coordinator.kill()
+        coordinator.wait()
+        # Back a second later, skipping item 1 from its results file
+        restart = threading.Timer(1, lambda: restarted.append(start_coordinator(batch, port)))
+        restart.start()
+        assert item_queue.next_item() == (2, 'https://youtu.be/bbbbbbbbbbb', '/out/b')
+        assert "Coordinator call lease failed" in capsys.readouterr().out
+    finally:
+        if item_queue:
+            item_queue.close()
+        if restart:
+            restart.join()
+        for process in [coordinator] + restarted:
+            process.kill()
+            process.wait()
+
+    with open(batch.with_suffix('.results.jsonl'), encoding='utf-8') as f:
+        results = [json.loads(line) for line in f]
+    assert [(result['item'], result['success']) for result in results] == [(1, True)]
+
+def test_refused_call_is_not_retried(batch, capsys):
+    port = free_port()
+    coordinator = start_coordinator(batch, port)
+    try:
+        with pytest.raises(xmlrpc.client.Fault):
+            batcher.LeasedItemQueue(f'http://127.0.0.1:{port}', 'node-1', 'wrong token')
+    finally:
+        coordinator.kill()
+        coordinator.wait()
+    assert "retrying" not in capsys.readouterr().out
+
+def test_unreachable_coordinator_raises_after_the_retries(monkeypatch, capsys):
+    monkeypatch.setattr(batcher, 'COORDINATOR_RETRY_SECONDS', 0.01)
+    with pytest.raises(OSError):
+        batcher.LeasedItemQueue(f'http://127.0.0.1:{free_port()}', 'node-1', 'secret')
+    assert capsys.readouterr().out.count("retrying") == batcher.COORDINATOR_RETRIES
@@ -0,0 +1,72 @@
+"""BandwidthSchedule windows and the TokenBucket that enforces their rates"""
+
+import importlib.util
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def load_script(name):
+    """Import one of the GUI scripts by file name (they aren't packages)"""
+    path = os.path.join(HERE, '..', name)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(name)[0].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+batcher = load_script('YouTube-Batcher.py')
+
+def test_windows_with_days_rates_and_workers():
+    schedule = batcher.BandwidthSchedule("Mon-Fri 08:00-18:00=5M/1; Sat+Sun 22:00-06:30=max/8")
+    office, night = schedule.windows
+    assert office.days == {0, 1, 2, 3, 4}
+    assert (office.start, office.end, office.rate, office.workers) == (480, 1080, 5 * 1024 ** 2, 1)
+    assert night.days == {5, 6}
+    assert (night.start, night.end, night.rate, night.workers) == (1320, 390, None, 8)
+    assert schedule.max_workers() == 8
+
+def test_window_at_wraps_past_midnight():
+    schedule = batcher.BandwidthSchedule("Mon-Fri 08:00-18:00=5M/1, Sat+Sun 22:00-06:30=max/8")
+    office, night = schedule.windows
+    assert schedule.window_at(datetime(2024, 1, 3, 12, 0)) is office  # Wednesday
+    assert schedule.window_at(datetime(2024, 1, 3, 18, 0)) is None
+    assert schedule.window_at(datetime(2024, 1, 6, 23, 0)) is night  # Saturday night
+    assert schedule.window_at(datetime(2024, 1, 8, 6, 0)) is night  # Early Monday, after Sunday
+    assert schedule.window_at(datetime(2024, 1, 8, 23, 0)) is None  # Monday night
+
+def test_empty_schedule_is_false():
+    assert not batcher.BandwidthSchedule(" , ")
+
+@pytest.mark.parametrize('text', [
+    "25:00-08:00=max/1",
+    "08:00-99:99=max/1",
+    "08:60-09:00=max/1",
+    "Mon-Fri 8-18=max/1",
+    "Someday 08:00-18:00=max/1",
+    "08:00-18:00=fast/1",
+])
+def test_invalid_windows_raise(text):
+    with pytest.raises(ValueError):
+        batcher.BandwidthSchedule(text)
+
+def test_token_bucket_paces_to_its_rate():
+    bucket = batcher.TokenBucket(1024 * 1024)
+    started = time.monotonic()
+    for _ in range(8):
+        bucket.consume(64 * 1024)  # 512 KB at 1 MB/s
+    assert 0.3 < time.monotonic() - started < 1.5
+
+def test_token_bucket_unlimited_and_rate_change_wake_waiters():
+    bucket = batcher.TokenBucket(None)
+    bucket.consume(10 ** 9)  # Unlimited: returns at once
+
+    bucket.set_rate(1)  # One byte a second: this consumer would wait for days
+    done = threading.Event()
+    threading.Thread(target=lambda: (bucket.consume(10 ** 6), done.set()), daemon=True).start()
+    assert not done.wait(0.2)
+    bucket.set_rate(None)
+    assert done.wait(2)
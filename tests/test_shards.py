@@ -0,0 +1,72 @@
+"""ShardWriter: sealing shards, and salvaging the samples of one a crash left unsealed"""
+
+import importlib.util
+import io
+import json
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def load_script(name):
+    """Import one of the GUI scripts by file name (they aren't packages)"""
+    path = os.path.join(HERE, '..', name)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(name)[0].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+batcher = load_script('YouTube-Batcher.py')
+
+def sample(n, size=50_000):
+    media = bytes([n]) * size
+    return {'flac': (io.BytesIO(media), len(media)), 'json': json.dumps({'n': n}).encode('utf-8')}
+
+def read_shard(path):
+    reader = batcher.ShardReader(path)
+    try:
+        return {key: {ext: bytes(view) for ext, view in reader.sample(key).items()} for key in reader.keys()}
+    finally:
+        reader.close()
+
+def test_sealed_shard_index_points_at_members(tmp_path):
+    writer = batcher.ShardWriter(str(tmp_path), 10 ** 9, lambda message: None)
+    for n in range(3):
+        writer.add_sample(f'video{n}', sample(n))
+    writer.close()
+
+    shards = tmp_path / 'shards'
+    assert sorted(os.listdir(shards)) == ['shard-000000.idx.json', 'shard-000000.tar']
+    samples = read_shard(str(shards / 'shard-000000.tar'))
+    assert sorted(samples) == ['video0', 'video1', 'video2']
+    assert samples['video1'] == {'flac': b'\x01' * 50_000, 'json': b'{"n": 1}'}
+
+def test_unsealed_shard_is_salvaged_up_to_the_damage(tmp_path):
+    crashed = batcher.ShardWriter(str(tmp_path), 10 ** 9, lambda message: None)
+    for n in range(3):
+        crashed.add_sample(f'video{n}', sample(n))
+    crashed.tar.fileobj.flush()
+    temp_path = crashed.temp_path
+    # The crash cut the last sample's media short; its json never made it
+    with open(temp_path, 'r+b') as f:
+        f.truncate(os.path.getsize(temp_path) - 30_000)
+
+    logs = []
+    writer = batcher.ShardWriter(str(tmp_path), 10 ** 9, logs.append)
+    writer.close()
+
+    assert not os.path.exists(temp_path)
+    assert logs[0] == "📦 Recovered 2 sample(s) from unsealed shard-000000.tar.tmp"
+    samples = read_shard(str(tmp_path / 'shards' / 'shard-000001.tar'))
+    assert samples == {
+        'video0': {'flac': b'\x00' * 50_000, 'json': b'{"n": 0}'},
+        'video1': {'flac': b'\x01' * 50_000, 'json': b'{"n": 1}'},
+    }
+
+def test_unreadable_unsealed_shard_is_dropped(tmp_path):
+    shards = tmp_path / 'shards'
+    shards.mkdir()
+    (shards / 'shard-000000.tar.tmp').write_bytes(b'not a tar file' * 100)
+
+    writer = batcher.ShardWriter(str(tmp_path), 10 ** 9, lambda message: None)
+    writer.close()
+    assert os.listdir(shards) == []